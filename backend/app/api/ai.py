@@ -0,0 +1,26 @@
+"""AI infrastructure endpoints (LLM response cache, model health)."""
+from fastapi import APIRouter
+from app.config import PLANNER_MODEL, PLANNER_FALLBACK_MODELS, LLM_HEDGE_AFTER, LLM_LATENCY_BUDGET
+from app.services import llm_cache, openrouter
+
+router = APIRouter(prefix="/ai", tags=["ai"])
+
+
+@router.get("/status")
+def model_status():
+    return {
+        "models": [PLANNER_MODEL, *PLANNER_FALLBACK_MODELS],
+        "breakers": openrouter.breaker_states(),
+        "hedge_after": LLM_HEDGE_AFTER,
+        "latency_budget": LLM_LATENCY_BUDGET,
+    }
+
+
+@router.get("/cache")
+async def cache_stats():
+    return await llm_cache.stats()
+
+
+@router.delete("/cache")
+async def clear_cache():
+    return {"ok": True, "deleted": await llm_cache.clear()}
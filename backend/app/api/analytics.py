@@ -0,0 +1,26 @@
+"""Trend and correlation analytics over the daily rollups."""
+from datetime import date
+from fastapi import APIRouter, HTTPException, Query
+from app.cache import cached
+from app.config import ROLLUP_MAX_DAYS
+from app.database import get_db
+from app.services import analytics
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+
+@router.get("")
+@cached("daily_rollups")
+def get_analytics(
+    days: int = Query(90, ge=7, le=ROLLUP_MAX_DAYS),
+    end: str | None = None,
+    window: int = Query(7, ge=2, le=90),
+    min_overlap: int = Query(7, ge=3),
+):
+    """Rolling means, week-over-week deltas and metric correlations."""
+    try:
+        end_day = date.fromisoformat(end) if end else date.today()
+    except ValueError:
+        raise HTTPException(400, "Invalid 'end' date")
+    with get_db() as db:
+        return analytics.report(db, end_day, days, window, min_overlap)
@@ -0,0 +1,39 @@
+"""Dashboard aggregate: every section of the day in one request."""
+from datetime import date
+from fastapi import APIRouter, HTTPException
+from app.cache import cached
+from app.database import get_db
+from app.api import deepwork, goals, nutrition, plans, rituals, supplements, tm_progress
+
+router = APIRouter(prefix="/dashboard", tags=["dashboard"])
+
+# section -> loader(db, date); each returns the payload of the matching endpoint.
+SECTIONS = {
+    "plan": plans.load_plan,
+    "stats": goals.load_stats,
+    "goals": lambda db, d: goals.load_goals(db),
+    "rituals": rituals.load_progress,
+    "supplements": supplements.load_status,
+    "nutrition": nutrition.load_summary,
+    "deepwork": deepwork.load_stats,
+    "tm": lambda db, d: tm_progress.load_progress(db),
+}
+
+
+@router.get("/{date_str}")
+@cached("plans", "goals", "habits", "reflections", "rituals", "ritual_completions",
+        "supplements", "supplement_logs", "meals", "deepwork_sessions", "tm_progress")
+def get_dashboard(date_str: str, sections: str | None = None):
+    """Sections for ``date_str`` (comma-separated ``sections``, default all), read from one snapshot."""
+    try:
+        date.fromisoformat(date_str)
+    except ValueError:
+        raise HTTPException(400, "Invalid date")
+    names = [s.strip() for s in sections.split(",") if s.strip()] if sections else list(SECTIONS)
+    unknown = [s for s in names if s not in SECTIONS]
+    if unknown:
+        raise HTTPException(400, f"Unknown sections: {', '.join(unknown)}; expected {', '.join(SECTIONS)}")
+    with get_db() as db:
+        # Reads outside a transaction each see the latest commit; BEGIN pins one snapshot.
+        db.execute("BEGIN")
+        return {"date": date_str, **{name: SECTIONS[name](db, date_str) for name in names}}
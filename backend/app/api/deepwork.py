@@ -2,7 +2,10 @@
 from datetime import date, datetime
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
+from app.cache import cached
 from app.database import get_db
+from app.pagination import keyset_page, page
+from app.services import rollups
 
 router = APIRouter(prefix="/deepwork", tags=["deepwork"])
 
@@ -21,13 +24,12 @@ class EndSession(BaseModel):
 
 
 @router.get("")
-def list_sessions(date_filter: str | None = None, limit: int = 30):
+def list_sessions(date_filter: str | None = None, limit: int = 30, cursor: str | None = None):
     with get_db() as db:
         if date_filter:
             rows = db.execute("SELECT * FROM deepwork_sessions WHERE date = ? ORDER BY created_at DESC", (date_filter,)).fetchall()
-        else:
-            rows = db.execute("SELECT * FROM deepwork_sessions ORDER BY date DESC, created_at DESC LIMIT ?", (limit,)).fetchall()
-    return [dict(r) for r in rows]
+            return page([dict(r) for r in rows])
+        return keyset_page(db, "deepwork_sessions", limit, cursor)
 
 
 @router.post("")
@@ -38,6 +40,7 @@ def create_session(req: SessionCreate):
             "INSERT INTO deepwork_sessions (date, task, category, planned_duration, notes) VALUES (?,?,?,?,?)",
             (d, req.task, req.category, req.planned_duration, req.notes),
         )
+        rollups.refresh_day(db, d)
     return {"id": cur.lastrowid}
 
 
@@ -64,29 +67,35 @@ def end_session(session_id: int, req: EndSession):
             "UPDATE deepwork_sessions SET ended_at = ?, actual_duration = ?, focus_score = ?, notes = ? WHERE id = ?",
             (now, actual, req.focus_score, req.notes or session["notes"], session_id),
         )
+        rollups.refresh_day(db, session["date"])
     return {"ok": True, "actual_duration": actual}
 
 
-@router.get("/stats")
-def get_stats():
-    today = date.today().isoformat()
-    with get_db() as db:
-        # Today
-        today_min = db.execute(
-            "SELECT COALESCE(SUM(actual_duration), 0) FROM deepwork_sessions WHERE date = ?", (today,)
-        ).fetchone()[0]
-        # This week (last 7 days)
-        week_min = db.execute(
-            "SELECT COALESCE(SUM(actual_duration), 0) FROM deepwork_sessions WHERE date >= date(?, '-7 days')", (today,)
-        ).fetchone()[0]
-        # Total sessions
-        total = db.execute("SELECT COUNT(*) FROM deepwork_sessions WHERE actual_duration > 0").fetchone()[0]
-        avg_focus = db.execute(
-            "SELECT AVG(focus_score) FROM deepwork_sessions WHERE focus_score > 0"
-        ).fetchone()[0]
+def load_stats(db, today: str) -> dict:
+    # Today
+    today_min = db.execute(
+        "SELECT COALESCE(SUM(actual_duration), 0) FROM deepwork_sessions WHERE date = ?", (today,)
+    ).fetchone()[0]
+    # This week (last 7 days)
+    week_min = db.execute(
+        "SELECT COALESCE(SUM(actual_duration), 0) FROM deepwork_sessions WHERE date >= date(?, '-7 days')",
+        (today,),
+    ).fetchone()[0]
+    # Total sessions
+    total = db.execute("SELECT COUNT(*) FROM deepwork_sessions WHERE actual_duration > 0").fetchone()[0]
+    avg_focus = db.execute(
+        "SELECT AVG(focus_score) FROM deepwork_sessions WHERE focus_score > 0"
+    ).fetchone()[0]
     return {
         "today_minutes": today_min,
         "week_minutes": week_min,
         "total_sessions": total,
         "avg_focus_score": round(avg_focus, 1) if avg_focus else 0,
     }
+
+
+@router.get("/stats")
+@cached("deepwork_sessions")
+def get_stats():
+    with get_db() as db:
+        return load_stats(db, date.today().isoformat())
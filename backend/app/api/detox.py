@@ -3,6 +3,8 @@ from datetime import date
 from fastapi import APIRouter
 from pydantic import BaseModel
 from app.database import get_db
+from app.pagination import keyset_page
+from app.services import rollups
 
 router = APIRouter(prefix="/detox", tags=["detox"])
 
@@ -22,10 +24,9 @@ class DetoxUpdate(BaseModel):
 
 
 @router.get("")
-def list_sessions(limit: int = 30):
+def list_sessions(limit: int = 30, cursor: str | None = None):
     with get_db() as db:
-        rows = db.execute("SELECT * FROM detox_sessions ORDER BY date DESC LIMIT ?", (limit,)).fetchall()
-    return [dict(r) for r in rows]
+        return keyset_page(db, "detox_sessions", limit, cursor)
 
 
 @router.post("")
@@ -36,6 +37,7 @@ def create_session(req: DetoxCreate):
             "INSERT INTO detox_sessions (date, start_time, end_time, duration_min, success) VALUES (?,?,?,?,?)",
             (d, req.start_time, req.end_time, req.duration_min, 1 if req.success else 0),
         )
+        rollups.refresh_day(db, d)
     return {"id": cur.lastrowid}
 
 
@@ -56,4 +58,5 @@ def update_session(session_id: int, req: DetoxUpdate):
     values.append(session_id)
     with get_db() as db:
         db.execute(f"UPDATE detox_sessions SET {', '.join(updates)} WHERE id = ?", values)
+        rollups.refresh_for(db, "detox_sessions", session_id)
     return {"ok": True}
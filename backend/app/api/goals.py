@@ -1,7 +1,10 @@
 """Goals and habits CRUD."""
-from fastapi import APIRouter, HTTPException
+from datetime import date
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
+from app.cache import cached, reads
 from app.database import get_db
+from app.services import bitmaps, habit_streaks
 
 router = APIRouter(tags=["goals"])
 
@@ -22,14 +25,19 @@ class GoalUpdate(BaseModel):
     is_active: bool | None = None
 
 
+def load_goals(db, active_only: bool = True) -> list[dict]:
+    if active_only:
+        rows = db.execute("SELECT * FROM goals WHERE is_active = 1 ORDER BY created_at DESC").fetchall()
+    else:
+        rows = db.execute("SELECT * FROM goals ORDER BY is_active DESC, created_at DESC").fetchall()
+    return [dict(r) for r in rows]
+
+
 @router.get("/goals")
+@reads("goals")
 def list_goals(active_only: bool = True):
     with get_db() as db:
-        if active_only:
-            rows = db.execute("SELECT * FROM goals WHERE is_active = 1 ORDER BY created_at DESC").fetchall()
-        else:
-            rows = db.execute("SELECT * FROM goals ORDER BY is_active DESC, created_at DESC").fetchall()
-    return [dict(r) for r in rows]
+        return load_goals(db, active_only)
 
 
 @router.post("/goals")
@@ -82,13 +90,15 @@ class HabitLogCreate(BaseModel):
 
 
 @router.get("/habits")
+@reads("habits")
 def list_habits(active_only: bool = True):
     with get_db() as db:
         if active_only:
             rows = db.execute("SELECT * FROM habits WHERE is_active = 1 ORDER BY created_at").fetchall()
         else:
             rows = db.execute("SELECT * FROM habits ORDER BY is_active DESC, created_at").fetchall()
-    return [dict(r) for r in rows]
+    today = date.today()
+    return [{**dict(r), "streak": habit_streaks.effective_streak(dict(r), today)} for r in rows]
 
 
 @router.post("/habits")
@@ -103,83 +113,64 @@ def create_habit(req: HabitCreate):
 
 @router.post("/habits/{habit_id}/log/{log_date}")
 def log_habit(habit_id: int, log_date: str, req: HabitLogCreate):
+    try:
+        date.fromisoformat(log_date)
+    except ValueError:
+        raise HTTPException(400, "Invalid date")
     with get_db() as db:
-        db.execute(
-            "INSERT OR REPLACE INTO habit_logs (habit_id, date, completed) VALUES (?, ?, ?)",
-            (habit_id, log_date, 1 if req.completed else 0),
-        )
-        # Update streak
-        if req.completed:
-            db.execute("UPDATE habits SET streak = streak + 1 WHERE id = ?", (habit_id,))
-            db.execute("UPDATE habits SET best_streak = MAX(best_streak, streak) WHERE id = ?", (habit_id,))
-        else:
-            db.execute("UPDATE habits SET streak = 0 WHERE id = ?", (habit_id,))
-    return {"ok": True}
+        habit = habit_streaks.record_log(db, habit_id, log_date, req.completed)
+        if habit is not None:
+            bitmaps.refresh(db, "habit", habit_id, log_date)
+    if habit is None:
+        raise HTTPException(404, "Habit not found")
+    return {"ok": True, **habit}
 
 
 @router.delete("/habits/{habit_id}")
 def delete_habit(habit_id: int):
     with get_db() as db:
         db.execute("DELETE FROM habits WHERE id = ?", (habit_id,))
+        bitmaps.drop(db, "habit", habit_id)
     return {"ok": True}
 
 
-# ── Reflections ──────────────────────────────────────────────────────────────
-
-class ReflectionCreate(BaseModel):
-    date: str
-    wins: str = ""
-    lessons: str = ""
-    mood: int = 5
-    productivity_score: int = 5
-    notes: str = ""
-
-
-@router.get("/reflections/{ref_date}")
-def get_reflection(ref_date: str):
-    with get_db() as db:
-        row = db.execute("SELECT * FROM reflections WHERE date = ?", (ref_date,)).fetchone()
-    if not row:
-        raise HTTPException(404, "Reflection not found")
-    return dict(row)
-
-
-@router.post("/reflections")
-def create_reflection(req: ReflectionCreate):
-    with get_db() as db:
-        db.execute(
-            "INSERT OR REPLACE INTO reflections (date, wins, lessons, mood, productivity_score, notes) "
-            "VALUES (?, ?, ?, ?, ?, ?)",
-            (req.date, req.wins, req.lessons, req.mood, req.productivity_score, req.notes),
-        )
-    return {"ok": True}
+# ── Stats ────────────────────────────────────────────────────────────────────
 
+# Gaps-and-islands: consecutive dates share ``julianday(date) - row_number``,
+# so grouping on it yields one row per streak of days with a completed task.
+# Future-dated plans and unparseable dates are left out.
+_STREAKS_SQL = """
+    WITH active AS (
+        SELECT date, julianday(date) - ROW_NUMBER() OVER (ORDER BY date) AS island
+        FROM plans WHERE tasks_done > 0 AND date <= :today AND julianday(date) IS NOT NULL
+    ), streaks AS (
+        SELECT MIN(date) AS start, MAX(date) AS end, COUNT(*) AS days FROM active GROUP BY island
+    )
+    SELECT start, end, days, MAX(days) OVER () AS longest
+    FROM streaks ORDER BY end DESC LIMIT :limit
+"""
+
+
+def _streaks(db, today: str, history: int) -> dict:
+    """Current and longest streak plus the ``history`` most recent streaks."""
+    rows = db.execute(_STREAKS_SQL, {"today": today, "limit": max(history, 1)}).fetchall()
+    return {
+        "current_streak": rows[0]["days"] if rows and rows[0]["end"] == today else 0,
+        "longest_streak": rows[0]["longest"] if rows else 0,
+        "streak_history": [{"start": r["start"], "end": r["end"], "days": r["days"]} for r in rows[:history]],
+    }
 
-# ── Stats ────────────────────────────────────────────────────────────────────
 
-@router.get("/stats")
-def get_stats():
-    with get_db() as db:
-        total_tasks = db.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
-        completed_tasks = db.execute("SELECT COUNT(*) FROM tasks WHERE is_completed = 1").fetchone()[0]
-        total_plans = db.execute("SELECT COUNT(*) FROM plans").fetchone()[0]
-        active_goals = db.execute("SELECT COUNT(*) FROM goals WHERE is_active = 1").fetchone()[0]
-        active_habits = db.execute("SELECT COUNT(*) FROM habits WHERE is_active = 1").fetchone()[0]
-        avg_mood = db.execute("SELECT AVG(mood) FROM reflections").fetchone()[0]
-        avg_productivity = db.execute("SELECT AVG(productivity_score) FROM reflections").fetchone()[0]
-        # Streak: consecutive days with plans
-        streak = 0
-        from datetime import date, timedelta
-        d = date.today()
-        while True:
-            plan = db.execute("SELECT id FROM plans WHERE date = ?", (d.isoformat(),)).fetchone()
-            if not plan:
-                break
-            tasks = db.execute("SELECT COUNT(*) FROM tasks WHERE plan_id = ? AND is_completed = 1", (plan["id"],)).fetchone()[0]
-            if tasks == 0:
-                break
-            streak += 1
-            d -= timedelta(days=1)
+def load_stats(db, today: str, history: int = 10) -> dict:
+    """All-time task/goal/reflection stats; streaks are relative to ``today``."""
+    total_tasks, completed_tasks, total_plans = db.execute(
+        "SELECT COALESCE(SUM(tasks_total), 0), COALESCE(SUM(tasks_done), 0), COUNT(*) FROM plans"
+    ).fetchone()
+    active_goals = db.execute("SELECT COUNT(*) FROM goals WHERE is_active = 1").fetchone()[0]
+    active_habits = db.execute("SELECT COUNT(*) FROM habits WHERE is_active = 1").fetchone()[0]
+    avg_mood = db.execute("SELECT AVG(mood) FROM reflections").fetchone()[0]
+    avg_productivity = db.execute("SELECT AVG(productivity_score) FROM reflections").fetchone()[0]
+    streaks = _streaks(db, today, history)
 
     return {
         "total_tasks": total_tasks,
@@ -190,5 +181,12 @@ def get_stats():
         "active_habits": active_habits,
         "avg_mood": round(avg_mood, 1) if avg_mood else None,
         "avg_productivity": round(avg_productivity, 1) if avg_productivity else None,
-        "current_streak": streak,
+        **streaks,
     }
+
+
+@router.get("/stats")
+@cached("plans", "goals", "habits", "reflections")
+def get_stats(history: int = Query(10, ge=0, le=100)):
+    with get_db() as db:
+        return load_stats(db, date.today().isoformat(), history)
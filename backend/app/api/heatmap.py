@@ -0,0 +1,76 @@
+"""Year heatmaps of ritual, supplement and habit completions."""
+import base64
+from datetime import date
+from typing import Literal
+from fastapi import APIRouter, HTTPException, Path
+from app.cache import cached
+from app.database import get_db
+from app.services import bitmaps
+
+router = APIRouter(prefix="/heatmap", tags=["heatmap"])
+
+Kind = Literal["ritual", "supplement", "habit"]
+
+_NAME_COLUMN = {"ritual": "name", "supplement": "name", "habit": "title"}
+
+
+def _ids(ids: str | None) -> list[int] | None:
+    if not ids:
+        return None
+    try:
+        return [int(i) for i in ids.split(",") if i.strip()]
+    except ValueError:
+        raise HTTPException(400, "'ids' must be comma-separated integers")
+
+
+@router.get("/{kind}/day/{date_str}")
+@cached("completion_bitmaps")
+def done_on(kind: Kind, date_str: str, ids: str | None = None):
+    """Entities of ``kind`` done on ``date_str``."""
+    try:
+        day = date.fromisoformat(date_str)
+    except ValueError:
+        raise HTTPException(400, "Invalid date")
+    with get_db() as db:
+        maps = bitmaps.load(db, kind, day.year, _ids(ids))
+    return {"date": date_str, "kind": kind, "done": sorted(i for i, bits in maps.items() if bitmaps.is_done(bits, day))}
+
+
+@router.get("/{kind}/{year}")
+@cached("completion_bitmaps", "rituals", "supplements", "habits")
+def get_heatmap(kind: Kind, year: int = Path(ge=1, le=9998), ids: str | None = None):
+    """Packed year bitmaps plus adherence and streaks for many entities at once.
+
+    ``bits`` is base64 of 46 bytes; day ``i`` of the year (Jan 1 is 0) is bit
+    ``i % 8`` (LSB first) of byte ``i // 8``. Defaults to active entities.
+    """
+    wanted = _ids(ids)
+    today = date.today()
+    if year < today.year:
+        end = bitmaps.year_days(year) - 1
+    elif year == today.year:
+        end = bitmaps.day_index(today)
+    else:
+        end = -1
+    table, name = bitmaps.KINDS[kind][0], _NAME_COLUMN[kind]
+    with get_db() as db:
+        if wanted is None:
+            entities = db.execute(f"SELECT id, {name} AS name FROM {table} WHERE is_active = 1 ORDER BY id").fetchall()
+        else:
+            entities = db.execute(
+                f"SELECT id, {name} AS name FROM {table} WHERE id IN ({','.join('?' * len(wanted))}) ORDER BY id", wanted
+            ).fetchall()
+        maps = bitmaps.load(db, kind, year, [e["id"] for e in entities])
+        result = []
+        for e in entities:
+            bits = maps.get(e["id"], 0)
+            result.append({
+                "id": e["id"],
+                "name": e["name"],
+                "bits": base64.b64encode(bitmaps.to_blob(bits)).decode(),
+                "days_done": bits.bit_count(),
+                "adherence": bitmaps.adherence(bits, end),
+                "longest_streak": bitmaps.longest_run(bits),
+                "current_streak": bitmaps.current_streak(db, kind, e["id"], today, bits) if year == today.year else None,
+            })
+    return {"kind": kind, "year": year, "days": bitmaps.year_days(year), "entities": result}
@@ -2,7 +2,10 @@
 from datetime import date
 from fastapi import APIRouter
 from pydantic import BaseModel
+from app.cache import cached
 from app.database import get_db
+from app.pagination import keyset_page, page
+from app.services import rollups
 
 router = APIRouter(prefix="/nutrition", tags=["nutrition"])
 
@@ -19,13 +22,12 @@ class MealCreate(BaseModel):
 
 
 @router.get("")
-def list_meals(date_filter: str | None = None, limit: int = 50):
+def list_meals(date_filter: str | None = None, limit: int = 50, cursor: str | None = None):
     with get_db() as db:
         if date_filter:
             rows = db.execute("SELECT * FROM meals WHERE date = ? ORDER BY time", (date_filter,)).fetchall()
-        else:
-            rows = db.execute("SELECT * FROM meals ORDER BY date DESC, time LIMIT ?", (limit,)).fetchall()
-    return [dict(r) for r in rows]
+            return page([dict(r) for r in rows])
+        return keyset_page(db, "meals", limit, cursor)
 
 
 @router.post("")
@@ -35,26 +37,27 @@ def create_meal(req: MealCreate):
             "INSERT INTO meals (date, meal_type, description, calories, protein, carbs, fat, time) VALUES (?,?,?,?,?,?,?,?)",
             (req.date, req.meal_type, req.description, req.calories, req.protein, req.carbs, req.fat, req.time),
         )
+        rollups.refresh_day(db, req.date)
     return {"id": cur.lastrowid}
 
 
 @router.delete("/{meal_id}")
 def delete_meal(meal_id: int):
     with get_db() as db:
+        row = db.execute("SELECT date FROM meals WHERE id = ?", (meal_id,)).fetchone()
         db.execute("DELETE FROM meals WHERE id = ?", (meal_id,))
+        if row:
+            rollups.refresh_day(db, row["date"])
     return {"ok": True}
 
 
-@router.get("/daily-summary")
-def daily_summary(date_filter: str | None = None):
-    d = date_filter or date.today().isoformat()
-    with get_db() as db:
-        row = db.execute(
-            "SELECT COALESCE(SUM(calories),0) as total_calories, COALESCE(SUM(protein),0) as total_protein, "
-            "COALESCE(SUM(carbs),0) as total_carbs, COALESCE(SUM(fat),0) as total_fat, COUNT(*) as meal_count "
-            "FROM meals WHERE date = ?",
-            (d,),
-        ).fetchone()
+def load_summary(db, d: str) -> dict:
+    row = db.execute(
+        "SELECT COALESCE(SUM(calories),0) as total_calories, COALESCE(SUM(protein),0) as total_protein, "
+        "COALESCE(SUM(carbs),0) as total_carbs, COALESCE(SUM(fat),0) as total_fat, COUNT(*) as meal_count "
+        "FROM meals WHERE date = ?",
+        (d,),
+    ).fetchone()
     return {
         "date": d,
         "total_calories": row["total_calories"],
@@ -64,3 +67,10 @@ def daily_summary(date_filter: str | None = None):
         "meal_count": row["meal_count"],
         "targets": {"calories": 2000, "protein": 160, "carbs": 200, "fat": 70},
     }
+
+
+@router.get("/daily-summary")
+@cached("meals")
+def daily_summary(date_filter: str | None = None):
+    with get_db() as db:
+        return load_summary(db, date_filter or date.today().isoformat())
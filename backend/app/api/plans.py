@@ -1,17 +1,48 @@
 """Plan CRUD + AI generation endpoints."""
+import asyncio
+import json
+import logging
 from datetime import date, datetime, timedelta
-from fastapi import APIRouter, HTTPException
+from typing import Literal
+import httpx
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from app.database import get_db
-from app.services.ai_planner import generate_daily_plan
+from app.cache import reads
+from app.config import OPENROUTER_API_KEY, PLAN_BATCH_CONCURRENCY, PLAN_BATCH_MAX_DAYS
+from app.database import get_db, run_db
+from app.pagination import MAX_PAGE_SIZE, encode_cursor, keyset_page, page
+from app.services import jobs, local_planner, plan_context, rollups, schedule
+from app.services.ai_planner import PlanGenerationError, generate_daily_plan, stream_daily_plan
 
+logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/plans", tags=["plans"])
 
+DATE_PATTERN = r"^\d{4}-\d{2}-\d{2}$"
+
+# ai: model only; local: offline rule-based planner; auto: model, falling
+# back to the local planner when it is unavailable.
+PlanMode = Literal["ai", "local", "auto"]
+
 
 class PlanCreate(BaseModel):
-    date: str = Field(..., pattern=r"^\d{4}-\d{2}-\d{2}$")
+    date: str = Field(..., pattern=DATE_PATTERN)
+    focus: str = Field("", max_length=500)
+    energy_level: int = Field(7, ge=1, le=10)
+    task_count: int | None = Field(None, ge=3, le=16)
+    mode: PlanMode = "auto"
+    use_cache: bool = True
+
+
+class PlanBatchCreate(BaseModel):
+    start: str = Field(..., pattern=DATE_PATTERN)
+    end: str = Field(..., pattern=DATE_PATTERN)
     focus: str = Field("", max_length=500)
     energy_level: int = Field(7, ge=1, le=10)
+    concurrency: int | None = Field(None, ge=1, le=8)
+    task_count: int | None = Field(None, ge=3, le=16)
+    mode: PlanMode = "auto"
+    use_cache: bool = True
 
 
 class TaskUpdate(BaseModel):
@@ -27,119 +58,183 @@ class TaskCreate(BaseModel):
     priority: int = Field(2, ge=1, le=3)
 
 
+def _progress(done: int, total: int) -> int:
+    return round(done / total * 100) if total else 0
+
+
 @router.get("")
-def list_plans(limit: int = 30):
+def list_plans(
+    limit: int = Query(30, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    before: str | None = Query(None, pattern=DATE_PATTERN),
+    after: str | None = Query(None, pattern=DATE_PATTERN),
+):
+    """Plans newest first with their tasks and progress.
+
+    Page with the returned ``next_cursor``, or jump by date with the
+    exclusive ``before``/``after`` bounds.
+    """
+    if sum(1 for c in (cursor, before, after) if c) > 1:
+        raise HTTPException(400, "Use only one of 'cursor', 'before' or 'after'")
     with get_db() as db:
-        plans = db.execute(
-            "SELECT * FROM plans ORDER BY date DESC LIMIT ?", (limit,)
-        ).fetchall()
-        result = []
-        for p in plans:
-            tasks = db.execute(
-                "SELECT * FROM tasks WHERE plan_id = ? ORDER BY sort_order, time_slot",
-                (p["id"],),
+        if after:
+            # The ``limit`` plans right after ``after`` plus the one the cursor
+            # would continue with, so a cursor is only returned when it exists.
+            rows = db.execute(
+                "SELECT * FROM (SELECT * FROM plans WHERE date > ? ORDER BY date ASC LIMIT ?) "
+                "UNION ALL SELECT * FROM (SELECT * FROM plans WHERE date <= ? ORDER BY date DESC LIMIT 1) "
+                "ORDER BY date DESC",
+                (after, limit, after),
             ).fetchall()
-            total = len(tasks)
-            done = sum(1 for t in tasks if t["is_completed"])
-            result.append({
-                **dict(p),
-                "tasks": [dict(t) for t in tasks],
-                "progress": round(done / total * 100) if total else 0,
-            })
-        return result
+            items = [dict(r) for r in rows if r["date"] > after]
+            result = page(items, encode_cursor(items[-1]["date"], items[-1]["id"])
+                          if items and len(rows) > len(items) else None)
+        elif before:
+            result = keyset_page(db, "plans", limit, where="date < ?", params=(before,))
+        else:
+            result = keyset_page(db, "plans", limit, cursor)
+        plans = result["items"]
+        if not plans:
+            return result
+        ids = [p["id"] for p in plans]
+        tasks = db.execute(
+            f"SELECT * FROM tasks WHERE plan_id IN ({','.join('?' * len(ids))}) "
+            "ORDER BY plan_id, sort_order, time_slot",
+            ids,
+        ).fetchall()
+
+    by_plan: dict[int, list[dict]] = {pid: [] for pid in ids}
+    for t in tasks:
+        by_plan[t["plan_id"]].append(dict(t))
+    for p in plans:
+        p["tasks"] = by_plan[p["id"]]
+        p["progress"] = _progress(p["tasks_done"], p["tasks_total"])
+    return result
+
+
+def load_plan(db, plan_date: str) -> dict | None:
+    plan = db.execute("SELECT * FROM plans WHERE date = ?", (plan_date,)).fetchone()
+    if not plan:
+        return None
+    tasks = db.execute(
+        "SELECT * FROM tasks WHERE plan_id = ? ORDER BY sort_order, time_slot",
+        (plan["id"],),
+    ).fetchall()
+    return {
+        **dict(plan),
+        "tasks": [dict(t) for t in tasks],
+        "progress": _progress(plan["tasks_done"], plan["tasks_total"]),
+    }
 
 
 @router.get("/{plan_date}")
+@reads("plans")
 def get_plan(plan_date: str):
     with get_db() as db:
-        plan = db.execute("SELECT * FROM plans WHERE date = ?", (plan_date,)).fetchone()
-        if not plan:
-            raise HTTPException(404, "Plan not found")
-        tasks = db.execute(
-            "SELECT * FROM tasks WHERE plan_id = ? ORDER BY sort_order, time_slot",
-            (plan["id"],),
-        ).fetchall()
-        total = len(tasks)
-        done = sum(1 for t in tasks if t["is_completed"])
-        return {
-            **dict(plan),
-            "tasks": [dict(t) for t in tasks],
-            "progress": round(done / total * 100) if total else 0,
-        }
+        plan = load_plan(db, plan_date)
+    if not plan:
+        raise HTTPException(404, "Plan not found")
+    return plan
 
 
-@router.post("/generate")
-async def generate_plan(req: PlanCreate):
-    """Generate AI-powered daily plan."""
-    plan_date = req.date
-    weekday = datetime.strptime(plan_date, "%Y-%m-%d").weekday()
+def _start_plan(db, plan_date: str, focus: str, energy_level: int) -> int:
+    """Upsert the plan row and drop its previous AI-generated tasks."""
+    existing = db.execute("SELECT id FROM plans WHERE date = ?", (plan_date,)).fetchone()
+    if existing:
+        plan_id = existing["id"]
+        db.execute("UPDATE plans SET focus = ?, energy_level = ?, updated_at = datetime('now') WHERE id = ?",
+                   (focus, energy_level, plan_id))
+        db.execute("DELETE FROM tasks WHERE plan_id = ? AND is_ai_generated = 1", (plan_id,))
+    else:
+        cur = db.execute("INSERT INTO plans (date, focus, energy_level) VALUES (?, ?, ?)",
+                         (plan_date, focus, energy_level))
+        plan_id = cur.lastrowid
+    return plan_id
 
-    # Get active goals and habits
-    with get_db() as db:
-        goals = [dict(g) for g in db.execute(
-            "SELECT * FROM goals WHERE is_active = 1"
-        ).fetchall()]
-        habits = [dict(h) for h in db.execute(
-            "SELECT * FROM habits WHERE is_active = 1"
-        ).fetchall()]
-
-        # Yesterday's summary
-        yesterday = (datetime.strptime(plan_date, "%Y-%m-%d") - timedelta(days=1)).strftime("%Y-%m-%d")
-        yesterday_plan = db.execute("SELECT * FROM plans WHERE date = ?", (yesterday,)).fetchone()
-        yesterday_summary = ""
-        if yesterday_plan:
-            yt = db.execute("SELECT * FROM tasks WHERE plan_id = ?", (yesterday_plan["id"],)).fetchall()
-            total = len(yt)
-            done = sum(1 for t in yt if t["is_completed"])
-            yesterday_summary = f"Выполнено {done}/{total} задач ({round(done/total*100) if total else 0}%)"
-            reflection = db.execute("SELECT * FROM reflections WHERE date = ?", (yesterday,)).fetchone()
-            if reflection:
-                yesterday_summary += f". Настроение: {reflection['mood']}/10. Уроки: {reflection['lessons']}"
-
-    # Generate plan via AI
-    ai_result = await generate_daily_plan(
-        date=plan_date,
-        weekday=weekday,
-        focus=req.focus,
-        energy_level=req.energy_level,
-        goals=goals,
-        habits=habits,
-        yesterday_summary=yesterday_summary,
+
+def _insert_ai_task(db, plan_id: int, task: dict, sort_order: int) -> int | None:
+    title = task.get("title")
+    if not title:
+        return None
+    cur = db.execute(
+        "INSERT INTO tasks (plan_id, category, title, description, time_slot, duration_min, priority, is_ai_generated, sort_order) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, 1, ?)",
+        (plan_id, task.get("category", "personal"), title,
+         task.get("description", ""), task.get("time_slot", ""),
+         task.get("duration_min", 30), task.get("priority", 2), sort_order),
     )
+    return cur.lastrowid
 
-    if "error" in ai_result:
-        raise HTTPException(500, ai_result["error"])
 
-    # Save plan and tasks
-    with get_db() as db:
-        # Upsert plan
-        existing = db.execute("SELECT id FROM plans WHERE date = ?", (plan_date,)).fetchone()
-        if existing:
-            plan_id = existing["id"]
-            db.execute("UPDATE plans SET focus = ?, energy_level = ?, updated_at = datetime('now') WHERE id = ?",
-                       (req.focus, req.energy_level, plan_id))
-            db.execute("DELETE FROM tasks WHERE plan_id = ? AND is_ai_generated = 1", (plan_id,))
-        else:
-            cur = db.execute("INSERT INTO plans (date, focus, energy_level) VALUES (?, ?, ?)",
-                             (plan_date, req.focus, req.energy_level))
-            plan_id = cur.lastrowid
-
-        # Insert AI tasks
-        for i, task in enumerate(ai_result.get("tasks", [])):
-            title = task.get("title")
-            if not title:
-                continue
-            db.execute(
-                "INSERT INTO tasks (plan_id, category, title, description, time_slot, duration_min, priority, is_ai_generated, sort_order) "
-                "VALUES (?, ?, ?, ?, ?, ?, ?, 1, ?)",
-                (plan_id, task.get("category", "personal"), title,
-                 task.get("description", ""), task.get("time_slot", ""),
-                 task.get("duration_min", 30), task.get("priority", 2), i),
+def _start_with_task(db, plan_date: str, focus: str, energy_level: int, task: dict) -> tuple[int, int] | None:
+    """Replace the previous AI tasks with ``task`` in one transaction.
+
+    Returns ``(plan_id, task_id)``, or None without writing anything when
+    ``task`` has no title.
+    """
+    if not task.get("title"):
+        return None
+    plan_id = _start_plan(db, plan_date, focus, energy_level)
+    return plan_id, _insert_ai_task(db, plan_id, task, 0)
+
+
+def _save_plan(db, plan_date: str, focus: str, energy_level: int, ai_result: dict) -> int:
+    """Upsert the plan row and replace its AI-generated tasks."""
+    plan_id = _start_plan(db, plan_date, focus, energy_level)
+    for i, task in enumerate(ai_result.get("tasks", [])):
+        _insert_ai_task(db, plan_id, task, i)
+    rollups.refresh_day(db, plan_date)
+    return plan_id
+
+
+def _wants_ai(mode: str) -> bool:
+    return mode == "ai" or (mode == "auto" and bool(OPENROUTER_API_KEY))
+
+
+async def _generate(req: PlanCreate, report=None) -> dict:
+    """Build the prompt context, call the planner and save the result."""
+    plan_date = req.date
+    weekday = datetime.strptime(plan_date, "%Y-%m-%d").weekday()
+
+    if report:
+        await report("loading_context")
+    ctx = await run_db(plan_context.load, plan_date, req.focus)
+
+    if report:
+        await report("generating")
+    ai_result = None
+    if _wants_ai(req.mode):
+        try:
+            ai_result = await generate_daily_plan(
+                date=plan_date,
+                weekday=weekday,
+                focus=req.focus,
+                energy_level=req.energy_level,
+                goals=ctx.goals,
+                habits=ctx.habits,
+                yesterday_summary=ctx.yesterday_summary,
+                use_cache=req.use_cache,
+                task_count=req.task_count,
             )
+            if "error" in ai_result:
+                raise PlanGenerationError(ai_result["error"])
+        except (PlanGenerationError, httpx.HTTPError) as e:
+            if req.mode == "ai":
+                raise
+            logger.warning("AI planner failed for %s, using local planner: %s", plan_date, e)
+            ai_result = None
+    mode = "ai" if ai_result is not None else "local"
+    if ai_result is None:
+        ai_result = await run_db(local_planner.plan_day, plan_date, req.energy_level, ctx.goals, req.task_count)
+
+    if report:
+        await report("saving")
+    plan_id = await run_db(_save_plan, plan_date, req.focus, req.energy_level, ai_result)
 
     return {
         "plan_id": plan_id,
         "date": plan_date,
+        "mode": mode,
         "big_three": ai_result.get("big_three", []),
         "daily_tip": ai_result.get("daily_tip", ""),
         "evening_routine": ai_result.get("evening_routine", ""),
@@ -147,6 +242,256 @@ async def generate_plan(req: PlanCreate):
     }
 
 
+@jobs.register("generate_plan")
+async def _generate_plan_job(payload: dict, report) -> dict:
+    return await _generate(PlanCreate(**payload), report)
+
+
+@router.post("/generate", status_code=202)
+async def generate_plan(req: PlanCreate):
+    """Queue AI plan generation; poll ``GET /plans/jobs/{job_id}`` for the result."""
+    job = await jobs.enqueue("generate_plan", req.model_dump())
+    return {"job_id": job["id"], "status": job["status"], "status_url": f"/api/plans/jobs/{job['id']}"}
+
+
+def _save_batch(db, days: list[str], focus: str, energy_level: int, results: list[dict]) -> list[int | None]:
+    return [
+        None if "error" in result else _save_plan(db, day, focus, energy_level, result)
+        for day, result in zip(days, results)
+    ]
+
+
+async def _generate_batch(req: PlanBatchCreate, report=None) -> dict:
+    """Generate plans for ``req.start``..``req.end`` and save them together.
+
+    Context is loaded once and all calls share the app-wide HTTP client. Days
+    run concurrently under a semaphore, but each
+    day's prompt carries the previous day's Big 3, so day N+1 starts as soon
+    as day N has streamed its ``big_three`` (the first field the model
+    writes) rather than after its whole completion.
+    """
+    start = datetime.strptime(req.start, "%Y-%m-%d").date()
+    end = datetime.strptime(req.end, "%Y-%m-%d").date()
+    days = [(start + timedelta(days=i)).isoformat() for i in range((end - start).days + 1)]
+
+    if report:
+        await report("loading_context")
+    ctx = await run_db(plan_context.load, days[0], req.focus)
+
+    semaphore = asyncio.Semaphore(req.concurrency or PLAN_BATCH_CONCURRENCY)
+    loop = asyncio.get_running_loop()
+    carried = [loop.create_future() for _ in days]
+    results: list[dict] = [{} for _ in days]
+    finished = 0
+
+    async def run_day(i: int, day: str):
+        nonlocal finished
+        plan: dict = {}
+        try:
+            if _wants_ai(req.mode):
+                try:
+                    summary = ctx.yesterday_summary
+                    if i:
+                        prev_big_three = await carried[i - 1]
+                        summary = (f"План на {days[i - 1]} уже составлен, "
+                                   f"Big 3: {'; '.join(map(str, prev_big_three))}" if prev_big_three else "")
+                    async with semaphore:
+                        async for kind, payload in stream_daily_plan(
+                            date=day,
+                            weekday=datetime.strptime(day, "%Y-%m-%d").weekday(),
+                            focus=req.focus,
+                            energy_level=req.energy_level,
+                            goals=ctx.goals,
+                            habits=ctx.habits,
+                            yesterday_summary=summary,
+                            use_cache=req.use_cache,
+                            task_count=req.task_count,
+                        ):
+                            if kind == "big_three" and not carried[i].done():
+                                carried[i].set_result(payload)
+                            elif kind == "plan":
+                                plan = payload
+                    if "error" in plan:
+                        raise PlanGenerationError(plan["error"])
+                except (PlanGenerationError, httpx.HTTPError) as e:
+                    if req.mode == "ai":
+                        raise
+                    logger.warning("AI planner failed for %s, using local planner: %s", day, e)
+                    plan = {}
+            if not plan and req.mode != "ai":
+                plan = await run_db(local_planner.plan_day, day, req.energy_level, ctx.goals, req.task_count)
+            results[i] = plan
+        except (PlanGenerationError, httpx.HTTPError) as e:
+            logger.warning("Batch generation failed for %s: %s", day, e)
+            results[i] = {"error": str(e) or "Plan generation failed"}
+        finally:
+            if not carried[i].done():
+                carried[i].set_result(plan.get("big_three") if "error" not in plan else None)
+        finished += 1
+        if report:
+            await report(f"generated {finished}/{len(days)}")
+
+    if report:
+        await report("generating")
+    await asyncio.gather(*(run_day(i, day) for i, day in enumerate(days)))
+
+    if report:
+        await report("saving")
+    plan_ids = await run_db(_save_batch, days, req.focus, req.energy_level, results)
+
+    plans = []
+    for day, plan_id, result in zip(days, plan_ids, results):
+        if plan_id is None:
+            plans.append({"date": day, "error": result["error"]})
+        else:
+            plans.append({"date": day, "plan_id": plan_id, "big_three": result.get("big_three", []),
+                          "tasks_count": len(result.get("tasks", []))})
+    return {
+        "plans": plans,
+        "generated": sum(1 for p in plans if "plan_id" in p),
+        "failed": sum(1 for p in plans if "error" in p),
+    }
+
+
+@jobs.register("generate_plan_batch")
+async def _generate_batch_job(payload: dict, report) -> dict:
+    return await _generate_batch(PlanBatchCreate(**payload), report)
+
+
+@router.post("/generate/batch", status_code=202)
+async def generate_plan_batch(req: PlanBatchCreate):
+    """Queue generation of every plan from ``start`` to ``end`` inclusive."""
+    span = (datetime.strptime(req.end, "%Y-%m-%d") - datetime.strptime(req.start, "%Y-%m-%d")).days + 1
+    if span < 1:
+        raise HTTPException(400, "'end' must not be before 'start'")
+    if span > PLAN_BATCH_MAX_DAYS:
+        raise HTTPException(400, f"At most {PLAN_BATCH_MAX_DAYS} days per batch")
+    job = await jobs.enqueue("generate_plan_batch", req.model_dump())
+    return {"job_id": job["id"], "status": job["status"], "status_url": f"/api/plans/jobs/{job['id']}"}
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/generate/stream")
+async def generate_plan_stream(req: PlanCreate):
+    """Generate a plan over Server-Sent Events.
+
+    Each task is saved and pushed as a ``task`` event as soon as the model
+    finishes it; a final ``done`` (or ``error``) event closes the stream.
+    The day's previous AI tasks are replaced in the same transaction as the
+    first new task (announced by a ``plan`` event just before it), so a
+    stream that fails before producing a task leaves the old plan intact.
+    """
+    plan_date = req.date
+    weekday = datetime.strptime(plan_date, "%Y-%m-%d").weekday()
+
+    async def events():
+        plan_id = None
+        count = 0
+
+        async def save(task: dict):
+            nonlocal plan_id, count
+            if plan_id is None:
+                saved = await run_db(_start_with_task, plan_date, req.focus, req.energy_level, task)
+                if saved is None:
+                    return
+                plan_id, task_id = saved
+                yield _sse("plan", {"plan_id": plan_id, "date": plan_date})
+            else:
+                task_id = await run_db(_insert_ai_task, plan_id, task, count)
+                if task_id is None:
+                    return
+            count += 1
+            yield _sse("task", {**task, "id": task_id, "sort_order": count - 1})
+
+        try:
+            ctx = await run_db(plan_context.load, plan_date, req.focus)
+            plan = {}
+            mode = "ai"
+            if _wants_ai(req.mode):
+                try:
+                    async for kind, payload in stream_daily_plan(
+                        date=plan_date,
+                        weekday=weekday,
+                        focus=req.focus,
+                        energy_level=req.energy_level,
+                        goals=ctx.goals,
+                        habits=ctx.habits,
+                        yesterday_summary=ctx.yesterday_summary,
+                        use_cache=req.use_cache,
+                        task_count=req.task_count,
+                    ):
+                        if kind == "plan":
+                            plan = payload
+                        if kind != "task":
+                            continue
+                        async for event in save(payload):
+                            yield event
+                    if "error" in plan and not count:
+                        raise PlanGenerationError(plan["error"])
+                except (PlanGenerationError, httpx.HTTPError) as e:
+                    # Once tasks have been saved there is no clean fallback.
+                    if req.mode == "ai" or count:
+                        raise
+                    logger.warning("AI planner failed for %s, using local planner: %s", plan_date, e)
+                    plan = {}
+
+            if not count and req.mode != "ai":
+                mode = "local"
+                plan = await run_db(local_planner.plan_day, plan_date, req.energy_level, ctx.goals, req.task_count)
+                for task in plan["tasks"]:
+                    async for event in save(task):
+                        yield event
+            if plan_id is None:
+                raise PlanGenerationError("The model returned no tasks")
+            yield _sse("done", {
+                "plan_id": plan_id,
+                "date": plan_date,
+                "big_three": plan.get("big_three", []),
+                "daily_tip": plan.get("daily_tip", ""),
+                "evening_routine": plan.get("evening_routine", ""),
+                "tasks_count": count,
+                "mode": mode,
+            })
+        except (PlanGenerationError, httpx.HTTPError) as e:
+            logger.warning("Streaming plan generation failed: %s", e)
+            yield _sse("error", {"detail": str(e) or "Plan generation failed"})
+        finally:
+            # Tasks were committed one by one; roll the day up once at the end.
+            if plan_id is not None:
+                await run_db(rollups.refresh_day, plan_date)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@router.get("/jobs/{job_id}")
+async def get_generation_job(job_id: str):
+    job = await jobs.get_job(job_id)
+    if not job:
+        raise HTTPException(404, "Job not found")
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "stage": job["stage"],
+        "result": job["result"],
+        "error": job["error"],
+        "attempts": job["attempts"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+    }
+
+
+def _task_date(db, task_id: int) -> str | None:
+    row = db.execute(
+        "SELECT p.date FROM tasks t JOIN plans p ON p.id = t.plan_id WHERE t.id = ?", (task_id,)
+    ).fetchone()
+    return row["date"] if row else None
+
+
 @router.patch("/tasks/{task_id}")
 def update_task(task_id: int, req: TaskUpdate):
     with get_db() as db:
@@ -156,26 +501,37 @@ def update_task(task_id: int, req: TaskUpdate):
              datetime.now().isoformat() if req.is_completed else None,
              task_id),
         )
+        rollups.refresh_day(db, _task_date(db, task_id))
     return {"ok": True}
 
 
 @router.post("/{plan_date}/tasks")
-def add_manual_task(plan_date: str, req: TaskCreate):
+def add_manual_task(plan_date: str, req: TaskCreate, strict: bool = False):
+    """Add a task; overlaps with the day's schedule are reported, or refused with 409 when ``strict``."""
     with get_db() as db:
         plan = db.execute("SELECT id FROM plans WHERE date = ?", (plan_date,)).fetchone()
         if not plan:
             raise HTTPException(404, "Plan not found")
+        span = schedule.parse_slot(req.time_slot, req.duration_min)
+        conflicts = [c.as_dict() for c in schedule.overlapping(db, plan_date, *span)] if span else []
+        if conflicts and strict:
+            raise HTTPException(409, {"message": "Time slot overlaps the schedule", "conflicts": conflicts})
         max_order = db.execute("SELECT MAX(sort_order) FROM tasks WHERE plan_id = ?", (plan["id"],)).fetchone()[0] or 0
         cur = db.execute(
             "INSERT INTO tasks (plan_id, category, title, description, time_slot, duration_min, priority, is_ai_generated, sort_order) "
             "VALUES (?, ?, ?, ?, ?, ?, ?, 0, ?)",
             (plan["id"], req.category, req.title, req.description, req.time_slot, req.duration_min, req.priority, max_order + 1),
         )
-    return {"id": cur.lastrowid}
+        rollups.refresh_day(db, plan_date)
+    if span:
+        schedule.task_added(plan_date, schedule.Interval(*span, "task", cur.lastrowid, req.title))
+    return {"id": cur.lastrowid, "conflicts": conflicts}
 
 
 @router.delete("/tasks/{task_id}")
 def delete_task(task_id: int):
     with get_db() as db:
+        plan_date = _task_date(db, task_id)
         db.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+        rollups.refresh_day(db, plan_date)
     return {"ok": True}
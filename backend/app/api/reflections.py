@@ -1,11 +1,13 @@
 """Day reflection + AI analysis endpoint."""
-import json
 import logging
+from typing import Annotated
 import httpx
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
-from app.database import get_db
-from app.config import OPENROUTER_API_KEY, OPENROUTER_BASE_URL, PLANNER_MODEL
+from app.database import fetch_one, run_db
+from app.config import OPENROUTER_API_KEY, PLANNER_MODEL
+from app.services import llm_cache, openrouter, rollups
+from app.services.json_stream import JSONExtractError, extract_object
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/reflections", tags=["reflections"])
@@ -15,17 +17,65 @@ class ReflectionIn(BaseModel):
     date: str = Field(..., pattern=r"^\d{4}-\d{2}-\d{2}$")
     wins: str = Field("", max_length=2000)
     lessons: str = Field("", max_length=2000)
-    mood: str = Field("", max_length=50)
+    mood: int | Annotated[str, Field(max_length=50)] | None = ""
     rating: int = Field(0, ge=0, le=5)
     rituals_done: int = Field(0, ge=0)
     rituals_total: int = Field(0, ge=0)
     deepwork_hours: float = Field(0, ge=0)
     calories: int = Field(0, ge=0)
     overall_score: int = Field(0, ge=0, le=100)
+    productivity_score: int | None = Field(None, ge=0, le=10)
+    notes: str | None = Field(None, max_length=2000)
+    analyze: bool = False
+    use_cache: bool = True
+
+
+def _upsert_reflection(db, data: ReflectionIn, ai_summary: str | None, ai_next_day: str | None,
+                       day_score: int | None):
+    # Fields passed as None (the AI ones on a plain save, productivity_score
+    # and notes unless sent) keep their stored values.
+    db.execute(
+        """INSERT INTO reflections (date, wins, lessons, mood, rating, ai_summary, ai_next_day, day_score,
+                                    productivity_score, notes)
+        VALUES (:date, :wins, :lessons, :mood, :rating, COALESCE(:ai_summary, ''), COALESCE(:ai_next_day, ''),
+                COALESCE(:day_score, 0), COALESCE(:productivity_score, 5), COALESCE(:notes, ''))
+        ON CONFLICT(date) DO UPDATE SET wins = :wins, lessons = :lessons, mood = :mood, rating = :rating,
+            ai_summary = COALESCE(:ai_summary, ai_summary), ai_next_day = COALESCE(:ai_next_day, ai_next_day),
+            day_score = COALESCE(:day_score, day_score),
+            productivity_score = COALESCE(:productivity_score, productivity_score), notes = COALESCE(:notes, notes)""",
+        {**data.model_dump(include={"date", "wins", "lessons", "mood", "rating", "productivity_score", "notes"}),
+         "ai_summary": ai_summary, "ai_next_day": ai_next_day, "day_score": day_score})
+    rollups.refresh_day(db, data.date)
+
+
+def _analysis(parsed: dict | None) -> tuple[str, str, int] | None:
+    """``(summary, next_day, score)`` from the model's answer, or None if it is unusable."""
+    if not isinstance(parsed, dict):
+        return None
+    summary = parsed.get("summary")
+    next_day = parsed.get("next_day") or []
+    if isinstance(next_day, str):
+        next_day = [next_day]
+    if not isinstance(summary, str) or not summary.strip() or not isinstance(next_day, list):
+        return None
+    try:
+        score = min(100, max(0, int(parsed.get("score"))))
+    except (TypeError, ValueError):
+        return None
+    return summary.strip(), "\n".join(f"• {item}" for item in next_day if str(item).strip()), score
 
 
 @router.post("")
 async def save_reflection(data: ReflectionIn):
+    """Save the day's reflection; with ``analyze`` also ask the model to review it.
+
+    Plain saves are cheap (the Stats page autosaves on every edit) and keep
+    any earlier analysis; ``analyze`` costs a model call of up to ~30 s.
+    """
+    if not data.analyze:
+        await run_db(_upsert_reflection, data, None, None, None)
+        return {"ok": True}
+
     # Generate AI analysis
     ai_summary = ""
     ai_next_day = ""
@@ -53,59 +103,40 @@ async def save_reflection(data: ReflectionIn):
 Ответь СТРОГО в JSON:
 {{"summary": "краткий итог дня", "next_day": ["наставление 1", "наставление 2", "наставление 3"], "score": 75}}"""
 
-            async with httpx.AsyncClient(timeout=30) as client:
-                resp = await client.post(
-                    f"{OPENROUTER_BASE_URL}/chat/completions",
-                    headers={"Authorization": f"Bearer {OPENROUTER_API_KEY}"},
-                    json={
-                        "model": PLANNER_MODEL,
-                        "messages": [
-                            {"role": "system", "content": "Ты — элитный лайф-коуч. Анализируешь день пользователя и даёшь конкретные рекомендации. Отвечай только JSON."},
-                            {"role": "user", "content": prompt}
-                        ],
-                        "temperature": 0.7,
-                        "max_tokens": 500
-                    }
+            messages = [
+                {"role": "system", "content": "Ты — элитный лайф-коуч. Анализируешь день пользователя и даёшь конкретные рекомендации. Отвечай только JSON."},
+                {"role": "user", "content": prompt}
+            ]
+            cache_key = llm_cache.make_key(PLANNER_MODEL, messages, temperature=0.7, max_tokens=500)
+            analysis = _analysis(await llm_cache.lookup(cache_key, bypass=not data.use_cache))
+            if analysis is None:
+                content, model = await openrouter.chat_completion(
+                    messages, model=PLANNER_MODEL, temperature=0.7, max_tokens=500, timeout=30,
                 )
-                if resp.status_code == 200:
-                    content = resp.json()["choices"][0]["message"]["content"]
-                    content = content.strip()
-                    if content.startswith("```"):
-                        content = content.split("\n", 1)[1].rsplit("```", 1)[0]
-                    parsed = json.loads(content)
-                    ai_summary = parsed.get("summary", "")
-                    next_day_list = parsed.get("next_day", [])
-                    ai_next_day = "\n".join(f"• {item}" for item in next_day_list)
-                    day_score = parsed.get("score", data.overall_score)
-                else:
-                    logger.warning("AI API returned status %d", resp.status_code)
-        except (json.JSONDecodeError, KeyError, IndexError) as e:
+                parsed = extract_object(content, required=("summary", "next_day", "score"))
+                analysis = _analysis(parsed)
+                if analysis is None:
+                    raise JSONExtractError("AI analysis is missing summary, next_day or score")
+                if model == PLANNER_MODEL:  # the key names the primary model
+                    await llm_cache.store(cache_key, PLANNER_MODEL, parsed)
+            ai_summary, ai_next_day, day_score = analysis
+        except (JSONExtractError, KeyError, IndexError) as e:
             logger.warning("Failed to parse AI response: %s", e)
             ai_summary = "Анализ временно недоступен"
+        except httpx.HTTPStatusError as e:
+            logger.warning("AI API returned status %d", e.response.status_code)
         except httpx.HTTPError as e:
             logger.warning("AI API request failed: %s", e)
             ai_summary = "Анализ временно недоступен"
 
-    # Upsert
-    with get_db() as db:
-        db.execute(
-            """INSERT INTO reflections (date, wins, lessons, mood, rating, ai_summary, ai_next_day, day_score)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ON CONFLICT(date) DO UPDATE SET wins=?, lessons=?, mood=?, rating=?, ai_summary=?, ai_next_day=?, day_score=?""",
-            (data.date, data.wins, data.lessons, data.mood, data.rating, ai_summary, ai_next_day, day_score,
-             data.wins, data.lessons, data.mood, data.rating, ai_summary, ai_next_day, day_score))
+    await run_db(_upsert_reflection, data, ai_summary, ai_next_day, day_score)
 
     return {"ok": True, "ai_summary": ai_summary, "ai_next_day": ai_next_day, "day_score": day_score}
 
 
 @router.get("/{date_str}")
 async def get_reflection(date_str: str):
-    with get_db() as db:
-        try:
-            row = db.execute("SELECT * FROM reflections WHERE date = ?", (date_str,)).fetchone()
-        except Exception as e:
-            logger.exception("Error fetching reflection: %s", e)
-            return None
+    row = await fetch_one("SELECT * FROM reflections WHERE date = ?", (date_str,))
     if not row:
-        return None
-    return dict(row)
+        raise HTTPException(404, "Reflection not found")
+    return row
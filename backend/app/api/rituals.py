@@ -2,7 +2,9 @@
 from datetime import date, datetime
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
+from app.cache import cached, reads
 from app.database import get_db
+from app.services import bitmaps, rollups
 
 router = APIRouter(prefix="/rituals", tags=["rituals"])
 
@@ -33,6 +35,7 @@ class CompleteRequest(BaseModel):
 
 
 @router.get("")
+@reads("rituals")
 def list_rituals(type: str | None = None, active_only: bool = True):
     with get_db() as db:
         q = "SELECT * FROM rituals WHERE 1=1"
@@ -54,6 +57,7 @@ def create_ritual(req: RitualCreate):
             "INSERT INTO rituals (name, type, description, time_slot, duration_min, category, icon, sort_order) VALUES (?,?,?,?,?,?,?,?)",
             (req.name, req.type, req.description, req.time_slot, req.duration_min, req.category, req.icon, req.sort_order),
         )
+        rollups.refresh_day(db, date.today().isoformat())
     return {"id": cur.lastrowid}
 
 
@@ -73,6 +77,8 @@ def update_ritual(ritual_id: int, req: RitualUpdate):
     values.append(ritual_id)
     with get_db() as db:
         db.execute(f"UPDATE rituals SET {', '.join(updates)} WHERE id = ?", values)
+        if req.is_active is not None:
+            rollups.refresh_day(db, date.today().isoformat())
     return {"ok": True}
 
 
@@ -80,6 +86,8 @@ def update_ritual(ritual_id: int, req: RitualUpdate):
 def delete_ritual(ritual_id: int):
     with get_db() as db:
         db.execute("DELETE FROM rituals WHERE id = ?", (ritual_id,))
+        bitmaps.drop(db, "ritual", ritual_id)
+        rollups.refresh_day(db, date.today().isoformat())
     return {"ok": True}
 
 
@@ -91,6 +99,8 @@ def complete_ritual(ritual_id: int, req: CompleteRequest):
             "INSERT OR REPLACE INTO ritual_completions (ritual_id, date) VALUES (?, ?)",
             (ritual_id, d),
         )
+        bitmaps.refresh(db, "ritual", ritual_id, d)
+        rollups.refresh_day(db, d)
     return {"ok": True, "date": d}
 
 
@@ -99,20 +109,26 @@ def uncomplete_ritual(ritual_id: int, date_str: str | None = None):
     d = date_str or date.today().isoformat()
     with get_db() as db:
         db.execute("DELETE FROM ritual_completions WHERE ritual_id = ? AND date = ?", (ritual_id, d))
+        bitmaps.refresh(db, "ritual", ritual_id, d)
+        rollups.refresh_day(db, d)
     return {"ok": True}
 
 
+def load_progress(db, d: str) -> dict:
+    total = db.execute("SELECT COUNT(*) FROM rituals WHERE is_active = 1").fetchone()[0]
+    completed = db.execute(
+        "SELECT COUNT(*) FROM ritual_completions rc JOIN rituals r ON rc.ritual_id = r.id WHERE rc.date = ? AND r.is_active = 1",
+        (d,),
+    ).fetchone()[0]
+    # Get completed ritual IDs for the day
+    completed_ids = [row[0] for row in db.execute(
+        "SELECT ritual_id FROM ritual_completions WHERE date = ?", (d,)
+    ).fetchall()]
+    return {"total": total, "completed": completed, "completed_ids": completed_ids, "date": d}
+
+
 @router.get("/today-progress")
+@cached("rituals", "ritual_completions")
 def today_progress():
-    today = date.today().isoformat()
     with get_db() as db:
-        total = db.execute("SELECT COUNT(*) FROM rituals WHERE is_active = 1").fetchone()[0]
-        completed = db.execute(
-            "SELECT COUNT(*) FROM ritual_completions rc JOIN rituals r ON rc.ritual_id = r.id WHERE rc.date = ? AND r.is_active = 1",
-            (today,),
-        ).fetchone()[0]
-        # Get completed ritual IDs for today
-        completed_ids = [row[0] for row in db.execute(
-            "SELECT ritual_id FROM ritual_completions WHERE date = ?", (today,)
-        ).fetchall()]
-    return {"total": total, "completed": completed, "completed_ids": completed_ids, "date": today}
+        return load_progress(db, date.today().isoformat())
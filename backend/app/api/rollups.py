@@ -0,0 +1,43 @@
+"""Range analytics over ``daily_rollups``."""
+from datetime import date
+from typing import Literal
+from fastapi import APIRouter, HTTPException
+from app.cache import cached
+from app.config import ROLLUP_MAX_DAYS
+from app.database import get_db
+from app.services import rollups
+
+router = APIRouter(prefix="/rollups", tags=["rollups"])
+
+
+def _parse(value: str | None, name: str) -> date:
+    if value is None:
+        return date.today()
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(400, f"Invalid '{name}' date")
+
+
+def _range(start: date, end: date) -> dict:
+    if end < start:
+        raise HTTPException(400, "'end' must not be before 'start'")
+    if (end - start).days + 1 > ROLLUP_MAX_DAYS:
+        raise HTTPException(400, f"At most {ROLLUP_MAX_DAYS} days per range")
+    with get_db() as db:
+        days = rollups.load_range(db, start, end)
+    return {"start": start.isoformat(), "end": end.isoformat(), **rollups.summarize(days), "daily": days}
+
+
+@router.get("")
+@cached("daily_rollups")
+def get_range(start: str, end: str | None = None):
+    """Rollups for ``start``..``end`` (inclusive, ``end`` defaults to today)."""
+    return _range(_parse(start, "start"), _parse(end, "end"))
+
+
+@router.get("/{period}")
+@cached("daily_rollups")
+def get_period(period: Literal["week", "month", "year"], date_str: str | None = None):
+    """Rollups for the ISO week, month or year containing ``date_str`` (default today)."""
+    return _range(*rollups.period_bounds(period, _parse(date_str, "date_str")))
@@ -0,0 +1,62 @@
+"""Day schedule: conflicts and free time across tasks, rituals and deep work."""
+from datetime import date, datetime
+from fastapi import APIRouter, HTTPException, Query
+from app.cache import cached
+from app.database import get_db
+from app.services import schedule
+
+router = APIRouter(prefix="/schedule", tags=["schedule"])
+
+
+def _minutes(value: str | None, default: int, name: str, end: bool = False) -> int:
+    if value is None:
+        return default
+    minutes = schedule.parse_time(value, end)
+    if minutes is None:
+        raise HTTPException(400, f"'{name}' must be HH:MM")
+    return minutes
+
+
+def _load(date_str: str) -> schedule.IntervalTree:
+    try:
+        date.fromisoformat(date_str)
+    except ValueError:
+        raise HTTPException(400, "Invalid date")
+    with get_db() as db:
+        return schedule.load_day(db, date_str)
+
+
+@router.get("/{date_str}")
+@cached("plans", "rituals", "deepwork_sessions")
+def get_schedule(date_str: str, day_start: str | None = None, day_end: str | None = None):
+    """Timed items of the day, every overlapping pair and the free gaps."""
+    start = _minutes(day_start, schedule.DAY_START, "day_start")
+    end = _minutes(day_end, schedule.DAY_END, "day_end", end=True)
+    tree = _load(date_str)
+    return {
+        "date": date_str,
+        "items": [item.as_dict() for item in tree],
+        "conflicts": [
+            {"a": a.as_dict(), "b": b.as_dict(), "overlap_min": min(a.end, b.end) - b.start}
+            for a, b in tree.conflicts()
+        ],
+        "free": [
+            {"start": schedule.hhmm(s), "end": schedule.hhmm(e), "minutes": e - s}
+            for s, e in tree.free_slots(start, end)
+        ],
+    }
+
+
+@router.get("/{date_str}/next-free")
+def next_free(date_str: str, duration: int = Query(90, ge=5, le=720),
+              after: str | None = None, day_end: str | None = None):
+    """Earliest free ``duration``-minute slot; defaults to after now for today."""
+    now = datetime.now()
+    default_after = now.hour * 60 + now.minute if date_str == now.date().isoformat() else schedule.DAY_START
+    start = _minutes(after, max(default_after, schedule.DAY_START), "after")
+    slot = _load(date_str).next_free(duration, start, _minutes(day_end, schedule.DAY_END, "day_end", end=True))
+    return {
+        "date": date_str,
+        "duration": duration,
+        "slot": {"start": schedule.hhmm(slot[0]), "end": schedule.hhmm(slot[1])} if slot else None,
+    }
@@ -2,7 +2,9 @@
 from datetime import date
 from fastapi import APIRouter
 from pydantic import BaseModel
+from app.cache import cached
 from app.database import get_db
+from app.services import bitmaps
 
 router = APIRouter(prefix="/supplements", tags=["supplements"])
 
@@ -76,6 +78,7 @@ def update_supplement(supp_id: int, req: SupplementUpdate):
 def delete_supplement(supp_id: int):
     with get_db() as db:
         db.execute("DELETE FROM supplements WHERE id = ?", (supp_id,))
+        bitmaps.drop(db, "supplement", supp_id)
     return {"ok": True}
 
 
@@ -87,17 +90,22 @@ def log_supplement(supp_id: int, req: LogRequest):
             "INSERT OR REPLACE INTO supplement_logs (supplement_id, date, taken) VALUES (?,?,?)",
             (supp_id, d, 1 if req.taken else 0),
         )
+        bitmaps.refresh(db, "supplement", supp_id, d)
     return {"ok": True}
 
 
-@router.get("/today-status")
-def today_status():
-    today = date.today().isoformat()
-    with get_db() as db:
-        supps = db.execute("SELECT * FROM supplements WHERE is_active = 1 ORDER BY time_of_day").fetchall()
-        logs = {row["supplement_id"]: bool(row["taken"]) for row in
-                db.execute("SELECT supplement_id, taken FROM supplement_logs WHERE date = ?", (today,)).fetchall()}
+def load_status(db, d: str) -> dict:
+    supps = db.execute("SELECT * FROM supplements WHERE is_active = 1 ORDER BY time_of_day").fetchall()
+    logs = {row["supplement_id"]: bool(row["taken"]) for row in
+            db.execute("SELECT supplement_id, taken FROM supplement_logs WHERE date = ?", (d,)).fetchall()}
     result = []
     for s in supps:
         result.append({**dict(s), "taken_today": logs.get(s["id"], False)})
-    return {"date": today, "supplements": result, "taken": sum(1 for v in logs.values() if v), "total": len(supps)}
+    return {"date": d, "supplements": result, "taken": sum(1 for v in logs.values() if v), "total": len(supps)}
+
+
+@router.get("/today-status")
+@cached("supplements", "supplement_logs")
+def today_status():
+    with get_db() as db:
+        return load_status(db, date.today().isoformat())
@@ -34,10 +34,8 @@ class AddXP(BaseModel):
     source: str = "manual"
 
 
-@router.get("")
-def get_progress():
-    with get_db() as db:
-        row = db.execute("SELECT * FROM tm_progress WHERE id = 1").fetchone()
+def load_progress(db) -> dict:
+    row = db.execute("SELECT * FROM tm_progress WHERE id = 1").fetchone()
     if not row:
         return {"current_level": 0, "level_name": "Sleep", "xp_current": 0, "xp_needed": 100,
                 "qualities_unlocked": "[]", "rituals_completed": 0, "days_streak": 0}
@@ -55,6 +53,12 @@ def get_progress():
     return data
 
 
+@router.get("")
+def get_progress():
+    with get_db() as db:
+        return load_progress(db)
+
+
 @router.post("/add-xp")
 def add_xp(req: AddXP):
     with get_db() as db:
@@ -4,6 +4,7 @@ from datetime import date
 from fastapi import APIRouter
 from pydantic import BaseModel
 from app.database import get_db
+from app.pagination import keyset_page, page
 
 router = APIRouter(prefix="/workouts", tags=["workouts"])
 
@@ -68,13 +69,12 @@ def get_program():
 
 
 @router.get("")
-def list_workouts(date_filter: str | None = None, limit: int = 30):
+def list_workouts(date_filter: str | None = None, limit: int = 30, cursor: str | None = None):
     with get_db() as db:
         if date_filter:
             rows = db.execute("SELECT * FROM workouts WHERE date = ? ORDER BY created_at DESC", (date_filter,)).fetchall()
-        else:
-            rows = db.execute("SELECT * FROM workouts ORDER BY date DESC LIMIT ?", (limit,)).fetchall()
-    return [dict(r) for r in rows]
+            return page([dict(r) for r in rows])
+        return keyset_page(db, "workouts", limit, cursor)
 
 
 @router.post("")
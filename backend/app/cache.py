@@ -0,0 +1,185 @@
+"""Write-invalidated response cache.
+
+Every pooled connection is a ``TrackingConnection``: it notes which tables
+its INSERT/UPDATE/DELETE statements touch and, once the transaction
+commits, bumps a per-table version counter. ``@cached(*tables)`` serves a
+route's previous result for as long as the versions of the tables it reads
+are unchanged, so polling aggregates costs nothing until somebody writes.
+
+Concurrent misses for the same key are collapsed: one caller computes, the
+others wait for its result. Writes made outside this process (e.g. the
+maintenance CLI) are not seen, so entries also expire after
+``RESPONSE_CACHE_TTL`` seconds.
+"""
+import functools
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+from app.config import RESPONSE_CACHE_TTL, RESPONSE_CACHE_MAX_ENTRIES
+
+# Writes that change other tables behind the statement's back (triggers).
+CASCADES = {
+    "tasks": ("plans",),
+}
+
+_WRITE_RE = re.compile(
+    r"""\s*(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|REPLACE\s+INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)\s+["`\[]?(\w+)""",
+    re.IGNORECASE,
+)
+
+_lock = threading.Lock()
+_versions: dict[str, int] = {}
+_stats = {"hits": 0, "misses": 0, "collapsed": 0}
+
+
+def written_tables(sql: str) -> set[str]:
+    """Tables written by the statements in ``sql``."""
+    return {m.group(1).lower() for m in _WRITE_RE.finditer(sql) if _is_statement_start(sql, m.start())}
+
+
+def _is_statement_start(sql: str, pos: int) -> bool:
+    before = sql[:pos].rstrip()
+    return not before or before.endswith(";")
+
+
+def bump(tables) -> None:
+    """Invalidate cached results that read any of ``tables``."""
+    with _lock:
+        for table in tables:
+            for t in (table, *CASCADES.get(table, ())):
+                _versions[t] = _versions.get(t, 0) + 1
+
+
+def versions(tables) -> tuple[int, ...]:
+    with _lock:
+        return tuple(_versions.get(t, 0) for t in tables)
+
+
+class TrackingConnection(sqlite3.Connection):
+    """``sqlite3.Connection`` that bumps table versions when its writes commit."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._written: set[str] = set()
+
+    def _note(self, sql: str):
+        if _WRITE_RE.match(sql):
+            self._written |= written_tables(sql)
+            if not self.in_transaction:
+                self._flush()
+
+    def _flush(self):
+        if self._written:
+            tables, self._written = self._written, set()
+            bump(tables)
+
+    def execute(self, sql, *args):
+        cursor = super().execute(sql, *args)
+        self._note(sql)
+        return cursor
+
+    def executemany(self, sql, *args):
+        cursor = super().executemany(sql, *args)
+        self._note(sql)
+        return cursor
+
+    def executescript(self, script):
+        cursor = super().executescript(script)
+        self._written |= written_tables(script)
+        self._flush()
+        return cursor
+
+    def commit(self):
+        super().commit()
+        self._flush()
+
+    def rollback(self):
+        super().rollback()
+        self._written.clear()
+
+
+# ── Result cache ─────────────────────────────────────────────────────────────
+
+@dataclass
+class _Entry:
+    value: object
+    versions: tuple[int, ...]
+    stored_at: float
+
+
+_entries: "OrderedDict[tuple, _Entry]" = OrderedDict()
+_inflight: dict[tuple, threading.Event] = {}
+
+
+def get_or_compute(key: tuple, tables: tuple[str, ...], compute):
+    """Cached ``compute()`` for ``key`` while ``tables`` are unchanged."""
+    waited = False
+    while True:
+        with _lock:
+            current = tuple(_versions.get(t, 0) for t in tables)
+            entry = _entries.get(key)
+            if (entry is not None and entry.versions == current
+                    and time.monotonic() - entry.stored_at < RESPONSE_CACHE_TTL):
+                _entries.move_to_end(key)
+                _stats["collapsed" if waited else "hits"] += 1
+                return entry.value
+            event = _inflight.get(key)
+            if event is None:
+                event = _inflight[key] = threading.Event()
+                _stats["misses"] += 1
+                break
+        event.wait()
+        waited = True
+
+    try:
+        value = compute()
+        with _lock:
+            _entries[key] = _Entry(value, current, time.monotonic())
+            _entries.move_to_end(key)
+            while len(_entries) > RESPONSE_CACHE_MAX_ENTRIES:
+                _entries.popitem(last=False)
+        return value
+    finally:
+        with _lock:
+            _inflight.pop(key, None)
+        event.set()
+
+
+def cached(*tables: str):
+    """Cache a sync route's result until one of ``tables`` is written.
+
+    The key is the route, its arguments and today's date, since these
+    endpoints report on "today".
+    """
+    def decorator(fn):
+        name = f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = (name, date.today().isoformat(), args, tuple(sorted(kwargs.items())))
+            return get_or_compute(key, tables, lambda: fn(*args, **kwargs))
+        wrapper.reads_tables = tables
+        return wrapper
+    return decorator
+
+
+def reads(*tables: str):
+    """Declare the tables a route reads, for ETags, without caching its result."""
+    def decorator(fn):
+        fn.reads_tables = tables
+        return fn
+    return decorator
+
+
+def stats() -> dict:
+    with _lock:
+        return {**_stats, "entries": len(_entries), "versions": dict(_versions)}
+
+
+def clear():
+    with _lock:
+        _entries.clear()
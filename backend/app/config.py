@@ -4,5 +4,32 @@ import os
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY", "")
 OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
 PLANNER_MODEL = os.getenv("PLANNER_MODEL", "anthropic/claude-sonnet-4.5")
-DB_PATH = os.path.join(os.path.dirname(__file__), "..", "planner.db")
+PLANNER_FALLBACK_MODELS = [m.strip() for m in os.getenv("PLANNER_FALLBACK_MODELS", "openai/gpt-4o-mini").split(",") if m.strip()]
+LLM_HEDGE_AFTER = float(os.getenv("LLM_HEDGE_AFTER", "12"))
+LLM_LATENCY_BUDGET = float(os.getenv("LLM_LATENCY_BUDGET", "45"))
+LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "3"))
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "60"))
+OPENROUTER_HTTP2 = os.getenv("OPENROUTER_HTTP2", "1").lower() not in ("0", "false", "no")
+OPENROUTER_MAX_CONNECTIONS = int(os.getenv("OPENROUTER_MAX_CONNECTIONS", "20"))
+OPENROUTER_MAX_KEEPALIVE = int(os.getenv("OPENROUTER_MAX_KEEPALIVE", "10"))
+DB_PATH = os.getenv("DB_PATH", os.path.join(os.path.dirname(__file__), "..", "planner.db"))
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_BUSY_TIMEOUT_MS = int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000"))
+DB_MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", str(256 * 1024 * 1024)))
+DB_CACHE_SIZE_KB = int(os.getenv("DB_CACHE_SIZE_KB", str(64 * 1024)))
+PLAN_BATCH_CONCURRENCY = int(os.getenv("PLAN_BATCH_CONCURRENCY", "3"))
+PLAN_BATCH_MAX_DAYS = int(os.getenv("PLAN_BATCH_MAX_DAYS", "31"))
+PLAN_CONTEXT_TOKENS = int(os.getenv("PLAN_CONTEXT_TOKENS", "600"))
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "500"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "300"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "256"))
+ROLLUP_MAX_DAYS = int(os.getenv("ROLLUP_MAX_DAYS", "1830"))
+GZIP_MIN_SIZE = int(os.getenv("GZIP_MIN_SIZE", "1024"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "2"))
+JOB_STALE_AFTER = int(os.getenv("JOB_STALE_AFTER", "300"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETENTION_DAYS = int(os.getenv("JOB_RETENTION_DAYS", "7"))
 CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:5176,http://127.0.0.1:5176,http://84.32.25.53:5176").split(",")
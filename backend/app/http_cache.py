@@ -0,0 +1,138 @@
+"""Conditional GET for the API.
+
+Routes that declare the tables they read (``@cached`` or ``@reads`` from
+``app.cache``) get an ETag derived from those tables' version counters, so
+a matching ``If-None-Match`` is answered with 304 before the route runs.
+Other JSON GETs get an ETag hashed from the body: the query still runs but
+an unchanged body is not sent again.
+
+Tags are weak (``W/"..."``): GZip runs after this middleware, so the gzip
+and identity encodings of a response share one tag, which a strong
+validator must not do.
+
+Version counters are per process and miss writes made by other processes,
+so the tag also covers a random per-process epoch, today's date and the
+``RESPONSE_CACHE_TTL`` window the response cache already trusts.
+"""
+import hashlib
+import os
+import time
+from datetime import date
+from fastapi.routing import APIRoute
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.routing import compile_path
+from app.cache import versions
+from app.config import RESPONSE_CACHE_TTL
+
+CACHE_CONTROL = "private, no-cache"
+
+_EPOCH = os.urandom(8).hex()
+
+
+def get_routes(routers, prefix: str = "") -> list[tuple]:
+    """``(path regex, tables)`` for every GET route of ``routers``, in matching order."""
+    table = []
+    for router in routers:
+        for route in router.routes:
+            if isinstance(route, APIRoute) and "GET" in route.methods:
+                regex, _, _ = compile_path(prefix + route.path)
+                table.append((regex, getattr(route.endpoint, "reads_tables", None)))
+    return table
+
+
+def _version_tag(scope, tables) -> str:
+    bucket = int(time.time() // RESPONSE_CACHE_TTL) if RESPONSE_CACHE_TTL > 0 else 0
+    key = "|".join((_EPOCH, scope["path"], scope["query_string"].decode("latin-1"),
+                    date.today().isoformat(), str(bucket), repr(versions(tables))))
+    return 'W/"v' + hashlib.blake2b(key.encode(), digest_size=12).hexdigest() + '"'
+
+
+def _body_tag(body: bytes) -> str:
+    return 'W/"b' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+def _matches(if_none_match: str | None, tag: str) -> bool:
+    if not if_none_match:
+        return False
+    # Weak comparison, as RFC 9110 requires for If-None-Match.
+    candidates = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+    return "*" in candidates or tag.removeprefix("W/") in candidates
+
+
+async def _not_modified(send, tag: str):
+    await send({"type": "http.response.start", "status": 304,
+                "headers": [(b"etag", tag.encode()), (b"cache-control", CACHE_CONTROL.encode())]})
+    await send({"type": "http.response.body", "body": b""})
+
+
+class ETagMiddleware:
+    """ETag/If-None-Match handling for ``GET /api/...``."""
+
+    def __init__(self, app, routes: list[tuple]):
+        self.app = app
+        self.routes = routes
+
+    def _tables(self, path: str) -> tuple[str, ...] | None:
+        for regex, tables in self.routes:
+            if regex.match(path):
+                return tables
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET" or not scope["path"].startswith("/api/"):
+            await self.app(scope, receive, send)
+            return
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        tables = self._tables(scope["path"])
+        if tables:
+            await self._versioned(scope, receive, send, _version_tag(scope, tables), if_none_match)
+        else:
+            await self._hashed(scope, receive, send, if_none_match)
+
+    async def _versioned(self, scope, receive, send, tag, if_none_match):
+        if _matches(if_none_match, tag):
+            await _not_modified(send, tag)
+            return
+
+        async def send_tagged(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                headers = MutableHeaders(scope=message)
+                headers["ETag"] = tag
+                headers["Cache-Control"] = CACHE_CONTROL
+            await send(message)
+
+        await self.app(scope, receive, send_tagged)
+
+    async def _hashed(self, scope, receive, send, if_none_match):
+        start = None
+        chunks: list[bytes] = []
+
+        async def send_buffered(message):
+            nonlocal start
+            if start is None:
+                headers = Headers(raw=message["headers"])
+                if (message["status"] != 200 or "etag" in headers
+                        or not headers.get("content-type", "").startswith("application/json")):
+                    start = False
+                    await send(message)
+                else:
+                    start = message
+                return
+            if start is False:
+                await send(message)
+                return
+            chunks.append(message.get("body", b""))
+            if message.get("more_body"):
+                return
+            body = b"".join(chunks)
+            tag = _body_tag(body)
+            if _matches(if_none_match, tag):
+                await _not_modified(send, tag)
+                return
+            headers = MutableHeaders(scope=start)
+            headers["ETag"] = tag
+            headers["Cache-Control"] = CACHE_CONTROL
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_buffered)
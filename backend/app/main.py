@@ -1,10 +1,13 @@
 """Daily Planner API."""
 import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import JSONResponse
-from app.database import init_db
-from app.config import CORS_ORIGINS
+from app.database import init_db, close_pool
+from app.config import CORS_ORIGINS, GZIP_MIN_SIZE
+from app.http_cache import ETagMiddleware, get_routes
 from app.api.plans import router as plans_router
 from app.api.goals import router as goals_router
 from app.api.rituals import router as rituals_router
@@ -15,17 +18,37 @@ from app.api.deepwork import router as deepwork_router
 from app.api.tm_progress import router as tm_progress_router
 from app.api.detox import router as detox_router
 from app.api.reflections import router as reflections_router
+from app.api.ai import router as ai_router
+from app.api.rollups import router as rollups_router
+from app.api.analytics import router as analytics_router
+from app.api.dashboard import router as dashboard_router
+from app.api.heatmap import router as heatmap_router
+from app.api.schedule import router as schedule_router
+from app.services import jobs, openrouter
 
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Daily Planner", version="2.0.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init_db()
+    await openrouter.start()
+    jobs.worker.start()
+    yield
+    await jobs.worker.stop()
+    await openrouter.close()
+    close_pool()
+
+
+app = FastAPI(title="Daily Planner", version="2.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE"],
-    allow_headers=["Content-Type", "Authorization"],
+    allow_headers=["Content-Type", "Authorization", "If-None-Match"],
+    expose_headers=["ETag"],
 )
 
 
@@ -35,21 +58,29 @@ async def global_exception_handler(request: Request, exc: Exception):
     return JSONResponse(status_code=500, content={"detail": "Внутренняя ошибка сервера"})
 
 
-app.include_router(plans_router, prefix="/api")
-app.include_router(goals_router, prefix="/api")
-app.include_router(rituals_router, prefix="/api")
-app.include_router(workouts_router, prefix="/api")
-app.include_router(nutrition_router, prefix="/api")
-app.include_router(supplements_router, prefix="/api")
-app.include_router(deepwork_router, prefix="/api")
-app.include_router(tm_progress_router, prefix="/api")
-app.include_router(detox_router, prefix="/api")
-app.include_router(reflections_router, prefix="/api")
-
+API_ROUTERS = [
+    plans_router,
+    goals_router,
+    rituals_router,
+    workouts_router,
+    nutrition_router,
+    supplements_router,
+    deepwork_router,
+    tm_progress_router,
+    detox_router,
+    reflections_router,
+    ai_router,
+    rollups_router,
+    analytics_router,
+    dashboard_router,
+    heatmap_router,
+    schedule_router,
+]
+for router in API_ROUTERS:
+    app.include_router(router, prefix="/api")
 
-@app.on_event("startup")
-def startup():
-    init_db()
+app.add_middleware(ETagMiddleware, routes=get_routes(API_ROUTERS, prefix="/api"))
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_SIZE)
 
 
 @app.get("/health")
@@ -0,0 +1,96 @@
+"""Maintenance commands for derived data.
+
+Usage::
+
+    python -m app.maintenance verify-counters
+    python -m app.maintenance rebuild-counters
+    python -m app.maintenance rebuild-habit-streaks
+    python -m app.maintenance rebuild-rollups
+    python -m app.maintenance rebuild-bitmaps
+"""
+import argparse
+import sys
+from app.database import get_db, init_db
+from app.services import bitmaps, habit_streaks, rollups
+
+_COUNTER_DRIFT_SQL = """
+    SELECT p.id, p.date, p.tasks_total, p.tasks_done,
+           COUNT(t.id) AS actual_total,
+           COALESCE(SUM(CASE WHEN t.is_completed THEN 1 ELSE 0 END), 0) AS actual_done
+    FROM plans p LEFT JOIN tasks t ON t.plan_id = p.id
+    GROUP BY p.id
+    HAVING p.tasks_total != actual_total OR p.tasks_done != actual_done
+    ORDER BY p.date
+"""
+
+
+def verify_task_counters(db) -> list[dict]:
+    """Plans whose stored task counters disagree with the ``tasks`` table."""
+    return [dict(r) for r in db.execute(_COUNTER_DRIFT_SQL).fetchall()]
+
+
+def rebuild_task_counters(db) -> int:
+    """Recompute ``plans.tasks_total``/``tasks_done`` from ``tasks``."""
+    return db.execute("""
+        UPDATE plans SET
+            tasks_total = (SELECT COUNT(*) FROM tasks WHERE plan_id = plans.id),
+            tasks_done = (SELECT COUNT(*) FROM tasks WHERE plan_id = plans.id AND is_completed)
+    """).rowcount
+
+
+def _cmd_verify_counters(args) -> int:
+    with get_db() as db:
+        drift = verify_task_counters(db)
+    for row in drift:
+        print(f"{row['date']}: stored {row['tasks_done']}/{row['tasks_total']}, "
+              f"actual {row['actual_done']}/{row['actual_total']}")
+    print(f"{len(drift)} plan(s) with counter drift")
+    return 1 if drift else 0
+
+
+def _cmd_rebuild_counters(args) -> int:
+    with get_db() as db:
+        count = rebuild_task_counters(db)
+    print(f"Rebuilt task counters for {count} plan(s)")
+    return 0
+
+
+def _cmd_rebuild_habit_streaks(args) -> int:
+    with get_db() as db:
+        count = habit_streaks.recompute_all(db)
+    print(f"Rebuilt streaks for {count} habit(s)")
+    return 0
+
+
+def _cmd_rebuild_rollups(args) -> int:
+    with get_db() as db:
+        count = rollups.rebuild(db)
+    print(f"Rebuilt rollups for {count} day(s)")
+    return 0
+
+
+def _cmd_rebuild_bitmaps(args) -> int:
+    with get_db() as db:
+        count = bitmaps.rebuild(db)
+    print(f"Rebuilt {count} completion bitmap(s)")
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.maintenance", description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("verify-counters", help="report plans whose task counters drifted").set_defaults(func=_cmd_verify_counters)
+    sub.add_parser("rebuild-counters", help="recompute plan task counters").set_defaults(func=_cmd_rebuild_counters)
+    sub.add_parser("rebuild-habit-streaks",
+                   help="recompute habit streaks from habit_logs").set_defaults(func=_cmd_rebuild_habit_streaks)
+    sub.add_parser("rebuild-rollups",
+                   help="recompute daily_rollups from the source tables").set_defaults(func=_cmd_rebuild_rollups)
+    sub.add_parser("rebuild-bitmaps",
+                   help="recompute completion_bitmaps from the log tables").set_defaults(func=_cmd_rebuild_bitmaps)
+    args = parser.parse_args(argv)
+    init_db()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,490 @@
+"""Versioned schema migrations tracked with ``PRAGMA user_version``.
+
+Each entry in ``MIGRATIONS`` upgrades the schema by one version and runs in
+its own transaction together with the ``user_version`` bump, so a failed
+migration leaves the database at the previous version. Append new
+migrations to the end of the list; never edit one that has shipped.
+"""
+import sqlite3
+from datetime import date
+
+
+def _run_script(conn: sqlite3.Connection, script: str):
+    """Execute a multi-statement script inside the caller's transaction.
+
+    ``executescript`` would commit the open transaction first, so statements
+    are split with ``sqlite3.complete_statement`` (trigger bodies included).
+    """
+    stmt = ""
+    for part in script.split(";"):
+        stmt += part + ";"
+        if sqlite3.complete_statement(stmt):
+            if stmt.strip(" \n;"):
+                conn.execute(stmt)
+            stmt = ""
+
+
+def _add_column(conn: sqlite3.Connection, table: str, column: str, decl: str):
+    cols = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    if column not in cols:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+
+# ── Migrations ───────────────────────────────────────────────────────────────
+
+_INITIAL_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS plans (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date TEXT NOT NULL UNIQUE,
+        focus TEXT DEFAULT '',
+        energy_level INTEGER DEFAULT 7,
+        created_at TEXT DEFAULT (datetime('now')),
+        updated_at TEXT DEFAULT (datetime('now'))
+    );
+    CREATE TABLE IF NOT EXISTS tasks (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        plan_id INTEGER NOT NULL,
+        category TEXT NOT NULL,
+        title TEXT NOT NULL,
+        description TEXT DEFAULT '',
+        time_slot TEXT DEFAULT '',
+        duration_min INTEGER DEFAULT 30,
+        priority INTEGER DEFAULT 2,
+        is_completed INTEGER DEFAULT 0,
+        is_ai_generated INTEGER DEFAULT 1,
+        sort_order INTEGER DEFAULT 0,
+        completed_at TEXT,
+        FOREIGN KEY (plan_id) REFERENCES plans(id) ON DELETE CASCADE
+    );
+    CREATE TABLE IF NOT EXISTS goals (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        category TEXT NOT NULL,
+        title TEXT NOT NULL,
+        description TEXT DEFAULT '',
+        target_date TEXT,
+        progress INTEGER DEFAULT 0,
+        is_active INTEGER DEFAULT 1,
+        created_at TEXT DEFAULT (datetime('now'))
+    );
+    CREATE TABLE IF NOT EXISTS habits (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL,
+        category TEXT NOT NULL,
+        frequency TEXT DEFAULT 'daily',
+        streak INTEGER DEFAULT 0,
+        best_streak INTEGER DEFAULT 0,
+        is_active INTEGER DEFAULT 1,
+        created_at TEXT DEFAULT (datetime('now'))
+    );
+    CREATE TABLE IF NOT EXISTS habit_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        habit_id INTEGER NOT NULL,
+        date TEXT NOT NULL,
+        completed INTEGER DEFAULT 0,
+        FOREIGN KEY (habit_id) REFERENCES habits(id) ON DELETE CASCADE,
+        UNIQUE(habit_id, date)
+    );
+    CREATE TABLE IF NOT EXISTS reflections (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date TEXT NOT NULL UNIQUE,
+        wins TEXT DEFAULT '',
+        lessons TEXT DEFAULT '',
+        mood INTEGER DEFAULT 5,
+        productivity_score INTEGER DEFAULT 5,
+        notes TEXT DEFAULT '',
+        created_at TEXT DEFAULT (datetime('now'))
+    );
+    CREATE INDEX IF NOT EXISTS idx_tasks_plan ON tasks(plan_id);
+    CREATE INDEX IF NOT EXISTS idx_plans_date ON plans(date);
+    CREATE INDEX IF NOT EXISTS idx_habit_logs_date ON habit_logs(date);
+
+    -- Rituals
+    CREATE TABLE IF NOT EXISTS rituals (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        type TEXT DEFAULT 'morning',
+        description TEXT DEFAULT '',
+        time_slot TEXT DEFAULT '',
+        duration_min INTEGER DEFAULT 5,
+        category TEXT DEFAULT '',
+        icon TEXT DEFAULT '',
+        is_active INTEGER DEFAULT 1,
+        sort_order INTEGER DEFAULT 0,
+        UNIQUE(name, type)
+    );
+    CREATE TABLE IF NOT EXISTS ritual_completions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ritual_id INTEGER NOT NULL,
+        date TEXT NOT NULL,
+        completed_at TEXT DEFAULT (datetime('now')),
+        FOREIGN KEY (ritual_id) REFERENCES rituals(id),
+        UNIQUE(ritual_id, date)
+    );
+
+    -- Workouts
+    CREATE TABLE IF NOT EXISTS workouts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date TEXT,
+        type TEXT,
+        exercises TEXT DEFAULT '[]',
+        duration_min INTEGER DEFAULT 60,
+        intensity TEXT DEFAULT 'medium',
+        notes TEXT DEFAULT '',
+        completed INTEGER DEFAULT 0,
+        created_at TEXT DEFAULT (datetime('now'))
+    );
+
+    -- Meals
+    CREATE TABLE IF NOT EXISTS meals (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date TEXT,
+        meal_type TEXT,
+        description TEXT,
+        calories INTEGER DEFAULT 0,
+        protein REAL DEFAULT 0,
+        carbs REAL DEFAULT 0,
+        fat REAL DEFAULT 0,
+        time TEXT DEFAULT '',
+        created_at TEXT DEFAULT (datetime('now'))
+    );
+
+    -- Supplements
+    CREATE TABLE IF NOT EXISTS supplements (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        dosage TEXT DEFAULT '',
+        time_of_day TEXT DEFAULT '',
+        with_food INTEGER DEFAULT 0,
+        notes TEXT DEFAULT '',
+        is_active INTEGER DEFAULT 1
+    );
+    CREATE TABLE IF NOT EXISTS supplement_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        supplement_id INTEGER NOT NULL,
+        date TEXT NOT NULL,
+        taken INTEGER DEFAULT 0,
+        time TEXT DEFAULT '',
+        FOREIGN KEY (supplement_id) REFERENCES supplements(id),
+        UNIQUE(supplement_id, date)
+    );
+
+    -- Deep Work Sessions
+    CREATE TABLE IF NOT EXISTS deepwork_sessions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date TEXT,
+        task TEXT,
+        category TEXT DEFAULT '',
+        planned_duration INTEGER DEFAULT 90,
+        actual_duration INTEGER DEFAULT 0,
+        focus_score INTEGER DEFAULT 0,
+        notes TEXT DEFAULT '',
+        started_at TEXT,
+        ended_at TEXT,
+        created_at TEXT DEFAULT (datetime('now'))
+    );
+
+    -- TM Progress
+    CREATE TABLE IF NOT EXISTS tm_progress (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        current_level INTEGER DEFAULT 0,
+        level_name TEXT DEFAULT 'Sleep',
+        xp_current INTEGER DEFAULT 0,
+        xp_needed INTEGER DEFAULT 100,
+        qualities_unlocked TEXT DEFAULT '[]',
+        rituals_completed INTEGER DEFAULT 0,
+        days_streak INTEGER DEFAULT 0,
+        updated_at TEXT DEFAULT (datetime('now'))
+    );
+
+    -- Detox Sessions
+    CREATE TABLE IF NOT EXISTS detox_sessions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date TEXT,
+        start_time TEXT,
+        end_time TEXT,
+        duration_min INTEGER DEFAULT 0,
+        success INTEGER DEFAULT 0,
+        created_at TEXT DEFAULT (datetime('now'))
+    );
+
+    -- Seed morning rituals
+    INSERT OR IGNORE INTO rituals (name, type, time_slot, duration_min, sort_order) VALUES ('Подъём', 'morning', '07:00', 5, 1);
+    INSERT OR IGNORE INTO rituals (name, type, time_slot, duration_min, sort_order) VALUES ('Стакан воды', 'morning', '07:05', 2, 2);
+    INSERT OR IGNORE INTO rituals (name, type, time_slot, duration_min, sort_order) VALUES ('Медитация 528Гц', 'morning', '07:10', 15, 3);
+    INSERT OR IGNORE INTO rituals (name, type, time_slot, duration_min, sort_order) VALUES ('Холодный душ', 'morning', '07:25', 5, 4);
+    INSERT OR IGNORE INTO rituals (name, type, time_slot, duration_min, sort_order) VALUES ('Завтрак', 'morning', '07:30', 20, 5);
+    INSERT OR IGNORE INTO rituals (name, type, time_slot, duration_min, sort_order) VALUES ('Intention Setting', 'morning', '07:50', 5, 6);
+    INSERT OR IGNORE INTO rituals (name, type, time_slot, duration_min, sort_order) VALUES ('Gratitude Journal', 'morning', '07:55', 10, 7);
+
+    -- Seed evening rituals
+    INSERT OR IGNORE INTO rituals (name, type, time_slot, duration_min, sort_order) VALUES ('Digital Detox', 'evening', '21:00', 180, 1);
+    INSERT OR IGNORE INTO rituals (name, type, time_slot, duration_min, sort_order) VALUES ('Reflection Journal', 'evening', '21:00', 15, 2);
+    INSERT OR IGNORE INTO rituals (name, type, time_slot, duration_min, sort_order) VALUES ('Планирование завтра', 'evening', '21:15', 10, 3);
+    INSERT OR IGNORE INTO rituals (name, type, time_slot, duration_min, sort_order) VALUES ('Дыхание 4-7-8', 'evening', '22:30', 10, 4);
+    INSERT OR IGNORE INTO rituals (name, type, time_slot, duration_min, sort_order) VALUES ('Мелатонин', 'evening', '22:40', 1, 5);
+    INSERT OR IGNORE INTO rituals (name, type, time_slot, duration_min, sort_order) VALUES ('Отбой', 'evening', '23:00', 0, 6);
+
+    -- Seed TM progress default row
+    INSERT OR IGNORE INTO tm_progress (id) VALUES (1);
+"""
+
+
+def _m001_initial_schema(conn):
+    _run_script(conn, _INITIAL_SCHEMA)
+
+
+def _m002_reflection_ai_fields(conn):
+    _add_column(conn, "reflections", "rating", "INTEGER DEFAULT 0")
+    _add_column(conn, "reflections", "ai_summary", "TEXT DEFAULT ''")
+    _add_column(conn, "reflections", "ai_next_day", "TEXT DEFAULT ''")
+    _add_column(conn, "reflections", "day_score", "INTEGER DEFAULT 0")
+
+
+def _m003_lookup_indexes(conn):
+    _run_script(conn, """
+        CREATE INDEX IF NOT EXISTS idx_tasks_plan_order ON tasks(plan_id, sort_order);
+        DROP INDEX IF EXISTS idx_tasks_plan;
+        CREATE INDEX IF NOT EXISTS idx_ritual_completions_date ON ritual_completions(date);
+        CREATE INDEX IF NOT EXISTS idx_supplement_logs_date ON supplement_logs(date);
+        CREATE INDEX IF NOT EXISTS idx_goals_active ON goals(is_active);
+    """)
+
+
+def _m004_history_keyset_indexes(conn):
+    _run_script(conn, """
+        CREATE INDEX IF NOT EXISTS idx_meals_date_id ON meals(date, id);
+        CREATE INDEX IF NOT EXISTS idx_workouts_date_id ON workouts(date, id);
+        CREATE INDEX IF NOT EXISTS idx_deepwork_date_id ON deepwork_sessions(date, id);
+        CREATE INDEX IF NOT EXISTS idx_detox_date_id ON detox_sessions(date, id);
+        DROP INDEX IF EXISTS idx_plans_date;
+    """)
+
+
+def _m005_plan_task_counters(conn):
+    _add_column(conn, "plans", "tasks_total", "INTEGER NOT NULL DEFAULT 0")
+    _add_column(conn, "plans", "tasks_done", "INTEGER NOT NULL DEFAULT 0")
+    _run_script(conn, """
+        CREATE TRIGGER IF NOT EXISTS trg_tasks_counters_insert AFTER INSERT ON tasks BEGIN
+            UPDATE plans SET tasks_total = tasks_total + 1,
+                             tasks_done = tasks_done + (CASE WHEN NEW.is_completed THEN 1 ELSE 0 END)
+            WHERE id = NEW.plan_id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_tasks_counters_delete AFTER DELETE ON tasks BEGIN
+            UPDATE plans SET tasks_total = tasks_total - 1,
+                             tasks_done = tasks_done - (CASE WHEN OLD.is_completed THEN 1 ELSE 0 END)
+            WHERE id = OLD.plan_id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_tasks_counters_update AFTER UPDATE OF is_completed, plan_id ON tasks BEGIN
+            UPDATE plans SET tasks_total = tasks_total - 1,
+                             tasks_done = tasks_done - (CASE WHEN OLD.is_completed THEN 1 ELSE 0 END)
+            WHERE id = OLD.plan_id;
+            UPDATE plans SET tasks_total = tasks_total + 1,
+                             tasks_done = tasks_done + (CASE WHEN NEW.is_completed THEN 1 ELSE 0 END)
+            WHERE id = NEW.plan_id;
+        END;
+        UPDATE plans SET
+            tasks_total = (SELECT COUNT(*) FROM tasks WHERE plan_id = plans.id),
+            tasks_done = (SELECT COUNT(*) FROM tasks WHERE plan_id = plans.id AND is_completed);
+    """)
+
+
+def _m006_jobs(conn):
+    _run_script(conn, """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            stage TEXT DEFAULT '',
+            payload TEXT NOT NULL DEFAULT '{}',
+            result TEXT,
+            error TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            created_at TEXT DEFAULT (datetime('now')),
+            started_at TEXT,
+            finished_at TEXT,
+            updated_at TEXT DEFAULT (datetime('now'))
+        );
+        CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at);
+    """)
+
+
+def _m007_llm_cache(conn):
+    _run_script(conn, """
+        CREATE TABLE IF NOT EXISTS llm_cache (
+            key TEXT PRIMARY KEY,
+            model TEXT NOT NULL,
+            response TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_used_at REAL NOT NULL,
+            hits INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS idx_llm_cache_lru ON llm_cache(last_used_at);
+    """)
+
+
+def _m008_habit_streak_cache(conn):
+    _add_column(conn, "habits", "last_completed", "TEXT")
+    # Stored streaks were bumped per log call rather than derived from the
+    # logs, so rebuild them all once. A streak counts consecutive periods
+    # with a completed log: days, ISO weeks or working days by frequency.
+    def period(frequency, day):
+        try:
+            n = date.fromisoformat(day).toordinal() - 1  # day 0 is a Monday
+        except (TypeError, ValueError):
+            return None
+        if frequency == "weekly":
+            return n // 7
+        if frequency == "weekdays":
+            return None if n % 7 > 4 else n // 7 * 5 + n % 7
+        return n
+
+    for habit_id, frequency in conn.execute("SELECT id, frequency FROM habits").fetchall():
+        streak = best = 0
+        last_period = last_completed = None
+        for (day,) in conn.execute(
+            "SELECT date FROM habit_logs WHERE habit_id = ? AND completed = 1 ORDER BY date", (habit_id,)
+        ).fetchall():
+            p = period(frequency or "daily", day)
+            if p is None:
+                continue
+            if p != last_period:
+                streak = streak + 1 if last_period is not None and p == last_period + 1 else 1
+                best = max(best, streak)
+                last_period = p
+            last_completed = day
+        conn.execute("UPDATE habits SET streak = ?, best_streak = ?, last_completed = ? WHERE id = ?",
+                     (streak, best, last_completed, habit_id))
+
+
+def _m009_daily_rollups(conn):
+    _run_script(conn, """
+        CREATE TABLE IF NOT EXISTS daily_rollups (
+            date TEXT PRIMARY KEY,
+            tasks_total INTEGER NOT NULL DEFAULT 0,
+            tasks_done INTEGER NOT NULL DEFAULT 0,
+            rituals_done INTEGER NOT NULL DEFAULT 0,
+            rituals_total INTEGER NOT NULL DEFAULT 0,
+            deepwork_minutes INTEGER NOT NULL DEFAULT 0,
+            deepwork_sessions INTEGER NOT NULL DEFAULT 0,
+            focus_avg REAL,
+            calories INTEGER NOT NULL DEFAULT 0,
+            protein REAL NOT NULL DEFAULT 0,
+            carbs REAL NOT NULL DEFAULT 0,
+            fat REAL NOT NULL DEFAULT 0,
+            meals INTEGER NOT NULL DEFAULT 0,
+            detox_sessions INTEGER NOT NULL DEFAULT 0,
+            detox_success INTEGER NOT NULL DEFAULT 0,
+            mood NUMERIC,
+            rating INTEGER,
+            day_score INTEGER,
+            updated_at TEXT
+        ) WITHOUT ROWID;
+
+        INSERT INTO daily_rollups (
+            date, tasks_total, tasks_done, rituals_done, rituals_total,
+            deepwork_minutes, deepwork_sessions, focus_avg,
+            calories, protein, carbs, fat, meals,
+            detox_sessions, detox_success, mood, rating, day_score, updated_at
+        )
+        SELECT d.date,
+            COALESCE((SELECT tasks_total FROM plans WHERE date = d.date), 0),
+            COALESCE((SELECT tasks_done FROM plans WHERE date = d.date), 0),
+            (SELECT COUNT(*) FROM ritual_completions WHERE date = d.date),
+            (SELECT COUNT(*) FROM rituals WHERE is_active = 1),
+            (SELECT COALESCE(SUM(actual_duration), 0) FROM deepwork_sessions WHERE date = d.date),
+            (SELECT COUNT(*) FROM deepwork_sessions WHERE date = d.date AND actual_duration > 0),
+            (SELECT AVG(focus_score) FROM deepwork_sessions WHERE date = d.date AND focus_score > 0),
+            (SELECT COALESCE(SUM(calories), 0) FROM meals WHERE date = d.date),
+            (SELECT COALESCE(SUM(protein), 0) FROM meals WHERE date = d.date),
+            (SELECT COALESCE(SUM(carbs), 0) FROM meals WHERE date = d.date),
+            (SELECT COALESCE(SUM(fat), 0) FROM meals WHERE date = d.date),
+            (SELECT COUNT(*) FROM meals WHERE date = d.date),
+            (SELECT COUNT(*) FROM detox_sessions WHERE date = d.date),
+            (SELECT COALESCE(SUM(success), 0) FROM detox_sessions WHERE date = d.date),
+            (SELECT mood FROM reflections WHERE date = d.date),
+            (SELECT rating FROM reflections WHERE date = d.date),
+            (SELECT day_score FROM reflections WHERE date = d.date),
+            datetime('now')
+        FROM (
+            SELECT date FROM plans
+            UNION SELECT date FROM ritual_completions
+            UNION SELECT date FROM deepwork_sessions
+            UNION SELECT date FROM meals
+            UNION SELECT date FROM detox_sessions
+            UNION SELECT date FROM reflections
+        ) d
+        WHERE d.date IS NOT NULL;
+    """)
+
+
+def _m010_completion_bitmaps(conn):
+    _run_script(conn, """
+        CREATE TABLE IF NOT EXISTS completion_bitmaps (
+            kind TEXT NOT NULL,
+            entity_id INTEGER NOT NULL,
+            year INTEGER NOT NULL,
+            bits BLOB NOT NULL,
+            days_done INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (kind, year, entity_id)
+        ) WITHOUT ROWID;
+    """)
+    # One 46-byte blob per (kind, entity, year): bit i, LSB first, is day i
+    # of the year. Logs whose date does not parse are skipped.
+    sources = (
+        ("ritual", "SELECT l.ritual_id, l.date FROM ritual_completions l JOIN rituals e ON e.id = l.ritual_id"),
+        ("supplement", "SELECT l.supplement_id, l.date FROM supplement_logs l "
+                       "JOIN supplements e ON e.id = l.supplement_id WHERE l.taken = 1"),
+        ("habit", "SELECT l.habit_id, l.date FROM habit_logs l JOIN habits e ON e.id = l.habit_id WHERE l.completed = 1"),
+    )
+    bits: dict[tuple, int] = {}
+    for kind, sql in sources:
+        for entity_id, day in conn.execute(sql).fetchall():
+            try:
+                d = date.fromisoformat(day)
+            except (TypeError, ValueError):
+                continue
+            key = (kind, entity_id, d.year)
+            bits[key] = bits.get(key, 0) | 1 << (d.timetuple().tm_yday - 1)
+    conn.executemany(
+        "INSERT INTO completion_bitmaps (kind, entity_id, year, bits, days_done) VALUES (?, ?, ?, ?, ?)",
+        [(*key, b.to_bytes(46, "little"), b.bit_count()) for key, b in bits.items()],
+    )
+
+
+MIGRATIONS = [
+    _m001_initial_schema,
+    _m002_reflection_ai_fields,
+    _m003_lookup_indexes,
+    _m004_history_keyset_indexes,
+    _m005_plan_task_counters,
+    _m006_jobs,
+    _m007_llm_cache,
+    _m008_habit_streak_cache,
+    _m009_daily_rollups,
+    _m010_completion_bitmaps,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Apply pending migrations; ``conn`` must be in autocommit mode.
+
+    Returns the resulting schema version. When the schema is current this is
+    a single pragma read.
+    """
+    current = conn.execute("PRAGMA user_version").fetchone()[0]
+    if current >= SCHEMA_VERSION:
+        return current
+    for version in range(current + 1, SCHEMA_VERSION + 1):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Another worker may have migrated while we waited for the lock.
+            if conn.execute("PRAGMA user_version").fetchone()[0] < version:
+                MIGRATIONS[version - 1](conn)
+                conn.execute(f"PRAGMA user_version = {version}")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+    return SCHEMA_VERSION
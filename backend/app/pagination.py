@@ -0,0 +1,71 @@
+"""Keyset (cursor) pagination over ``(date, id)``.
+
+History lists are ordered newest first by ``date DESC, id DESC`` and paged
+with an opaque cursor holding the last row's ``(date, id)``. Each page is a
+range scan on a matching ``(date, id)`` index, so page N costs the same as
+page 1 no matter how far back the client scrolls.
+
+``date`` is nullable on some tables. SQLite sorts NULL lowest, so undated
+rows come last; their cursor holds ``null`` and continues by ``id`` alone.
+"""
+import base64
+import json
+from fastapi import HTTPException
+
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(date: str | None, row_id: int) -> str:
+    raw = json.dumps([date, row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str | None, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        date, row_id = json.loads(raw)
+        if not isinstance(date, (str, type(None))) or not isinstance(row_id, int):
+            raise ValueError
+    except (ValueError, TypeError):
+        raise HTTPException(400, "Invalid cursor") from None
+    return date, row_id
+
+
+def page(items: list[dict], next_cursor: str | None = None) -> dict:
+    """Response envelope shared by every paginated list endpoint."""
+    return {"items": items, "next_cursor": next_cursor}
+
+
+def keyset_page(db, table: str, limit: int, cursor: str | None = None,
+                where: str = "", params: tuple = ()) -> dict:
+    """Fetch one page of ``table`` newest first, continuing after ``cursor``.
+
+    ``where`` is an optional extra SQL condition (without ``WHERE``) with its
+    ``params``. One extra row is read to know whether another page exists.
+    Dated and undated rows are read by separate index range scans.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    date, row_id = decode_cursor(cursor) if cursor else (None, None)
+    undated = bool(cursor) and date is None  # the cursor is already past every dated row
+    rows = []
+    if not undated:
+        # Dated rows: a range scan on (date, id) from the cursor down.
+        cond, args = ("(date, id) < (?, ?)", [date, row_id]) if cursor else ("date IS NOT NULL", [])
+        rows = _fetch(db, table, cond, args, where, params, limit + 1)
+    if len(rows) <= limit:
+        # Undated rows sort last; continue with them by id.
+        cond, args = ("date IS NULL AND id < ?", [row_id]) if undated else ("date IS NULL", [])
+        rows += _fetch(db, table, cond, args, where, params, limit + 1 - len(rows))
+    items = [dict(r) for r in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(last["date"], last["id"])
+    return page(items, next_cursor)
+
+
+def _fetch(db, table: str, cond: str, args: list, where: str, params: tuple, limit: int) -> list:
+    sql = f"SELECT * FROM {table} WHERE {cond}"
+    if where:
+        sql += f" AND ({where})"
+    return db.execute(sql + " ORDER BY date DESC, id DESC LIMIT ?", [*args, *params, limit]).fetchall()
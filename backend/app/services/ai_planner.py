@@ -1,8 +1,10 @@
 """AI-powered daily plan generation via OpenRouter."""
-import json
 import re
-import httpx
-from app.config import OPENROUTER_API_KEY, OPENROUTER_BASE_URL, PLANNER_MODEL
+from typing import AsyncIterator
+from app.config import PLANNER_MODEL
+from app.services import llm_cache, openrouter
+from app.services.plan_context import max_tokens_for
+from app.services.json_stream import JSONExtractError, TaskStreamParser, extract_object
 
 
 PLAN_SYSTEM_PROMPT = """Ты — элитный лайф-коуч и стратег личного развития. Создаёшь конкретные, выполнимые ежедневные планы.
@@ -50,17 +52,29 @@ PLAN_USER_TEMPLATE = """Создай план на {date} ({weekday}).
   "evening_routine": "Рекомендация на вечер"
 }}
 
-Сгенерируй 8-12 задач, распределённых по всему дню (с 7:00 до 22:00).
+Сгенерируй {task_count} задач, распределённых по всему дню (с 7:00 до 22:00).
 Приоритет: 1=критично, 2=важно, 3=полезно."""
 
 
+PLAN_TEMPERATURE = 0.7
+TASK_CATEGORIES = ("health", "business", "learning", "networking", "mindset", "personal")
+
+
+class PlanGenerationError(RuntimeError):
+    """The planner could not produce a usable plan."""
+
+
 WEEKDAYS_RU = {
     0: "Понедельник", 1: "Вторник", 2: "Среда", 3: "Четверг",
     4: "Пятница", 5: "Суббота", 6: "Воскресенье"
 }
 
 
-async def generate_daily_plan(
+def _cache_key(messages: list[dict], max_tokens: int) -> str:
+    return llm_cache.make_key(PLANNER_MODEL, messages, temperature=PLAN_TEMPERATURE, max_tokens=max_tokens)
+
+
+def _build_messages(
     date: str,
     weekday: int,
     focus: str = "",
@@ -68,8 +82,8 @@ async def generate_daily_plan(
     goals: list[dict] | None = None,
     habits: list[dict] | None = None,
     yesterday_summary: str = "",
-) -> dict:
-    """Generate AI-powered daily plan."""
+    task_count: int | None = None,
+) -> list[dict]:
     goals_text = ", ".join(g["title"] for g in (goals or [])) or "Не заданы"
     habits_text = ", ".join(h["title"] for h in (habits or [])) or "Не заданы"
 
@@ -81,46 +95,162 @@ async def generate_daily_plan(
         goals=goals_text,
         habits=habits_text,
         yesterday_summary=yesterday_summary or "Нет данных",
+        task_count=task_count or "8-12",
     )
+    return [
+        {"role": "system", "content": PLAN_SYSTEM_PROMPT},
+        {"role": "user", "content": user_msg},
+    ]
+
+
+async def generate_daily_plan(
+    date: str,
+    weekday: int,
+    focus: str = "",
+    energy_level: int = 7,
+    goals: list[dict] | None = None,
+    habits: list[dict] | None = None,
+    yesterday_summary: str = "",
+    use_cache: bool = True,
+    task_count: int | None = None,
+) -> dict:
+    """Generate AI-powered daily plan.
+
+    Identical prompts are answered from the LLM cache unless ``use_cache`` is
+    False; a fresh successful answer from ``PLANNER_MODEL`` always replaces
+    the cached one (fallback models' answers are not cached under its key).
+    The completion budget is sized to ``task_count`` (8-12 when not given).
+    """
+    messages = _build_messages(date, weekday, focus, energy_level, goals, habits, yesterday_summary, task_count)
+    max_tokens = max_tokens_for(task_count)
+    cache_key = _cache_key(messages, max_tokens)
+    cached = await llm_cache.lookup(cache_key, bypass=not use_cache)
+    if cached is not None:
+        return cached
+
+    content, model = await openrouter.chat_completion(
+        messages, model=PLANNER_MODEL, temperature=PLAN_TEMPERATURE, max_tokens=max_tokens,
+    )
+
+    result = _parse_plan(content)
+    if "error" not in result and model == PLANNER_MODEL:
+        await llm_cache.store(cache_key, PLANNER_MODEL, result)
+    return result
+
+
+async def stream_daily_plan(
+    date: str,
+    weekday: int,
+    focus: str = "",
+    energy_level: int = 7,
+    goals: list[dict] | None = None,
+    habits: list[dict] | None = None,
+    yesterday_summary: str = "",
+    use_cache: bool = True,
+    task_count: int | None = None,
+) -> AsyncIterator[tuple[str, dict | list]]:
+    """Stream a plan from OpenRouter.
+
+    Yields ``("big_three", items)`` once the Big 3 list is complete,
+    ``("task", task)`` for every task as soon as its JSON object is complete,
+    then a final ``("plan", plan)`` with the fully parsed response. A cache
+    hit replays the same events without calling the model.
+    """
+    messages = _build_messages(date, weekday, focus, energy_level, goals, habits, yesterday_summary, task_count)
+    max_tokens = max_tokens_for(task_count)
+    cache_key = _cache_key(messages, max_tokens)
+    cached = await llm_cache.lookup(cache_key, bypass=not use_cache)
+    if cached is not None:
+        if "big_three" in cached:
+            yield "big_three", cached["big_three"]
+        for task in cached.get("tasks", []):
+            if isinstance(task, dict):
+                yield "task", task
+        yield "plan", cached
+        return
+
+    parser = TaskStreamParser()
+    big_three_sent = False
+
+    async with openrouter.stream_chat_completion(
+        messages, model=PLANNER_MODEL, temperature=PLAN_TEMPERATURE, max_tokens=max_tokens,
+    ) as (model, deltas):
+        async for delta in deltas:
+            tasks = parser.feed(delta)
+            if not big_three_sent and "big_three" in parser.fields:
+                big_three_sent = True
+                big_three = parser.fields["big_three"]
+                yield "big_three", [str(b) for b in big_three][:3] if isinstance(big_three, list) else []
+            for task in filter(None, map(validate_task, tasks)):
+                yield "task", task
+
+    try:
+        result = validate_plan(parser.finish())
+    except JSONExtractError:
+        result = {"error": "Failed to parse AI response"}
+    if "error" not in result and model == PLANNER_MODEL:
+        await llm_cache.store(cache_key, PLANNER_MODEL, result)
+    yield "plan", result
+
+
+_TIME_SLOT = re.compile(r"^(\d{1,2}):(\d{2})\s*[-–—]\s*(\d{1,2}):(\d{2})$")
+
+
+def _as_int(value, default: int, low: int, high: int) -> int:
+    try:
+        number = int(float(value))
+    except (TypeError, ValueError):
+        return default
+    return min(high, max(low, number))
+
+
+def _normalize_slot(value) -> tuple[str, int | None]:
+    """``"7:00 - 7:30"`` -> ``("07:00-07:30", 30)``; unusable slots become ``""``."""
+    match = _TIME_SLOT.match(str(value or "").strip())
+    if not match:
+        return "", None
+    h1, m1, h2, m2 = map(int, match.groups())
+    if h1 > 23 or h2 > 24 or m1 > 59 or m2 > 59:
+        return "", None
+    start, end = h1 * 60 + m1, h2 * 60 + m2
+    return f"{h1:02d}:{m1:02d}-{h2:02d}:{m2:02d}", (end - start if end > start else None)
+
+
+def validate_task(task) -> dict | None:
+    """Coerce one model task to the ``tasks`` schema; None if it has no title."""
+    if not isinstance(task, dict):
+        return None
+    title = str(task.get("title") or "").strip()
+    if not title:
+        return None
+    category = str(task.get("category") or "").strip().lower()
+    time_slot, slot_minutes = _normalize_slot(task.get("time_slot"))
+    return {
+        "category": category if category in TASK_CATEGORIES else "personal",
+        "title": title[:200],
+        "description": str(task.get("description") or "").strip()[:2000],
+        "time_slot": time_slot,
+        "duration_min": _as_int(task.get("duration_min"), slot_minutes or 30, 5, 720),
+        "priority": _as_int(task.get("priority"), 2, 1, 3),
+    }
+
+
+def validate_plan(data: dict) -> dict:
+    """Normalise a parsed plan; ``{"error": ...}`` if it holds no usable tasks."""
+    tasks = [t for t in map(validate_task, data.get("tasks") or []) if t]
+    if not tasks:
+        return {"error": "AI response contained no valid tasks"}
+    big_three = data.get("big_three")
+    return {
+        "big_three": [str(b).strip() for b in big_three if str(b).strip()][:3] if isinstance(big_three, list) else [],
+        "tasks": tasks,
+        "daily_tip": str(data.get("daily_tip") or ""),
+        "evening_routine": str(data.get("evening_routine") or ""),
+    }
+
 
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        resp = await client.post(
-            f"{OPENROUTER_BASE_URL}/chat/completions",
-            headers={
-                "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                "Content-Type": "application/json",
-            },
-            json={
-                "model": PLANNER_MODEL,
-                "messages": [
-                    {"role": "system", "content": PLAN_SYSTEM_PROMPT},
-                    {"role": "user", "content": user_msg},
-                ],
-                "temperature": 0.7,
-                "max_tokens": 3000,
-            },
-        )
-        resp.raise_for_status()
-        content = resp.json()["choices"][0]["message"]["content"]
-
-    return _parse_json(content)
-
-
-def _parse_json(text: str) -> dict:
+def _parse_plan(text: str) -> dict:
     try:
-        return json.loads(text)
-    except json.JSONDecodeError:
-        pass
-    match = re.search(r"```(?:json)?\s*(\{.*?\})\s*```", text, re.DOTALL)
-    if match:
-        try:
-            return json.loads(match.group(1))
-        except json.JSONDecodeError:
-            pass
-    match = re.search(r"\{.*\}", text, re.DOTALL)
-    if match:
-        try:
-            return json.loads(match.group(0))
-        except json.JSONDecodeError:
-            pass
-    return {"error": "Failed to parse AI response"}
+        return validate_plan(extract_object(text, required=("tasks",)))
+    except JSONExtractError:
+        return {"error": "Failed to parse AI response"}
@@ -0,0 +1,138 @@
+"""Trend and correlation analytics over ``daily_rollups``.
+
+The range is loaded with one query into a ``(metrics, days)`` float array,
+with NaN for days where a metric was not tracked. Rolling means, weekly
+deltas and the pairwise correlation matrix are computed on the whole array
+at once, so years of history cost a few array passes.
+"""
+from datetime import date, timedelta
+import numpy as np
+
+# name -> SQL expression over a daily_rollups row; NULL when not tracked.
+METRICS = {
+    "task_completion": "CASE WHEN tasks_total > 0 THEN 100.0 * tasks_done / tasks_total END",
+    "deepwork_minutes": "deepwork_minutes",
+    "focus_score": "focus_avg",
+    "calories": "CASE WHEN meals > 0 THEN calories END",
+    "protein": "CASE WHEN meals > 0 THEN protein END",
+    "ritual_adherence": "CASE WHEN rituals_total > 0 THEN 100.0 * rituals_done / rituals_total END",
+    "detox_success": "CASE WHEN detox_sessions > 0 THEN 100.0 * detox_success / detox_sessions END",
+    "mood": "CASE WHEN typeof(mood) IN ('integer', 'real') THEN mood END",
+    "rating": "NULLIF(rating, 0)",
+    "day_score": "NULLIF(day_score, 0)",
+}
+NAMES = tuple(METRICS)
+
+_SQL = f"""
+    SELECT CAST(julianday(date) - julianday(:start) AS INTEGER), {', '.join(METRICS.values())}
+    FROM daily_rollups WHERE date BETWEEN :start AND :end AND julianday(date) IS NOT NULL
+"""
+
+
+def load(db, start: date, end: date) -> np.ndarray:
+    """``(len(NAMES), days)`` array for ``start``..``end``; NaN where untracked."""
+    days = (end - start).days + 1
+    values = np.full((len(NAMES), days), np.nan)
+    rows = db.execute(_SQL, {"start": start.isoformat(), "end": end.isoformat()}).fetchall()
+    if rows:
+        raw = np.array([tuple(r) for r in rows], dtype=float)  # NULL -> NaN
+        raw = raw[~np.isnan(raw[:, 0])]
+        values[:, raw[:, 0].astype(int)] = raw[:, 1:].T
+    return values
+
+
+def rolling_mean(values: np.ndarray, window: int, min_periods: int = 1) -> np.ndarray:
+    """Trailing ``window``-day mean per metric, skipping untracked days."""
+    tracked = ~np.isnan(values)
+    pad = np.zeros((values.shape[0], 1))
+    sums = np.concatenate([pad, np.cumsum(np.where(tracked, values, 0), axis=1)], axis=1)
+    counts = np.concatenate([pad, np.cumsum(tracked, axis=1)], axis=1)
+    lo = np.maximum(np.arange(1, values.shape[1] + 1) - window, 0)
+    hi = np.arange(1, values.shape[1] + 1)
+    n = counts[:, hi] - counts[:, lo]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(n >= min_periods, (sums[:, hi] - sums[:, lo]) / n, np.nan)
+
+
+def weekly_means(values: np.ndarray) -> np.ndarray:
+    """Mean per metric over consecutive 7-day blocks ending on the last day.
+
+    Leading days that do not fill a whole block are dropped.
+    """
+    weeks = values.shape[1] // 7
+    block = values[:, values.shape[1] - weeks * 7:].reshape(values.shape[0], weeks, 7)
+    tracked = ~np.isnan(block)
+    n = tracked.sum(axis=2)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(n > 0, np.where(tracked, block, 0).sum(axis=2) / n, np.nan)
+
+
+def correlations(values: np.ndarray, min_overlap: int) -> tuple[np.ndarray, np.ndarray]:
+    """Pairwise Pearson r over the days both metrics were tracked.
+
+    Returns ``(r, overlap)``; r is NaN where fewer than ``min_overlap`` days
+    overlap or a metric is constant over them.
+    """
+    mask = (~np.isnan(values)).astype(float)
+    x = np.where(mask > 0, values, 0)
+    n = mask @ mask.T
+    sx = x @ mask.T          # sum of metric i over days where j is tracked
+    sxx = (x * x) @ mask.T
+    sxy = x @ x.T
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = sxy - sx * sx.T / n
+        var_i = sxx - sx * sx / n
+        r = cov / np.sqrt(var_i * var_i.T)
+    r[(n < min_overlap) | ~np.isfinite(r)] = np.nan
+    return np.clip(r, -1, 1), n.astype(int)
+
+
+def _clean(arr, digits: int = 2):
+    """Nested lists with NaN as None, for JSON."""
+    return [None if np.isnan(v) else round(float(v), digits) for v in arr] if arr.ndim == 1 else [_clean(a, digits) for a in arr]
+
+
+def report(db, end: date, days: int, window: int = 7, min_overlap: int = 7, top: int = 5) -> dict:
+    """Rolling means, week-over-week deltas and correlations for ``days`` ending at ``end``.
+
+    ``weekly.deltas[k]`` is the change from week ``k`` to week ``k + 1``.
+    """
+    start = end - timedelta(days=days - 1)
+    values = load(db, start, end)
+    rolling = rolling_mean(values, window)
+    weekly = weekly_means(values)
+    deltas = np.diff(weekly, axis=1)
+    r, overlap = correlations(values, min_overlap)
+
+    i, j = np.triu_indices(len(NAMES), k=1)
+    pairs = [(a, b) for a, b in zip(i, j) if not np.isnan(r[a, b])]
+    pairs.sort(key=lambda p: -abs(r[p]))
+    tracked = (~np.isnan(values)).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.where(tracked > 0, np.nansum(values, axis=1) / tracked, np.nan)
+
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "metrics": list(NAMES),
+        "summary": {
+            name: {"mean": _clean(means[k:k + 1])[0], "days_tracked": int(tracked[k]),
+                   "last_rolling": _clean(rolling[k, -1:])[0]}
+            for k, name in enumerate(NAMES)
+        },
+        "rolling": {"window": window, "series": dict(zip(NAMES, _clean(rolling)))},
+        "weekly": {
+            "week_ends": [(end - timedelta(days=7 * w)).isoformat() for w in range(weekly.shape[1] - 1, -1, -1)],
+            "means": dict(zip(NAMES, _clean(weekly))),
+            "deltas": dict(zip(NAMES, _clean(deltas))),
+        },
+        "correlations": {
+            "min_overlap": min_overlap,
+            "matrix": _clean(r, 3),
+            "overlap": overlap.tolist(),
+            "strongest": [
+                {"a": NAMES[a], "b": NAMES[b], "r": round(float(r[a, b]), 3), "days": int(overlap[a, b])}
+                for a, b in pairs[:top]
+            ],
+        },
+    }
@@ -0,0 +1,155 @@
+"""Per-entity, per-year completion bitmaps.
+
+``completion_bitmaps`` packs a year of ritual completions, taken supplements
+or completed habit logs into one 46-byte blob per entity: bit ``i`` (LSB
+first, ``bits[i // 8] >> (i % 8) & 1``) is day ``i`` of the year, Jan 1
+being bit 0. Write paths call ``refresh`` after touching the source row, so
+heatmaps, adherence and streaks are bit operations on a few blobs instead
+of scans over one row per day.
+"""
+from datetime import date, timedelta
+
+YEAR_BYTES = 46  # 366 bits
+
+# kind -> (entity table, log table, entity column, "done" condition)
+KINDS = {
+    "ritual": ("rituals", "ritual_completions", "ritual_id", "1"),
+    "supplement": ("supplements", "supplement_logs", "supplement_id", "taken = 1"),
+    "habit": ("habits", "habit_logs", "habit_id", "completed = 1"),
+}
+
+
+def day_index(day: date) -> int:
+    return day.timetuple().tm_yday - 1
+
+
+def year_days(year: int) -> int:
+    return (date(year + 1, 1, 1) - date(year, 1, 1)).days
+
+
+def to_int(blob: bytes | None) -> int:
+    return int.from_bytes(blob, "little") if blob else 0
+
+
+def to_blob(bits: int) -> bytes:
+    return bits.to_bytes(YEAR_BYTES, "little")
+
+
+# ── Sync ────────────────────────────────────────────────────────────────────
+
+def refresh(db, kind: str, entity_id: int, day: str) -> None:
+    """Set or clear the bit for ``day`` from the source row."""
+    _, logs, column, done = KINDS[kind]
+    try:
+        d = date.fromisoformat(day)
+    except ValueError:
+        return  # the log tables accept free-form dates; the index skips them
+    is_done = db.execute(
+        f"SELECT 1 FROM {logs} WHERE {column} = ? AND date = ? AND {done}", (entity_id, day)
+    ).fetchone() is not None
+    row = db.execute(
+        "SELECT bits FROM completion_bitmaps WHERE kind = ? AND entity_id = ? AND year = ?",
+        (kind, entity_id, d.year),
+    ).fetchone()
+    bits = to_int(row[0] if row else None)
+    mask = 1 << day_index(d)
+    new = bits | mask if is_done else bits & ~mask
+    if row is not None and new == bits:
+        return
+    db.execute(
+        "INSERT INTO completion_bitmaps (kind, entity_id, year, bits, days_done) VALUES (?, ?, ?, ?, ?) "
+        "ON CONFLICT(kind, entity_id, year) DO UPDATE SET bits = excluded.bits, days_done = excluded.days_done",
+        (kind, entity_id, d.year, to_blob(new), new.bit_count()),
+    )
+
+
+def drop(db, kind: str, entity_id: int) -> None:
+    db.execute("DELETE FROM completion_bitmaps WHERE kind = ? AND entity_id = ?", (kind, entity_id))
+
+
+def rebuild(db) -> int:
+    """Recompute every bitmap from the log tables; returns the number of bitmaps."""
+    db.execute("DELETE FROM completion_bitmaps")
+    bitmaps: dict[tuple, int] = {}
+    for kind, (entities, logs, column, done) in KINDS.items():
+        rows = db.execute(
+            f"SELECT l.{column}, l.date FROM {logs} l JOIN {entities} e ON e.id = l.{column} WHERE {done}"
+        ).fetchall()
+        for entity_id, day in rows:
+            try:
+                d = date.fromisoformat(day)
+            except (TypeError, ValueError):
+                continue
+            key = (kind, entity_id, d.year)
+            bitmaps[key] = bitmaps.get(key, 0) | 1 << day_index(d)
+    db.executemany(
+        "INSERT INTO completion_bitmaps (kind, entity_id, year, bits, days_done) VALUES (?, ?, ?, ?, ?)",
+        [(*key, to_blob(bits), bits.bit_count()) for key, bits in bitmaps.items()],
+    )
+    return len(bitmaps)
+
+
+# ── Queries ─────────────────────────────────────────────────────────────────
+
+def load(db, kind: str, year: int, ids: list[int] | None = None) -> dict[int, int]:
+    """``{entity_id: bits}`` for ``year``; entities without completions are absent."""
+    sql = "SELECT entity_id, bits FROM completion_bitmaps WHERE kind = ? AND year = ?"
+    params: list = [kind, year]
+    if ids is not None:
+        sql += f" AND entity_id IN ({','.join('?' * len(ids))})"
+        params += ids
+    return {entity_id: to_int(blob) for entity_id, blob in db.execute(sql, params).fetchall()}
+
+
+def is_done(bits: int, day: date) -> bool:
+    return bool(bits >> day_index(day) & 1)
+
+
+def span_mask(start: int, end: int) -> int:
+    """Bits ``start``..``end`` inclusive."""
+    return ((1 << (end + 1)) - 1) & ~((1 << start) - 1) if end >= start else 0
+
+
+def adherence(bits: int, end: int) -> float:
+    """Percent of days done from the first completion through day ``end``."""
+    bits &= span_mask(0, end)
+    if not bits:
+        return 0.0
+    start = (bits & -bits).bit_length() - 1
+    return round(bits.bit_count() * 100 / (end - start + 1), 1)
+
+
+def run_ending_at(bits: int, end: int) -> int:
+    """Length of the run of set bits ending at bit ``end``."""
+    gaps = ~bits & span_mask(0, end)
+    return end + 1 - gaps.bit_length()
+
+
+def longest_run(bits: int) -> int:
+    """Longest run of consecutive set bits (within one year's bitmap)."""
+    n = 0
+    while bits:
+        bits &= bits >> 1
+        n += 1
+    return n
+
+
+def current_streak(db, kind: str, entity_id: int, today: date, bits: int | None = None) -> int:
+    """Days in a row done up to ``today``, or up to yesterday if today is not done yet.
+
+    Crosses into earlier years' bitmaps only while the run reaches Jan 1.
+    """
+    if bits is None:
+        bits = load(db, kind, today.year, [entity_id]).get(entity_id, 0)
+    end = today if is_done(bits, today) else today - timedelta(days=1)
+    total, year, idx = 0, end.year, day_index(end)
+    year_bits = bits if year == today.year else None
+    while True:
+        if year_bits is None:
+            year_bits = load(db, kind, year, [entity_id]).get(entity_id, 0)
+        run = run_ending_at(year_bits, idx)
+        total += run
+        if run <= idx:
+            return total
+        year -= 1
+        idx, year_bits = year_days(year) - 1, None
@@ -0,0 +1,190 @@
+"""Habit streaks derived from ``habit_logs``.
+
+A streak counts consecutive *periods* with at least one completed log; the
+period depends on the habit's ``frequency``: a day (``daily``), an ISO week
+(``weekly``) or a working day (``weekdays``, weekend logs are ignored).
+
+``habits`` caches the result: ``streak`` is the length of the run that ends
+at ``last_completed``, ``best_streak`` the longest run ever. Appending logs
+in date order updates the cache in O(1); an edit behind ``last_completed``
+rescans only the runs around the edited date, and only a change that can
+shrink the best run falls back to a full rescan of the habit.
+"""
+from datetime import date
+
+FREQUENCIES = ("daily", "weekly", "weekdays")
+
+
+def period(frequency: str, day: str | date) -> int | None:
+    """Index of the period containing ``day``; None for days outside the schedule.
+
+    Logs written before dates were validated may hold anything; those are
+    treated like off-schedule days rather than raising.
+    """
+    if isinstance(day, str):
+        try:
+            day = date.fromisoformat(day)
+        except ValueError:
+            return None
+    n = day.toordinal() - 1  # day 0 (0001-01-01) is a Monday
+    if frequency == "weekly":
+        return n // 7
+    if frequency == "weekdays":
+        weekday = n % 7
+        return None if weekday > 4 else n // 7 * 5 + weekday
+    return n
+
+
+def current_period(frequency: str, today: date) -> int:
+    """Period ``today`` falls in; a weekend counts as the coming Monday."""
+    p = period(frequency, today)
+    if p is None:
+        return (today.toordinal() - 1) // 7 * 5 + 5
+    return p
+
+
+def effective_streak(habit: dict, today: date) -> int:
+    """The cached streak, or 0 if the period after its last one has passed."""
+    if not habit.get("last_completed") or not habit.get("streak"):
+        return 0
+    last = period(habit.get("frequency") or "daily", habit["last_completed"])
+    if last is None or last < current_period(habit.get("frequency") or "daily", today) - 1:
+        return 0
+    return habit["streak"]
+
+
+def period_bounds(frequency: str, p: int) -> tuple[str, str]:
+    """First and last date (inclusive) of period ``p``."""
+    if frequency == "weekly":
+        first = date.fromordinal(p * 7 + 1)
+        return first.isoformat(), date.fromordinal(p * 7 + 7).isoformat()
+    if frequency == "weekdays":
+        day = date.fromordinal(p // 5 * 7 + p % 5 + 1).isoformat()
+        return day, day
+    day = date.fromordinal(p + 1).isoformat()
+    return day, day
+
+
+def _run(db, habit_id: int, frequency: str, start: int, backwards: bool) -> int:
+    """Number of consecutive completed periods from ``start`` outwards.
+
+    Walks completed logs away from ``start`` and stops at the first missing
+    period, so the cost is bounded by the length of the run.
+    """
+    first, last = period_bounds(frequency, start)
+    op, bound, order = ("<=", last, "DESC") if backwards else (">=", first, "ASC")
+    rows = db.execute(
+        f"SELECT date FROM habit_logs WHERE habit_id = ? AND completed = 1 AND date {op} ? ORDER BY date {order}",
+        (habit_id, bound),
+    )
+    step = -1 if backwards else 1
+    expected, length = start, 0
+    for row in rows:
+        p = period(frequency, row["date"])
+        if p is None or p == expected - step:  # off-schedule, or another log in the last counted period
+            continue
+        if p != expected:
+            break
+        length += 1
+        expected += step
+    return length
+
+
+def _last_completed(db, habit_id: int, frequency: str) -> str | None:
+    on_schedule = " AND strftime('%w', date) NOT IN ('0', '6')" if frequency == "weekdays" else ""
+    return db.execute("SELECT MAX(date) FROM habit_logs WHERE habit_id = ? AND completed = 1 AND date(date) = date"
+                      + on_schedule,
+                      (habit_id,)).fetchone()[0]
+
+
+def _save(db, habit_id: int, streak: int, best: int, last_completed: str | None):
+    db.execute("UPDATE habits SET streak = ?, best_streak = ?, last_completed = ? WHERE id = ?",
+               (streak, best, last_completed, habit_id))
+
+
+def recompute(db, habit_id: int) -> dict | None:
+    """Rebuild one habit's cached streaks from all of its logs."""
+    habit = db.execute("SELECT frequency FROM habits WHERE id = ?", (habit_id,)).fetchone()
+    if habit is None:
+        return None
+    frequency = habit["frequency"] or "daily"
+    streak = best = 0
+    last_period, last_completed = None, None
+    for row in db.execute("SELECT date FROM habit_logs WHERE habit_id = ? AND completed = 1 ORDER BY date",
+                          (habit_id,)):
+        p = period(frequency, row["date"])
+        if p is None:
+            continue
+        if p != last_period:
+            streak = streak + 1 if last_period is not None and p == last_period + 1 else 1
+            best = max(best, streak)
+            last_period = p
+        last_completed = row["date"]
+    _save(db, habit_id, streak, best, last_completed)
+    return {"streak": streak, "best_streak": best, "last_completed": last_completed}
+
+
+def recompute_all(db) -> int:
+    ids = [r["id"] for r in db.execute("SELECT id FROM habits").fetchall()]
+    for habit_id in ids:
+        recompute(db, habit_id)
+    return len(ids)
+
+
+def record_log(db, habit_id: int, log_date: str, completed: bool) -> dict | None:
+    """Upsert the log for ``log_date`` and bring the cached streaks up to date."""
+    habit = db.execute("SELECT id, frequency, streak, best_streak, last_completed FROM habits WHERE id = ?",
+                       (habit_id,)).fetchone()
+    if habit is None:
+        return None
+    previous = db.execute("SELECT completed FROM habit_logs WHERE habit_id = ? AND date = ?",
+                          (habit_id, log_date)).fetchone()
+    db.execute("INSERT OR REPLACE INTO habit_logs (habit_id, date, completed) VALUES (?, ?, ?)",
+               (habit_id, log_date, 1 if completed else 0))
+
+    frequency = habit["frequency"] or "daily"
+    streak, best, last_completed = habit["streak"] or 0, habit["best_streak"] or 0, habit["last_completed"]
+    p = period(frequency, log_date)
+    if p is None or bool(previous and previous["completed"]) == completed:
+        return {"streak": streak, "best_streak": best, "last_completed": last_completed}
+
+    first, last_day = period_bounds(frequency, p)
+    period_still_done = db.execute(
+        "SELECT 1 FROM habit_logs WHERE habit_id = ? AND completed = 1 AND date BETWEEN ? AND ? AND date != ?",
+        (habit_id, first, last_day, log_date),
+    ).fetchone()
+    if period_still_done:
+        # Another log already covers this period; only the latest date can move.
+        if completed and (last_completed is None or log_date > last_completed):
+            last_completed = log_date
+        elif not completed and log_date == last_completed:
+            last_completed = _last_completed(db, habit_id, frequency)
+        _save(db, habit_id, streak, best, last_completed)
+        return {"streak": streak, "best_streak": best, "last_completed": last_completed}
+
+    last = period(frequency, last_completed) if last_completed else None
+    if completed and (last is None or p > last):
+        # In-order append: extend or restart the current run.
+        streak = streak + 1 if last is not None and p == last + 1 else 1
+        best, last_completed = max(best, streak), log_date
+    elif completed:
+        # Back-fill: p may join the runs on either side of it.
+        after = _run(db, habit_id, frequency, p + 1, backwards=False)
+        joined = _run(db, habit_id, frequency, p - 1, backwards=True) + 1 + after
+        if p + after >= last:
+            streak = joined
+        best = max(best, joined)
+    else:
+        # p dropped out of its run, splitting it in two.
+        before = _run(db, habit_id, frequency, p - 1, backwards=True)
+        after = _run(db, habit_id, frequency, p + 1, backwards=False)
+        if last is None or before + 1 + after >= best:
+            return recompute(db, habit_id)  # the best run shrank; another may now be longest
+        if p == last:
+            last_completed = _last_completed(db, habit_id, frequency)
+            streak = _run(db, habit_id, frequency, period(frequency, last_completed), backwards=True) \
+                if last_completed else 0
+        elif p + after >= last:
+            streak = after
+    _save(db, habit_id, streak, best, last_completed)
+    return {"streak": streak, "best_streak": best, "last_completed": last_completed}
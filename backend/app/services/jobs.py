@@ -0,0 +1,194 @@
+"""Durable background jobs stored in SQLite.
+
+The ``jobs`` row is the source of truth: ``enqueue`` inserts it and returns
+immediately, worker tasks inside the app process claim queued rows, run the
+registered handler and store its result. Jobs interrupted by a shutdown are
+put back in the queue; rows left ``running`` by a crashed process are
+reclaimed once their heartbeat is older than ``JOB_STALE_AFTER`` seconds.
+A running job's heartbeat (``updated_at``) is bumped every third of that
+period for as long as its handler runs, however long it goes without
+reporting a stage.
+"""
+import asyncio
+import json
+import logging
+import uuid
+from typing import Awaitable, Callable
+from app.config import (
+    JOB_WORKERS, JOB_POLL_INTERVAL, JOB_STALE_AFTER, JOB_MAX_ATTEMPTS, JOB_RETENTION_DAYS,
+)
+from app.database import execute, fetch_one, run_db
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_INTERVAL = max(1.0, JOB_STALE_AFTER / 3)
+
+Report = Callable[[str], Awaitable[None]]
+Handler = Callable[[dict, Report], Awaitable[dict]]
+
+_handlers: dict[str, Handler] = {}
+
+
+def register(kind: str):
+    """Register the coroutine that runs jobs of ``kind``.
+
+    The handler receives the job payload and a ``report(stage)`` coroutine
+    for progress updates, and returns a JSON-serialisable result.
+    """
+    def decorator(fn: Handler) -> Handler:
+        _handlers[kind] = fn
+        return fn
+    return decorator
+
+
+def _to_job(row: dict | None) -> dict | None:
+    if row is None:
+        return None
+    job = dict(row)
+    job["payload"] = json.loads(job["payload"] or "{}")
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    return job
+
+
+async def enqueue(kind: str, payload: dict) -> dict:
+    if kind not in _handlers:
+        raise ValueError(f"Unknown job kind: {kind}")
+    job_id = uuid.uuid4().hex
+    await execute("INSERT INTO jobs (id, kind, payload) VALUES (?, ?, ?)",
+                  (job_id, kind, json.dumps(payload, ensure_ascii=False)))
+    worker.wake()
+    return {"id": job_id, "kind": kind, "status": "queued"}
+
+
+async def get_job(job_id: str) -> dict | None:
+    return _to_job(await fetch_one("SELECT * FROM jobs WHERE id = ?", (job_id,)))
+
+
+# ── Storage transitions ──────────────────────────────────────────────────────
+
+def _claim(db) -> dict | None:
+    """Atomically take the oldest runnable job, or reclaim a stale one."""
+    while True:
+        row = db.execute(
+            """UPDATE jobs SET status = 'running', stage = 'started', attempts = attempts + 1,
+                   started_at = datetime('now'), updated_at = datetime('now')
+               WHERE id = (
+                   SELECT id FROM jobs
+                   WHERE status = 'queued'
+                      OR (status = 'running' AND updated_at < datetime('now', ?))
+                   ORDER BY created_at LIMIT 1
+               )
+               RETURNING *""",
+            (f"-{JOB_STALE_AFTER} seconds",),
+        ).fetchone()
+        if row is None or row["attempts"] <= JOB_MAX_ATTEMPTS:
+            return _to_job(row)
+        _finish(db, row["id"], error="Job abandoned after too many attempts")
+
+
+def _set_stage(db, job_id: str, stage: str):
+    db.execute("UPDATE jobs SET stage = ?, updated_at = datetime('now') WHERE id = ?", (stage, job_id))
+
+
+def _heartbeat(db, job_id: str):
+    db.execute("UPDATE jobs SET updated_at = datetime('now') WHERE id = ? AND status = 'running'", (job_id,))
+
+
+def _finish(db, job_id: str, result: dict | None = None, error: str | None = None):
+    db.execute(
+        "UPDATE jobs SET status = ?, stage = ?, result = ?, error = ?, "
+        "finished_at = datetime('now'), updated_at = datetime('now') WHERE id = ?",
+        ("failed" if error else "done", "failed" if error else "done",
+         json.dumps(result, ensure_ascii=False) if result is not None else None, error, job_id),
+    )
+
+
+def _requeue(db, job_id: str):
+    db.execute("UPDATE jobs SET status = 'queued', stage = 'queued', attempts = attempts - 1, "
+               "updated_at = datetime('now') WHERE id = ?", (job_id,))
+
+
+def _prune(db):
+    db.execute("DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < datetime('now', ?)",
+               (f"-{JOB_RETENTION_DAYS} days",))
+
+
+# ── Worker ───────────────────────────────────────────────────────────────────
+
+class JobWorker:
+    """Pool of asyncio tasks draining the ``jobs`` table."""
+
+    def __init__(self, concurrency: int = JOB_WORKERS):
+        self.concurrency = concurrency
+        self._tasks: list[asyncio.Task] = []
+        self._wakeup: asyncio.Event | None = None
+
+    def start(self):
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._loop(), name=f"job-worker-{i}")
+                       for i in range(self.concurrency)]
+
+    async def stop(self):
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def wake(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _loop(self):
+        await run_db(_prune)
+        while True:
+            self._wakeup.clear()
+            try:
+                job = await run_db(_claim)
+            except Exception:
+                logger.exception("Failed to claim job")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), JOB_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    async def _run(self, job: dict):
+        handler = _handlers.get(job["kind"])
+        if handler is None:
+            await run_db(_finish, job["id"], error=f"Unknown job kind: {job['kind']}")
+            return
+
+        async def report(stage: str):
+            await run_db(_set_stage, job["id"], stage)
+
+        heartbeat = asyncio.create_task(self._beat(job["id"]))
+        try:
+            result = await handler(job["payload"], report)
+        except asyncio.CancelledError:
+            await run_db(_requeue, job["id"])
+            raise
+        except Exception as e:
+            logger.warning("Job %s (%s) failed: %s", job["id"], job["kind"], e)
+            await run_db(_finish, job["id"], error=str(e) or type(e).__name__)
+            return
+        finally:
+            heartbeat.cancel()
+        await run_db(_finish, job["id"], result=result)
+
+    @staticmethod
+    async def _beat(job_id: str):
+        """Keep a running job from looking stale while its handler is busy."""
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            try:
+                await run_db(_heartbeat, job_id)
+            except Exception:
+                logger.exception("Failed to record heartbeat for job %s", job_id)
+
+
+worker = JobWorker()
@@ -0,0 +1,165 @@
+"""Incremental parsing of the model's JSON as it streams in.
+
+Model output is JSON wrapped in whatever the model felt like adding: code
+fences, a sentence of prose before or after, or nothing at the end at all
+when it hit ``max_tokens``. Everything here scans the text once, left to
+right, so the cost stays linear however large or malformed the reply is.
+"""
+import json
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+class JSONExtractError(ValueError):
+    """No JSON object could be recovered from the text."""
+
+
+class TaskStreamParser:
+    """Emit elements of the top-level ``"tasks"`` array as soon as they close.
+
+    Text is fed in arbitrary chunks; every character is scanned exactly once
+    by a small state machine that tracks string/escape state, container
+    nesting and the current top-level key. Anything before the first ``{``
+    (code fences, prose) is ignored. Array/object values of the top-level
+    keys listed in ``fields`` are parsed into ``self.fields`` as soon as they
+    close, e.g. ``big_three`` which the model writes before the tasks.
+
+    The first balanced object that parses and has one of the ``required``
+    keys (by default ``array_key``) becomes ``self.root`` and anything after
+    it is ignored; other objects, such as a ``{}`` in leading prose, are
+    skipped. ``finish()`` returns it, or, for a truncated reply,
+    the object cut back to the last complete value and closed.
+    """
+
+    def __init__(self, array_key: str = "tasks", fields: tuple[str, ...] = ("big_three",),
+                 required: tuple[str, ...] | None = None):
+        self.array_key = array_key
+        self.watched = fields
+        self.required = (array_key,) if required is None else required
+        self.fields: dict = {}
+        self.root: dict | None = None
+        self.text = ""
+        self._pos = 0
+        self._reset()
+
+    def _reset(self):
+        self._stack: list[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = -1
+        self._last_string = ""
+        self._root_key = ""
+        self._root_start = -1
+        self._array_depth = 0
+        self._item_start = -1
+        self._field_start = -1
+        self._safe_end = -1
+        self._safe_stack = ""
+
+    def feed(self, chunk: str) -> list[dict]:
+        """Consume ``chunk`` and return the array items completed by it."""
+        self.text += chunk
+        done = []
+        if self.root is not None:
+            return done
+        text = self.text
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if len(self._stack) == 1:
+                        self._last_string = text[self._string_start + 1:i]
+                continue
+            if ch == '"':
+                if self._stack:
+                    self._in_string = True
+                    self._string_start = i
+            elif ch == ":" and len(self._stack) == 1:
+                self._root_key = self._last_string
+            elif ch == "," and self._stack:
+                self._safe_end = i
+                self._safe_stack = "".join(self._stack)
+            elif ch in "{[":
+                if not self._stack:
+                    if ch == "[":
+                        continue
+                    self._root_start = i
+                self._stack.append(ch)
+                depth = len(self._stack)
+                if depth == 2 and self._root_key in self.watched:
+                    self._field_start = i
+                if ch == "[" and depth == 2 and self._root_key == self.array_key:
+                    self._array_depth = depth
+                elif ch == "{" and self._array_depth and depth == self._array_depth + 1:
+                    self._item_start = i
+            elif ch in "}]" and self._stack:
+                depth = len(self._stack)
+                self._stack.pop()
+                if depth == 1:
+                    if self._close_root(i):
+                        self._pos = i + 1
+                        return done
+                    continue
+                self._safe_end = i + 1
+                self._safe_stack = "".join(self._stack)
+                if ch == "}" and self._item_start >= 0 and depth == self._array_depth + 1:
+                    try:
+                        item = json.loads(text[self._item_start:i + 1])
+                    except json.JSONDecodeError:
+                        item = None
+                    if isinstance(item, dict):
+                        done.append(item)
+                    self._item_start = -1
+                elif ch == "]" and depth == self._array_depth:
+                    self._array_depth = 0
+                if depth == 2 and self._field_start >= 0:
+                    try:
+                        self.fields[self._root_key] = json.loads(text[self._field_start:i + 1])
+                    except json.JSONDecodeError:
+                        pass
+                    self._field_start = -1
+        self._pos = len(text)
+        return done
+
+    def _close_root(self, end: int) -> bool:
+        """Accept the balanced span ending at ``end``, or rearm for the next ``{``."""
+        try:
+            obj = json.loads(self.text[self._root_start:end + 1])
+        except json.JSONDecodeError:
+            obj = None
+        if isinstance(obj, dict) and (not self.required or any(k in obj for k in self.required)):
+            self.root = obj
+            return True
+        self._reset()
+        return False
+
+    def finish(self) -> dict:
+        """The parsed root object, repairing a truncated reply if needed.
+
+        Raises ``JSONExtractError`` when nothing usable was seen.
+        """
+        if self.root is not None:
+            return self.root
+        if self._root_start >= 0 and self._safe_end > 0:
+            closers = "".join(_CLOSERS[c] for c in reversed(self._safe_stack))
+            candidate = self.text[self._root_start:self._safe_end].rstrip().rstrip(",") + closers
+            try:
+                obj = json.loads(candidate)
+            except json.JSONDecodeError:
+                obj = None
+            if isinstance(obj, dict):
+                return obj
+        raise JSONExtractError("No JSON object found in model output")
+
+
+def extract_object(text: str, required: tuple[str, ...] = ()) -> dict:
+    """First JSON object in ``text`` with one of the ``required`` keys (any
+    object if empty), tolerating fences, prose and truncation."""
+    parser = TaskStreamParser(fields=(), required=required)
+    parser.feed(text)
+    return parser.finish()
@@ -0,0 +1,79 @@
+"""Persistent cache of parsed LLM responses.
+
+Entries live in the ``llm_cache`` table keyed by a SHA-256 fingerprint of the
+model, sampling parameters and the fully rendered messages, so any change to
+the prompt, its inputs or the model is a different key. Entries expire after
+``LLM_CACHE_TTL`` seconds and the least recently used ones are evicted once
+the table grows past ``LLM_CACHE_MAX_ENTRIES``.
+"""
+import hashlib
+import json
+import time
+from app.config import LLM_CACHE_TTL, LLM_CACHE_MAX_ENTRIES
+from app.database import run_db
+
+_stats = {"hits": 0, "misses": 0, "bypassed": 0, "stores": 0, "evictions": 0}
+
+
+def make_key(model: str, messages: list[dict], **params) -> str:
+    raw = json.dumps({"model": model, "messages": messages, "params": params},
+                     ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _lookup(db, key: str, now: float) -> dict | None:
+    row = db.execute(
+        "UPDATE llm_cache SET last_used_at = ?, hits = hits + 1 WHERE key = ? AND created_at >= ? RETURNING response",
+        (now, key, now - LLM_CACHE_TTL),
+    ).fetchone()
+    return json.loads(row["response"]) if row else None
+
+
+def _store(db, key: str, model: str, value: dict, now: float) -> int:
+    db.execute(
+        "INSERT OR REPLACE INTO llm_cache (key, model, response, created_at, last_used_at) VALUES (?, ?, ?, ?, ?)",
+        (key, model, json.dumps(value, ensure_ascii=False), now, now),
+    )
+    evicted = db.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - LLM_CACHE_TTL,)).rowcount
+    evicted += db.execute(
+        "DELETE FROM llm_cache WHERE key IN ("
+        "  SELECT key FROM llm_cache ORDER BY last_used_at"
+        "  LIMIT MAX((SELECT COUNT(*) FROM llm_cache) - ?, 0))",
+        (LLM_CACHE_MAX_ENTRIES,),
+    ).rowcount
+    return evicted
+
+
+async def lookup(key: str, bypass: bool = False) -> dict | None:
+    """Cached value for ``key``, or None on a miss (always None when bypassing)."""
+    if bypass:
+        _stats["bypassed"] += 1
+        return None
+    value = await run_db(_lookup, key, time.time())
+    _stats["hits" if value is not None else "misses"] += 1
+    return value
+
+
+async def store(key: str, model: str, value: dict):
+    _stats["evictions"] += await run_db(_store, key, model, value, time.time())
+    _stats["stores"] += 1
+
+
+def _summary(db) -> dict:
+    row = db.execute("SELECT COUNT(*) AS entries, COALESCE(SUM(hits), 0) AS stored_hits FROM llm_cache").fetchone()
+    return dict(row)
+
+
+async def stats() -> dict:
+    lookups = _stats["hits"] + _stats["misses"]
+    return {
+        **_stats,
+        "hit_rate": round(_stats["hits"] / lookups, 3) if lookups else 0,
+        **await run_db(_summary),
+        "ttl_seconds": LLM_CACHE_TTL,
+        "max_entries": LLM_CACHE_MAX_ENTRIES,
+    }
+
+
+async def clear() -> int:
+    return await run_db(lambda db: db.execute("DELETE FROM llm_cache").rowcount)
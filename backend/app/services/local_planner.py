@@ -0,0 +1,198 @@
+"""Rule-based offline planner.
+
+Produces the same ``{"big_three", "tasks", ...}`` structure as the AI planner
+from rituals, active goals, energy level and yesterday's unfinished tasks,
+without any network call. Used as the ``local`` generation mode and as the
+fallback when OpenRouter is unavailable.
+"""
+import bisect
+import json
+from datetime import datetime, timedelta
+
+DAY_START = 7 * 60
+DAY_END = 22 * 60
+SLOT_STEP = 15
+
+# category -> (title template, base duration, preferred start, priority)
+_GOAL_BLOCKS = {
+    "business": ("Deep work: {goal}", 90, 9 * 60, 1),
+    "learning": ("Обучение: {goal}", 60, 10 * 60, 2),
+    "health": ("Тренировка: {goal}", 60, 18 * 60, 2),
+    "networking": ("Нетворкинг: {goal}", 30, 14 * 60, 2),
+    "mindset": ("Практика: {goal}", 20, 12 * 60, 3),
+    "personal": ("Личное: {goal}", 45, 19 * 60, 3),
+}
+_DEFAULT_BLOCK = ("Работа над целью: {goal}", 45, 11 * 60, 2)
+_DEMANDING = {"business", "learning"}
+
+# Anchors every day gets regardless of goals.
+_BASE_TASKS = (
+    {"category": "personal", "title": "Обед без экрана", "duration_min": 45, "start": 13 * 60, "priority": 3,
+     "description": "Перерыв на обед и восстановление", "fixed": True},
+    {"category": "mindset", "title": "Разбор входящих и план на день", "duration_min": 30, "start": 8 * 60,
+     "priority": 2, "description": "Почта, мессенджеры, сверка с Big 3"},
+    {"category": "health", "title": "Прогулка 30 минут", "duration_min": 30, "start": 16 * 60, "priority": 3,
+     "description": "Движение и свежий воздух между рабочими блоками"},
+)
+
+_INPUTS_SQL = """
+    SELECT
+        (SELECT json_group_array(json_object('time_slot', time_slot, 'duration_min', duration_min))
+         FROM rituals WHERE is_active = 1 AND time_slot != '') AS rituals,
+        (SELECT json_group_array(json_object(
+            'category', t.category, 'title', t.title, 'description', t.description,
+            'duration_min', t.duration_min, 'priority', t.priority))
+         FROM tasks t JOIN plans p ON p.id = t.plan_id
+         WHERE p.date = :yesterday AND t.is_completed = 0) AS carry_over
+"""
+
+
+class SlotAllocator:
+    """Free time within one day, kept as sorted disjoint ``[start, end)`` minutes."""
+
+    def __init__(self, start: int = DAY_START, end: int = DAY_END):
+        self._starts = [start]
+        self._ends = [end]
+
+    def reserve(self, start: int, end: int):
+        """Remove ``[start, end)`` from the free intervals."""
+        i = max(0, bisect.bisect_right(self._starts, start) - 1)
+        while i < len(self._starts) and self._starts[i] < end:
+            s, e = self._starts[i], self._ends[i]
+            if e <= start:
+                i += 1
+                continue
+            pieces = [(s, start)] if s < start else []
+            if end < e:
+                pieces.append((end, e))
+            self._starts[i:i + 1] = [p[0] for p in pieces]
+            self._ends[i:i + 1] = [p[1] for p in pieces]
+            i += len(pieces)
+
+    def place(self, duration: int, not_before: int = DAY_START, not_after: int = DAY_END) -> int | None:
+        """Reserve the earliest ``duration`` minutes starting at or after ``not_before``."""
+        i = max(0, bisect.bisect_right(self._starts, not_before) - 1)
+        for s, e in zip(self._starts[i:], self._ends[i:]):
+            start = max(s, not_before)
+            if start + duration > min(e, not_after):
+                if s >= not_after:
+                    break
+                continue
+            self.reserve(start, start + duration)
+            return start
+        return None
+
+    def free_minutes(self) -> int:
+        return sum(e - s for s, e in zip(self._starts, self._ends))
+
+
+def _minutes(hhmm: str) -> int | None:
+    try:
+        h, m = hhmm.strip()[:5].split(":")
+        return int(h) * 60 + int(m)
+    except ValueError:
+        return None
+
+
+def _hhmm(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def _round(minutes: float) -> int:
+    return max(SLOT_STEP, int(round(minutes / SLOT_STEP)) * SLOT_STEP)
+
+
+def build_plan(energy_level: int, goals: list[dict], rituals: list[dict] | None = None,
+               carry_over: list[dict] | None = None, task_count: int | None = None) -> dict:
+    """Lay out a day between 07:00 and 22:00.
+
+    Ritual slots are blocked first. Candidates (fixed anchors, yesterday's
+    unfinished tasks, one block per goal in the given order) are then placed
+    by priority, longest first, at the earliest free slot from their
+    preferred start. Energy scales block length and how many demanding
+    blocks are scheduled; low energy keeps them in the morning.
+    """
+    slots = SlotAllocator()
+    for ritual in rituals or []:
+        start = _minutes(ritual.get("time_slot") or "")
+        if start is not None and ritual.get("duration_min"):
+            slots.reserve(start, start + ritual["duration_min"])
+
+    scale = 0.6 + energy_level * 0.06
+    limit = task_count or min(12, 6 + energy_level // 2)
+    late_cutoff = 13 * 60 if energy_level <= 4 else DAY_END
+
+    candidates = [dict(t) for t in _BASE_TASKS]
+    demanding = 0
+    for goal in goals:
+        template, duration, start, priority = _GOAL_BLOCKS.get(goal.get("category"), _DEFAULT_BLOCK)
+        if goal.get("category") in _DEMANDING:
+            demanding += 1
+            if demanding > max(1, energy_level // 3):
+                continue
+        candidates.append({
+            "category": goal.get("category") or "personal",
+            "title": template.format(goal=goal["title"]),
+            "description": f"Шаг к цели «{goal['title']}»",
+            "duration_min": _round(duration * scale),
+            "start": start,
+            "priority": priority,
+            "demanding": goal.get("category") in _DEMANDING,
+        })
+
+    # Yesterday's leftovers, unless today's blocks already cover them.
+    titles = {t["title"] for t in candidates}
+    for task in carry_over or []:
+        if task["title"] in titles:
+            continue
+        titles.add(task["title"])
+        candidates.append({
+            "category": task.get("category") or "personal",
+            "title": task["title"],
+            "description": f"Перенесено со вчера. {task.get('description') or ''}".strip(),
+            "duration_min": task.get("duration_min") or 30,
+            "start": 9 * 60,
+            "priority": max(1, (task.get("priority") or 2) - 1),
+        })
+
+    order = sorted(range(len(candidates)),
+                   key=lambda i: (not candidates[i].get("fixed"), candidates[i]["priority"],
+                                  -candidates[i]["duration_min"], i))
+    placed = []
+    for i in order:
+        if len(placed) >= limit:
+            break
+        task = candidates[i]
+        not_after = late_cutoff if task.get("demanding") else DAY_END
+        start = slots.place(task["duration_min"], max(DAY_START, min(task["start"], not_after)), not_after)
+        if start is None:
+            start = slots.place(task["duration_min"], DAY_START, not_after)
+        if start is None:
+            continue
+        placed.append((start, i, task))
+
+    big_three = [task["title"] for _, _, task in sorted(placed, key=lambda p: (p[2]["priority"], p[0]))
+                 if not task.get("fixed")][:3]
+    tasks = [{
+        "category": task["category"],
+        "title": task["title"],
+        "description": task["description"],
+        "time_slot": f"{_hhmm(start)}-{_hhmm(start + task['duration_min'])}",
+        "duration_min": task["duration_min"],
+        "priority": task["priority"],
+    } for start, _, task in sorted(placed)]
+    return {
+        "big_three": big_three,
+        "tasks": tasks,
+        "daily_tip": ("Энергии мало — сделай главное до обеда и не добавляй новых задач."
+                      if energy_level <= 4 else "Начни с самой сложной задачи, пока энергия на пике."),
+        "evening_routine": "Вечерние ритуалы, итоги дня и план на завтра.",
+    }
+
+
+def plan_day(db, plan_date: str, energy_level: int, goals: list[dict], task_count: int | None = None) -> dict:
+    """Load rituals and yesterday's unfinished tasks, then ``build_plan``."""
+    yesterday = (datetime.strptime(plan_date, "%Y-%m-%d") - timedelta(days=1)).strftime("%Y-%m-%d")
+    row = db.execute(_INPUTS_SQL, {"yesterday": yesterday}).fetchone()
+    return build_plan(energy_level, goals, json.loads(row["rituals"] or "[]"),
+                      json.loads(row["carry_over"] or "[]"), task_count)
@@ -0,0 +1,309 @@
+"""Shared OpenRouter client.
+
+One ``httpx.AsyncClient`` lives for the whole app (opened and closed in the
+FastAPI lifespan) so every AI call reuses warm keep-alive / HTTP/2
+connections instead of paying a TCP+TLS handshake, and the connection limits
+bound how many sockets a burst of generations can open.
+
+Calls go through a model fallback chain with per-model circuit breakers and
+latency-budget hedging, so tail latency is bounded by ``LLM_LATENCY_BUDGET``
+rather than by upstream timeouts.
+"""
+import asyncio
+import json
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import AsyncIterator
+import httpx
+from app.config import (
+    OPENROUTER_API_KEY, OPENROUTER_BASE_URL, OPENROUTER_HTTP2,
+    OPENROUTER_MAX_CONNECTIONS, OPENROUTER_MAX_KEEPALIVE, PLANNER_MODEL, PLANNER_FALLBACK_MODELS,
+    LLM_HEDGE_AFTER, LLM_LATENCY_BUDGET, LLM_BREAKER_THRESHOLD, LLM_BREAKER_COOLDOWN,
+)
+
+DEFAULT_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+
+_client: httpx.AsyncClient | None = None
+
+
+def _http2_enabled() -> bool:
+    if not OPENROUTER_HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _new_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        base_url=OPENROUTER_BASE_URL,
+        headers={
+            "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+            "Content-Type": "application/json",
+        },
+        timeout=DEFAULT_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=OPENROUTER_MAX_CONNECTIONS,
+            max_keepalive_connections=OPENROUTER_MAX_KEEPALIVE,
+            keepalive_expiry=60,
+        ),
+        http2=_http2_enabled(),
+    )
+
+
+async def start():
+    global _client
+    if _client is None:
+        _client = _new_client()
+
+
+async def close():
+    global _client
+    if _client is not None:
+        client, _client = _client, None
+        await client.aclose()
+
+
+def get_client() -> httpx.AsyncClient:
+    """The shared client; created on first use outside the app lifespan."""
+    global _client
+    if _client is None:
+        _client = _new_client()
+    return _client
+
+
+# ── Resilience ───────────────────────────────────────────────────────────────
+
+class LLMUnavailableError(httpx.HTTPError):
+    """No model in the fallback chain answered within the latency budget."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker for one model.
+
+    After ``threshold`` failures in a row the model is skipped for
+    ``cooldown`` seconds; then a single trial request is let through and its
+    outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, threshold: int = LLM_BREAKER_THRESHOLD, cooldown: float = LLM_BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._trial_at: float | None = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.cooldown else "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        now = time.monotonic()
+        # A trial that was cancelled (e.g. lost a hedge) never reports back,
+        # so a new one is allowed once the previous is a cooldown old.
+        if state == "half_open" and (self._trial_at is None or now - self._trial_at >= self.cooldown):
+            self._trial_at = now
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_at = None
+        if self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+
+
+def breaker(model: str) -> CircuitBreaker:
+    if model not in _breakers:
+        _breakers[model] = CircuitBreaker()
+    return _breakers[model]
+
+
+def breaker_states() -> dict[str, dict]:
+    return {m: {"state": b.state, "failures": b.failures} for m, b in _breakers.items()}
+
+
+def _model_chain(model: str, fallbacks: list[str] | None) -> list[str]:
+    chain = [model]
+    for m in PLANNER_FALLBACK_MODELS if fallbacks is None else fallbacks:
+        if m not in chain:
+            chain.append(m)
+    return chain
+
+
+def _is_model_failure(exc: Exception) -> bool:
+    """Upstream trouble worth failing over for, as opposed to a bad request."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500 or exc.response.status_code in (408, 429)
+    return isinstance(exc, (httpx.TransportError, KeyError, IndexError, ValueError))
+
+
+async def _post_once(model: str, messages: list[dict], temperature: float, max_tokens: int,
+                     timeout: float) -> str:
+    resp = await get_client().post(
+        "/chat/completions",
+        json={
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        },
+        timeout=httpx.Timeout(timeout, connect=min(timeout, 10.0)),
+    )
+    resp.raise_for_status()
+    return resp.json()["choices"][0]["message"]["content"]
+
+
+async def chat_completion(
+    messages: list[dict],
+    model: str = PLANNER_MODEL,
+    temperature: float = 0.7,
+    max_tokens: int = 1000,
+    timeout: float | None = None,
+    fallbacks: list[str] | None = None,
+    hedge_after: float | None = LLM_HEDGE_AFTER,
+    budget: float = LLM_LATENCY_BUDGET,
+) -> tuple[str, str]:
+    """Return ``(content, model)`` from the first model that answers.
+
+    ``model`` is tried first, then ``fallbacks`` (``PLANNER_FALLBACK_MODELS``
+    by default) in order, skipping models whose circuit is open. A failed
+    attempt fails over immediately; an attempt still running after
+    ``hedge_after`` seconds is hedged with the next model and the first answer
+    wins. Nothing waits past ``budget`` seconds in total. Raises
+    ``LLMUnavailableError`` (an ``httpx.HTTPError``) when every option is
+    exhausted, or the upstream error itself for non-retryable 4xx responses.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + budget
+    candidates = iter(_model_chain(model, fallbacks))
+    pending: dict[asyncio.Task, str] = {}
+    errors: list[str] = []
+
+    def launch() -> bool:
+        for m in candidates:
+            if not breaker(m).allow():
+                errors.append(f"{m}: circuit open")
+                continue
+            per_call = max(0.1, min(deadline - loop.time(), timeout or DEFAULT_TIMEOUT.read))
+            pending[asyncio.create_task(_post_once(m, messages, temperature, max_tokens, per_call))] = m
+            return True
+        return False
+
+    launch()
+    hedge_at = loop.time() + hedge_after if hedge_after is not None else None
+    try:
+        while pending:
+            now = loop.time()
+            if now >= deadline:
+                errors.append("latency budget exhausted")
+                break
+            wake = min(deadline, hedge_at) if hedge_at is not None else deadline
+            done, _ = await asyncio.wait(pending, timeout=max(0.0, wake - now),
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                if hedge_at is not None and loop.time() >= hedge_at:
+                    hedge_at = None
+                    launch()
+                continue
+            for task in done:
+                m = pending.pop(task)
+                try:
+                    content = task.result()
+                except Exception as e:
+                    if not _is_model_failure(e):
+                        raise
+                    breaker(m).record_failure()
+                    errors.append(f"{m}: {type(e).__name__}")
+                    continue
+                breaker(m).record_success()
+                return content, m
+            if not pending:
+                launch()
+    finally:
+        for task in pending:
+            task.cancel()
+    raise LLMUnavailableError("No model answered: " + "; ".join(errors or ["no models available"]))
+
+
+@asynccontextmanager
+async def stream_chat_completion(
+    messages: list[dict],
+    model: str = PLANNER_MODEL,
+    temperature: float = 0.7,
+    max_tokens: int = 1000,
+    timeout: float | httpx.Timeout | None = None,
+    fallbacks: list[str] | None = None,
+) -> AsyncIterator[tuple[str, AsyncIterator[str]]]:
+    """Open a streaming completion and yield ``(model, deltas)``, an iterator
+    of content deltas from the model that accepted the stream.
+
+    Models are tried in fallback order until one accepts the stream; once
+    tokens flow there is no failover (hedging a stream would duplicate
+    output), but a mid-stream failure still counts against the model.
+    """
+    errors: list[str] = []
+    for m in _model_chain(model, fallbacks):
+        if not breaker(m).allow():
+            errors.append(f"{m}: circuit open")
+            continue
+        async with AsyncExitStack() as stack:
+            try:
+                resp = await stack.enter_async_context(get_client().stream(
+                    "POST",
+                    "/chat/completions",
+                    json={
+                        "model": m,
+                        "messages": messages,
+                        "temperature": temperature,
+                        "max_tokens": max_tokens,
+                        "stream": True,
+                    },
+                    timeout=timeout or DEFAULT_TIMEOUT,
+                ))
+                resp.raise_for_status()
+            except httpx.HTTPError as e:
+                if not _is_model_failure(e):
+                    raise
+                breaker(m).record_failure()
+                errors.append(f"{m}: {type(e).__name__}")
+                continue
+
+            async def deltas() -> AsyncIterator[str]:
+                async for line in resp.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    try:
+                        delta = json.loads(data)["choices"][0]["delta"].get("content")
+                    except (json.JSONDecodeError, KeyError, IndexError):
+                        continue
+                    if delta:
+                        yield delta
+
+            try:
+                yield m, deltas()
+            except httpx.HTTPError as e:
+                if _is_model_failure(e):
+                    breaker(m).record_failure()
+                raise
+            breaker(m).record_success()
+            return
+    raise LLMUnavailableError("No model accepted the stream: " + "; ".join(errors or ["no models available"]))
@@ -0,0 +1,154 @@
+"""Token-budgeted prompt context for plan generation.
+
+Goals, habits and yesterday's results are loaded in one query, ranked by
+relevance to the day and trimmed to ``PLAN_CONTEXT_TOKENS`` so prompt size
+(and with it latency and cost) stays flat no matter how many goals a user
+keeps or how long their reflections get.
+"""
+import json
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from app.config import PLAN_CONTEXT_TOKENS
+
+DEFAULT_TASK_COUNT = 12
+# A task with the Russian "detailed description" the prompt asks for runs to
+# ~180 tokens on real tokenizers (Cyrillic splits into short pieces), and
+# big_three/daily_tip/evening_routine plus the JSON frame to ~350; both carry
+# headroom so a long reply is not cut off and repaired down to fewer tasks.
+TOKENS_PER_TASK = 240
+RESPONSE_OVERHEAD_TOKENS = 500
+MAX_RESPONSE_TOKENS = 4500
+MAX_TITLE_CHARS = 80
+
+# Share of the budget each section may use; whatever a section leaves unused
+# rolls over to the next one.
+_SHARES = (("goals", 0.45), ("habits", 0.2), ("lessons", 0.35))
+
+_CONTEXT_SQL = """
+    SELECT
+        (SELECT json_group_array(json_object(
+            'id', id, 'title', title, 'category', category, 'progress', progress,
+            'target_date', target_date))
+         FROM goals WHERE is_active = 1) AS goals,
+        (SELECT json_group_array(json_object(
+            'id', id, 'title', title, 'category', category, 'streak', streak,
+            'frequency', frequency))
+         FROM habits WHERE is_active = 1) AS habits,
+        (SELECT json_object('done', tasks_done, 'total', tasks_total)
+         FROM plans WHERE date = :yesterday) AS yesterday_plan,
+        (SELECT json_object('mood', mood, 'lessons', lessons)
+         FROM reflections WHERE date = :yesterday) AS yesterday_reflection
+"""
+
+
+@dataclass
+class PlanContext:
+    goals: list[dict]
+    habits: list[dict]
+    yesterday_summary: str
+    prompt_tokens: int
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count: ~4 chars per token for ASCII, ~2.5 for Cyrillic."""
+    if not text:
+        return 0
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return int(ascii_chars / 4 + (len(text) - ascii_chars) / 2.5) + 1
+
+
+def max_tokens_for(task_count: int | None) -> int:
+    """Completion budget sized to the number of tasks requested (3380 by default)."""
+    count = task_count or DEFAULT_TASK_COUNT
+    return min(MAX_RESPONSE_TOKENS, RESPONSE_OVERHEAD_TOKENS + TOKENS_PER_TASK * count)
+
+
+def _words(text: str) -> set[str]:
+    return {w for w in re.findall(r"\w+", (text or "").lower()) if len(w) > 2}
+
+
+def _clip(text: str, limit: int = MAX_TITLE_CHARS) -> str:
+    text = (text or "").strip()
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+def _goal_score(goal: dict, focus_words: set[str], today: date) -> float:
+    score = 3.0 * len(focus_words & _words(f"{goal['title']} {goal['category']}"))
+    if goal.get("target_date"):
+        try:
+            days_left = (date.fromisoformat(goal["target_date"][:10]) - today).days
+        except ValueError:
+            days_left = None
+        if days_left is not None:
+            score += 2.0 if days_left <= 7 else 1.0 if days_left <= 30 else 0.0
+    return score + (100 - (goal.get("progress") or 0)) / 100
+
+
+def _habit_score(habit: dict, focus_words: set[str]) -> float:
+    # Long streaks are the ones worth protecting in today's plan.
+    return 3.0 * len(focus_words & _words(f"{habit['title']} {habit['category']}")) + min(habit.get("streak") or 0, 30) / 10
+
+
+def _take(items: list[dict], budget: int) -> tuple[list[dict], int]:
+    """Keep ranked items while their titles fit in ``budget`` tokens."""
+    kept, used = [], 0
+    for item in items:
+        cost = estimate_tokens(item["title"]) + 1
+        if used + cost > budget:
+            break
+        kept.append(item)
+        used += cost
+    return kept, used
+
+
+def _trim_text(text: str, budget: int) -> str:
+    """Cut ``text`` to ``budget`` tokens, preferring a sentence boundary."""
+    text = " ".join((text or "").split())
+    if estimate_tokens(text) <= budget:
+        return text
+    cut = text[:max(0, int(budget * 2.5))]
+    boundary = max(cut.rfind(". "), cut.rfind("! "), cut.rfind("? "))
+    if boundary > len(cut) // 2:
+        cut = cut[:boundary + 1]
+    return cut.rstrip() + "…"
+
+
+def load(db, plan_date: str, focus: str = "", budget: int = PLAN_CONTEXT_TOKENS) -> PlanContext:
+    """Load, rank and trim the planner context for ``plan_date`` in one query."""
+    day = datetime.strptime(plan_date, "%Y-%m-%d").date()
+    yesterday = (day - timedelta(days=1)).isoformat()
+    row = db.execute(_CONTEXT_SQL, {"yesterday": yesterday}).fetchone()
+
+    focus_words = _words(focus)
+    goals = [{**g, "title": _clip(g["title"])} for g in json.loads(row["goals"] or "[]")]
+    goals.sort(key=lambda g: _goal_score(g, focus_words, day), reverse=True)
+    habits = [{**h, "title": _clip(h["title"])} for h in json.loads(row["habits"] or "[]")]
+    habits.sort(key=lambda h: _habit_score(h, focus_words), reverse=True)
+
+    yesterday_summary = ""
+    if row["yesterday_plan"]:
+        plan = json.loads(row["yesterday_plan"])
+        done, total = plan["done"], plan["total"]
+        yesterday_summary = f"Выполнено {done}/{total} задач ({round(done / total * 100) if total else 0}%)"
+    used = estimate_tokens(yesterday_summary)
+
+    carry = 0
+    reflection = json.loads(row["yesterday_reflection"]) if row["yesterday_reflection"] and row["yesterday_plan"] else None
+    for section, share in _SHARES:
+        allowance = int(budget * share) + carry
+        if section == "goals":
+            goals, spent = _take(goals, allowance)
+        elif section == "habits":
+            habits, spent = _take(habits, allowance)
+        else:
+            spent = 0
+            if reflection:
+                prefix = f". Настроение: {reflection['mood']}/10. Уроки: "
+                lessons = _trim_text(reflection["lessons"] or "", max(0, allowance - estimate_tokens(prefix)))
+                yesterday_summary += prefix + lessons
+                spent = estimate_tokens(prefix + lessons)
+        carry = max(0, allowance - spent)
+        used += spent
+
+    return PlanContext(goals=goals, habits=habits, yesterday_summary=yesterday_summary, prompt_tokens=used)
@@ -0,0 +1,163 @@
+"""Per-day rollups of the tracked metrics.
+
+``daily_rollups`` holds one row per date with the day's task, ritual,
+deep-work, nutrition, detox and reflection aggregates. Write paths call
+``refresh_day`` in the same transaction as the write, so range views read
+one row per day instead of scanning every source table.
+
+``rituals_total`` is the number of active rituals when the day was last
+refreshed; a rebuild uses today's count for every day.
+"""
+from datetime import date, timedelta
+
+COLUMNS = (
+    "tasks_total", "tasks_done",
+    "rituals_done", "rituals_total",
+    "deepwork_minutes", "deepwork_sessions", "focus_avg",
+    "calories", "protein", "carbs", "fat", "meals",
+    "detox_sessions", "detox_success",
+    "mood", "rating", "day_score",
+)
+
+# Subselects keyed on ``d.date``; every source table has a date index.
+_SELECT = """
+    SELECT d.date,
+        COALESCE((SELECT tasks_total FROM plans WHERE date = d.date), 0),
+        COALESCE((SELECT tasks_done FROM plans WHERE date = d.date), 0),
+        (SELECT COUNT(*) FROM ritual_completions WHERE date = d.date),
+        (SELECT COUNT(*) FROM rituals WHERE is_active = 1),
+        (SELECT COALESCE(SUM(actual_duration), 0) FROM deepwork_sessions WHERE date = d.date),
+        (SELECT COUNT(*) FROM deepwork_sessions WHERE date = d.date AND actual_duration > 0),
+        (SELECT AVG(focus_score) FROM deepwork_sessions WHERE date = d.date AND focus_score > 0),
+        (SELECT COALESCE(SUM(calories), 0) FROM meals WHERE date = d.date),
+        (SELECT COALESCE(SUM(protein), 0) FROM meals WHERE date = d.date),
+        (SELECT COALESCE(SUM(carbs), 0) FROM meals WHERE date = d.date),
+        (SELECT COALESCE(SUM(fat), 0) FROM meals WHERE date = d.date),
+        (SELECT COUNT(*) FROM meals WHERE date = d.date),
+        (SELECT COUNT(*) FROM detox_sessions WHERE date = d.date),
+        (SELECT COALESCE(SUM(success), 0) FROM detox_sessions WHERE date = d.date),
+        (SELECT mood FROM reflections WHERE date = d.date),
+        (SELECT rating FROM reflections WHERE date = d.date),
+        (SELECT day_score FROM reflections WHERE date = d.date),
+        datetime('now')
+    FROM {days} d
+    WHERE 1
+"""
+
+_UPSERT = (
+    f"INSERT INTO daily_rollups (date, {', '.join(COLUMNS)}, updated_at) {_SELECT} "
+    "ON CONFLICT(date) DO UPDATE SET "
+    + ", ".join(f"{c} = excluded.{c}" for c in (*COLUMNS, "updated_at"))
+)
+
+_REFRESH_SQL = _UPSERT.format(days="(SELECT ? AS date)")
+
+_ALL_DAYS = """(
+    SELECT date FROM plans
+    UNION SELECT date FROM ritual_completions
+    UNION SELECT date FROM deepwork_sessions
+    UNION SELECT date FROM meals
+    UNION SELECT date FROM detox_sessions
+    UNION SELECT date FROM reflections
+)"""
+
+_REBUILD_SQL = _UPSERT.format(days=f"(SELECT date FROM {_ALL_DAYS} WHERE date IS NOT NULL)")
+
+
+def refresh_day(db, day: str | None) -> None:
+    """Recompute the rollup row for ``day``."""
+    if day:
+        db.execute(_REFRESH_SQL, (day,))
+
+
+def refresh_for(db, table: str, row_id: int) -> str | None:
+    """Refresh the day of row ``row_id`` in ``table``; returns that date."""
+    row = db.execute(f"SELECT date FROM {table} WHERE id = ?", (row_id,)).fetchone()
+    day = row[0] if row else None
+    refresh_day(db, day)
+    return day
+
+
+def rebuild(db) -> int:
+    """Recompute every rollup from the source tables."""
+    db.execute("DELETE FROM daily_rollups")
+    db.execute(_REBUILD_SQL)
+    return db.execute("SELECT COUNT(*) FROM daily_rollups").fetchone()[0]
+
+
+# ── Ranges ──────────────────────────────────────────────────────────────────
+
+PERIODS = ("week", "month", "year")
+
+# Columns that are non-zero only when something was logged that day.
+_ACTIVITY = ("tasks_total", "rituals_done", "deepwork_sessions", "meals", "detox_sessions", "rating", "day_score")
+
+
+def period_bounds(period: str, anchor: date) -> tuple[date, date]:
+    """First and last day of the ISO week, month or year containing ``anchor``."""
+    if period == "week":
+        start = anchor - timedelta(days=anchor.weekday())
+        return start, start + timedelta(days=6)
+    if period == "month":
+        start = anchor.replace(day=1)
+        nxt = (start + timedelta(days=32)).replace(day=1)
+        return start, nxt - timedelta(days=1)
+    if period == "year":
+        return anchor.replace(month=1, day=1), anchor.replace(month=12, day=31)
+    raise ValueError(f"unknown period: {period}")
+
+
+def _empty(day: str) -> dict:
+    row = dict.fromkeys(COLUMNS, 0)
+    row.update(date=day, focus_avg=None, mood=None, rating=None, day_score=None)
+    return row
+
+
+def load_range(db, start: date, end: date) -> list[dict]:
+    """One row per day in ``start``..``end``; days without data are zero-filled."""
+    rows = {
+        r["date"]: dict(r)
+        for r in db.execute(
+            f"SELECT date, {', '.join(COLUMNS)} FROM daily_rollups WHERE date BETWEEN ? AND ? ORDER BY date",
+            (start.isoformat(), end.isoformat()),
+        ).fetchall()
+    }
+    days = []
+    day = start
+    while day <= end:
+        key = day.isoformat()
+        days.append(rows.get(key) or _empty(key))
+        day += timedelta(days=1)
+    return days
+
+
+def _avg(values) -> float | None:
+    values = [v for v in values if v is not None]
+    return round(sum(values) / len(values), 1) if values else None
+
+
+def summarize(days: list[dict]) -> dict:
+    """Totals and per-day averages over ``days``."""
+    total = {c: sum(d[c] for d in days) for c in (
+        "tasks_total", "tasks_done", "rituals_done", "rituals_total", "deepwork_minutes",
+        "deepwork_sessions", "calories", "meals", "detox_sessions", "detox_success")}
+    for c in ("protein", "carbs", "fat"):
+        total[c] = round(sum(d[c] for d in days), 1)
+    n = len(days) or 1
+    tracked = [d for d in days if d["meals"]]
+    return {
+        "days": len(days),
+        "active_days": sum(1 for d in days if any(d[c] for c in _ACTIVITY)),
+        "totals": total,
+        "averages": {
+            "task_completion": round(total["tasks_done"] * 100 / total["tasks_total"]) if total["tasks_total"] else 0,
+            "ritual_adherence": round(total["rituals_done"] * 100 / total["rituals_total"]) if total["rituals_total"] else 0,
+            "deepwork_minutes": round(total["deepwork_minutes"] / n, 1),
+            "focus_score": _avg(d["focus_avg"] for d in days),
+            "calories": round(sum(d["calories"] for d in tracked) / len(tracked)) if tracked else 0,
+            "protein": round(sum(d["protein"] for d in tracked) / len(tracked), 1) if tracked else 0,
+            "detox_success": round(total["detox_success"] * 100 / total["detox_sessions"]) if total["detox_sessions"] else 0,
+            "rating": _avg(d["rating"] or None for d in days),
+            "day_score": _avg(d["day_score"] or None for d in days),
+        },
+    }
@@ -0,0 +1,292 @@
+"""Day schedule: tasks, rituals and deep-work sessions as intervals.
+
+Everything with a time is normalized to ``[start, end)`` minutes since
+midnight and kept in an ``IntervalTree`` (a treap ordered by start, each node
+augmented with the largest end in its subtree). Inserting and asking "what
+overlaps ``[s, e)``" cost O(log n) (plus the number of hits); conflicts and
+free slots come from one in-order walk.
+
+Manual task inserts check for overlaps against a per-day tree that is kept
+while the schedule tables are unchanged and updated in place with each
+inserted task, instead of being reloaded from the database every time.
+"""
+import random
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from app import cache
+
+DAY_START = 7 * 60
+DAY_END = 22 * 60
+MINUTES_PER_DAY = 24 * 60
+
+_RANGE = re.compile(r"^(\d{1,2}):(\d{2})\s*(?:[-–—]\s*(\d{1,2}):(\d{2}))?$")
+
+
+def parse_slot(time_slot: str | None, duration_min: int | None = None) -> tuple[int, int] | None:
+    """``"07:00-07:30"`` or ``"07:00"`` plus a duration -> ``(start, end)`` minutes.
+
+    Ranges that wrap past midnight are cut at the end of the day.
+    """
+    match = _RANGE.match((time_slot or "").strip())
+    if not match:
+        return None
+    h1, m1, h2, m2 = match.groups()
+    start = int(h1) * 60 + int(m1)
+    if int(h1) > 23 or int(m1) > 59:
+        return None
+    if h2 is not None:
+        end = parse_time(f"{h2}:{m2}", end=True)
+        if end is None:
+            return None
+        if end <= start:
+            end = MINUTES_PER_DAY
+    elif duration_min and duration_min > 0:
+        end = min(start + duration_min, MINUTES_PER_DAY)
+    else:
+        return None
+    return start, end
+
+
+def parse_time(value: str | None, end: bool = False) -> int | None:
+    """``"HH:MM"`` -> minutes since midnight; ``"24:00"`` is allowed as an ``end`` bound."""
+    match = _RANGE.match((value or "").strip())
+    if not match or match.group(3) is not None:
+        return None
+    h, m = int(match.group(1)), int(match.group(2))
+    if m > 59 or h > 24 or (h == 24 and (m or not end)):
+        return None
+    return h * 60 + m
+
+
+def hhmm(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+@dataclass
+class Interval:
+    start: int
+    end: int
+    source: str  # "task", "ritual" or "deepwork"
+    id: int | None = None
+    title: str = ""
+
+    def as_dict(self) -> dict:
+        return {"source": self.source, "id": self.id, "title": self.title,
+                "start": hhmm(self.start), "end": hhmm(self.end), "minutes": self.end - self.start}
+
+
+@dataclass
+class _Node:
+    item: Interval
+    priority: float
+    max_end: int
+    left: "_Node | None" = None
+    right: "_Node | None" = None
+
+
+class IntervalTree:
+    """Treap of intervals keyed by start, augmented with subtree max end."""
+
+    def __init__(self, items=()):
+        self._root: _Node | None = None
+        self._size = 0
+        self._rng = random.Random(0)
+        for item in items:
+            self.insert(item)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def insert(self, item: Interval) -> None:
+        self._root = self._insert(self._root, _Node(item, self._rng.random(), item.end))
+        self._size += 1
+
+    def overlapping(self, start: int, end: int) -> list[Interval]:
+        """Intervals that overlap ``[start, end)``, by start."""
+        found: list[Interval] = []
+        self._search(self._root, start, end, found)
+        return found
+
+    def __iter__(self):
+        stack, node = [], self._root
+        while stack or node:
+            while node:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.item
+            node = node.right
+
+    def conflicts(self) -> list[tuple[Interval, Interval]]:
+        """Every overlapping pair, ordered by the later interval's start.
+
+        Two rituals overlapping is how the daily template was set up, not a
+        clash on this day, so those pairs are left out.
+        """
+        pairs, active = [], []
+        for item in self:
+            active = [a for a in active if a.end > item.start]
+            pairs.extend((a, item) for a in active if not (a.source == item.source == "ritual"))
+            active.append(item)
+        return pairs
+
+    def free_slots(self, day_start: int = DAY_START, day_end: int = DAY_END, min_minutes: int = 1) -> list[tuple[int, int]]:
+        """Gaps of at least ``min_minutes`` within ``[day_start, day_end)``."""
+        gaps, cursor = [], day_start
+        for item in self:
+            if item.start >= day_end:
+                break
+            if item.start - cursor >= min_minutes:
+                gaps.append((cursor, item.start))
+            cursor = max(cursor, item.end)
+        if day_end - cursor >= min_minutes:
+            gaps.append((cursor, day_end))
+        return gaps
+
+    def next_free(self, duration: int, after: int = DAY_START, day_end: int = DAY_END) -> tuple[int, int] | None:
+        """Earliest ``duration``-minute gap starting at or after ``after``."""
+        for start, end in self.free_slots(after, day_end, duration):
+            return start, start + duration
+        return None
+
+    # ── treap internals ──
+
+    @staticmethod
+    def _update(node: _Node) -> _Node:
+        node.max_end = max(node.item.end,
+                           node.left.max_end if node.left else node.item.end,
+                           node.right.max_end if node.right else node.item.end)
+        return node
+
+    def _insert(self, node: _Node | None, new: _Node) -> _Node:
+        if node is None:
+            return new
+        if (new.item.start, new.item.end) < (node.item.start, node.item.end):
+            node.left = self._insert(node.left, new)
+            if node.left.priority > node.priority:
+                node = self._rotate_right(node)
+        else:
+            node.right = self._insert(node.right, new)
+            if node.right.priority > node.priority:
+                node = self._rotate_left(node)
+        return self._update(node)
+
+    def _rotate_right(self, node: _Node) -> _Node:
+        top = node.left
+        node.left, top.right = top.right, node
+        self._update(node)
+        return self._update(top)
+
+    def _rotate_left(self, node: _Node) -> _Node:
+        top = node.right
+        node.right, top.left = top.left, node
+        self._update(node)
+        return self._update(top)
+
+    def _search(self, node: _Node | None, start: int, end: int, found: list[Interval]) -> None:
+        if node is None or node.max_end <= start:
+            return
+        self._search(node.left, start, end, found)
+        if node.item.start >= end:
+            return  # this node and its right subtree start too late
+        if node.item.end > start:
+            found.append(node.item)
+        self._search(node.right, start, end, found)
+
+
+# ── Loading a day ────────────────────────────────────────────────────────────
+
+_DAY_SQL = """
+    SELECT 'task' AS source, t.id, t.title, t.time_slot, t.duration_min, NULL AS started_at, NULL AS ended_at
+    FROM tasks t JOIN plans p ON p.id = t.plan_id
+    WHERE p.date = :date AND t.time_slot != ''
+    UNION ALL
+    SELECT 'ritual', id, name, time_slot, duration_min, NULL, NULL
+    FROM rituals WHERE is_active = 1 AND time_slot != ''
+    UNION ALL
+    SELECT 'deepwork', id, task, '', planned_duration, started_at, ended_at
+    FROM deepwork_sessions WHERE date = :date AND started_at IS NOT NULL
+"""
+
+
+def _session_interval(started_at: str, ended_at: str | None, planned: int | None, day: str) -> tuple[int, int] | None:
+    try:
+        start = datetime.fromisoformat(started_at)
+        end = datetime.fromisoformat(ended_at) if ended_at else None
+    except ValueError:
+        return None
+    if start.date().isoformat() != day:
+        return None
+    s = start.hour * 60 + start.minute
+    if end is None:
+        e = s + (planned or 0)
+    elif end.date() > start.date():
+        e = MINUTES_PER_DAY
+    else:
+        e = end.hour * 60 + end.minute
+    return (s, min(max(e, s + 1), MINUTES_PER_DAY))
+
+
+def load_day(db, day: str) -> IntervalTree:
+    """Tree of every timed task, active ritual and started deep-work session on ``day``."""
+    tree = IntervalTree()
+    for row in db.execute(_DAY_SQL, {"date": day}).fetchall():
+        if row["source"] == "deepwork":
+            span = _session_interval(row["started_at"], row["ended_at"], row["duration_min"], day)
+        else:
+            span = parse_slot(row["time_slot"], row["duration_min"])
+        if span:
+            tree.insert(Interval(span[0], span[1], row["source"], row["id"], row["title"]))
+    return tree
+
+
+# ── Per-day trees for incremental overlap checks ─────────────────────────────
+
+_TABLES = ("tasks", "plans", "rituals", "deepwork_sessions")
+_MAX_DAYS = 32
+_days: "OrderedDict[str, tuple[tuple[int, ...], IntervalTree]]" = OrderedDict()
+_days_lock = threading.Lock()
+
+
+def overlapping(db, day: str, start: int, end: int) -> list[Interval]:
+    """Items of ``day`` that overlap ``[start, end)``, from the day's kept tree."""
+    with _days_lock:
+        entry = _days.get(day)
+        if entry is not None and entry[0] == cache.versions(_TABLES):
+            _days.move_to_end(day)
+            return entry[1].overlapping(start, end)
+    # Versions are read before the load: a write that lands in between makes
+    # the entry look stale and reload, never look fresh with missing items.
+    current = cache.versions(_TABLES)
+    tree = load_day(db, day)
+    with _days_lock:
+        _days[day] = (current, tree)
+        _days.move_to_end(day)
+        while len(_days) > _MAX_DAYS:
+            _days.popitem(last=False)
+        return tree.overlapping(start, end)
+
+
+def task_added(day: str, item: Interval) -> None:
+    """Add a just-committed task to the day's tree, if it is otherwise current.
+
+    The tree is kept only when the task insert is the one write since it was
+    loaded (it bumps ``tasks`` and, by cascade, ``plans`` once); after any
+    other write it is dropped and the next check reloads the day.
+    """
+    with _days_lock:
+        entry = _days.get(day)
+        if entry is None:
+            return
+        kept, tree = entry
+        current = cache.versions(_TABLES)
+        expected = tuple(v + 1 if t in ("tasks", "plans") else v for t, v in zip(_TABLES, kept))
+        if current == expected:
+            if not any(i.source == "task" and i.id == item.id for i in tree.overlapping(item.start, item.end)):
+                tree.insert(item)
+            _days[day] = (current, tree)
+        else:
+            del _days[day]
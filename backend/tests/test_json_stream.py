@@ -0,0 +1,174 @@
+"""Fuzz and performance tests for the model-output JSON extractor."""
+import json
+import random
+import time
+
+import pytest
+
+from app.services.ai_planner import validate_plan, validate_task
+from app.services.json_stream import JSONExtractError, TaskStreamParser, extract_object
+
+PLAN = {
+    "big_three": ["Презентация {v2}", "Follow-up", "Книга"],
+    "tasks": [
+        {
+            "category": "Business",
+            "title": f"Задача {i}: \"кавычки\" и {{скобки}} [{i}]",
+            "description": "Подробно, с экранированием \\ и переводом\nстроки",
+            "time_slot": f"{8 + i}:00 - {8 + i}:45",
+            "duration_min": "45",
+            "priority": i % 3 + 1,
+            "meta": {"tags": ["a", {"b": []}]},
+        }
+        for i in range(10)
+    ],
+    "daily_tip": "Начни с самой сложной задачи.",
+    "evening_routine": "Итоги дня.",
+}
+TEXT = json.dumps(PLAN, ensure_ascii=False, indent=2)
+
+
+def _extract(text: str) -> dict | None:
+    try:
+        return extract_object(text, required=("tasks",))
+    except JSONExtractError:
+        return None
+
+
+def _feed(text: str, rng: random.Random, max_chunk: int = 40) -> tuple[list[dict], dict | None]:
+    parser = TaskStreamParser()
+    items, pos = [], 0
+    while pos < len(text):
+        size = rng.randint(1, max_chunk)
+        items += parser.feed(text[pos:pos + size])
+        pos += size
+    try:
+        return items, parser.finish()
+    except JSONExtractError:
+        return items, None
+
+
+@pytest.mark.parametrize("text", [
+    TEXT,
+    "```json\n" + TEXT + "\n```",
+    "Вот план на день {кратко}:\n" + TEXT + "\nУдачи! {\"not\": \"this\"}",
+    "[1, 2] " + TEXT,
+    "{broken} " + TEXT,
+    "Формат ответа: {} или {\"a\": 1}, вот он:\n" + TEXT,
+])
+def test_extract_object_ignores_wrapping(text):
+    assert extract_object(text, required=("tasks",)) == PLAN
+
+
+def test_objects_without_required_keys_are_skipped():
+    assert extract_object('{} {"summary": "ok"}', required=("summary", "score")) == {"summary": "ok"}
+    assert extract_object('{} {"summary": "ok"}') == {}
+    items = TaskStreamParser().feed("Пример: {\"x\": 1} " + TEXT)
+    assert items == PLAN["tasks"]
+
+
+def test_random_chunking_matches_one_shot():
+    rng = random.Random(0)
+    wrappers = [("", ""), ("```json\n", "\n```"), ("План:\n", "\nГотово.")]
+    for _ in range(300):
+        before, after = rng.choice(wrappers)
+        text = before + TEXT + after
+        items, root = _feed(text, rng)
+        assert root == _extract(text) == PLAN
+        assert items == PLAN["tasks"]
+
+
+def test_truncated_prefixes_match_one_shot_and_keep_whole_tasks():
+    rng = random.Random(1)
+    for _ in range(1000):
+        text = ("```json\n" if rng.random() < 0.3 else "") + TEXT[:rng.randint(0, len(TEXT))]
+        items, root = _feed(text, rng)
+        assert root == _extract(text)
+        assert items == PLAN["tasks"][:len(items)]
+        if root is not None:
+            # Repair cuts back to the last complete value: earlier tasks are
+            # whole, the last one keeps a prefix of its fields (the final
+            # field itself may be a cut-back container).
+            tasks = root.get("tasks", [])
+            assert len(tasks) >= len(items)
+            if tasks:
+                assert tasks[:-1] == PLAN["tasks"][:len(tasks) - 1]
+                original = PLAN["tasks"][len(tasks) - 1]
+                keys = list(tasks[-1])
+                assert keys == list(original)[:len(keys)]
+                assert all(tasks[-1][k] == original[k] for k in keys[:-1])
+
+
+@pytest.mark.parametrize("text", ["", "no json here", "```json\n```", "[1, 2, 3]", "{", '{"a"'])
+def test_nothing_usable_raises(text):
+    with pytest.raises(JSONExtractError):
+        extract_object(text)
+
+
+def test_big_three_field_is_reported_before_tasks():
+    parser = TaskStreamParser()
+    cut = TEXT.index('"tasks"')
+    assert parser.feed(TEXT[:cut]) == []
+    assert parser.fields["big_three"] == PLAN["big_three"]
+
+
+_TASK = json.dumps(PLAN["tasks"][0], ensure_ascii=False)
+
+
+@pytest.mark.parametrize("text, check", [
+    ("prose {} " * 300_000 + TEXT + " trailing" * 300_000, lambda r: r == PLAN),
+    ("{" * 2_000_000, lambda r: r is None),
+    # Truncated after the last task closed: every task survives the repair.
+    ('{"tasks": [' + ", ".join([_TASK] * 5_000), lambda r: r == {"tasks": [PLAN["tasks"][0]] * 5_000}),
+], ids=["prose", "unclosed", "truncated"])
+def test_multi_megabyte_input_is_linear(text, check):
+    assert len(text) > 1_000_000
+    started = time.perf_counter()
+    result = _extract(text)
+    assert time.perf_counter() - started < 10
+    assert check(result)
+
+
+def test_validate_task_coerces_fields():
+    task = validate_task({
+        "title": "  Пробежка  ", "category": " HEALTH ", "description": None,
+        "time_slot": "7:00 – 7:30", "duration_min": "abc", "priority": "9",
+    })
+    assert task == {
+        "category": "health", "title": "Пробежка", "description": "",
+        "time_slot": "07:00-07:30", "duration_min": 30, "priority": 3,
+    }
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ({"title": "x", "category": "sleep"}, {"category": "personal"}),
+    ({"title": "x", "time_slot": "25:00-26:00"}, {"time_slot": "", "duration_min": 30}),
+    ({"title": "x", "time_slot": "09:00-10:30", "duration_min": None}, {"duration_min": 90}),
+    ({"title": "x", "duration_min": 10_000, "priority": 0}, {"duration_min": 720, "priority": 1}),
+    ({"title": "x", "duration_min": 12.7}, {"duration_min": 12}),
+    ({"title": "x" * 300}, {"title": "x" * 200}),
+])
+def test_validate_task_bounds(raw, expected):
+    task = validate_task(raw)
+    assert {k: task[k] for k in expected} == expected
+
+
+@pytest.mark.parametrize("raw", [None, "task", ["title"], {}, {"title": "   "}, {"title": None}])
+def test_validate_task_rejects(raw):
+    assert validate_task(raw) is None
+
+
+def test_validate_plan_drops_bad_tasks_and_normalises():
+    plan = validate_plan({
+        "big_three": ["a", " ", 3, "b", "c"],
+        "tasks": [{"title": "ok"}, {"title": ""}, "junk", None],
+        "daily_tip": None,
+    })
+    assert plan["big_three"] == ["a", "3", "b"]
+    assert [t["title"] for t in plan["tasks"]] == ["ok"]
+    assert plan["daily_tip"] == "" and plan["evening_routine"] == ""
+
+
+@pytest.mark.parametrize("data", [{}, {"tasks": None}, {"tasks": [{"title": ""}]}, {"tasks": "many"}])
+def test_validate_plan_without_tasks_is_an_error(data):
+    assert "error" in validate_plan(data)
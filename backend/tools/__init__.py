@@ -0,0 +1 @@
+"""Development tools: mock OpenRouter server and load driver."""
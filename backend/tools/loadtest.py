@@ -0,0 +1,184 @@
+"""Load driver for the AI endpoints.
+
+Fires ``--requests`` calls at ``--concurrency`` against a running backend
+and reports throughput and latency percentiles. A probe hits ``/health``
+throughout the run; if its latency climbs with the load, something is
+blocking the event loop::
+
+    python -m tools.loadtest --scenario stream --concurrency 20 --requests 200
+
+Point the backend at ``tools.mock_openrouter`` to run this without paying
+for model calls. Plans are written to consecutive dates from ``--start-date``,
+so use a scratch ``DB_PATH``.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import date, timedelta
+import httpx
+
+SCENARIOS = ("plan", "stream", "batch", "reflection")
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+async def _wait_for_job(client: httpx.AsyncClient, job_id: str, timeout: float) -> dict:
+    deadline = time.monotonic() + timeout
+    delay = 0.05
+    while time.monotonic() < deadline:
+        job = (await client.get(f"/api/plans/jobs/{job_id}")).raise_for_status().json()
+        if job["status"] in ("done", "failed"):
+            if job["status"] == "failed":
+                raise RuntimeError(job.get("error") or "job failed")
+            return job
+        await asyncio.sleep(delay)
+        delay = min(delay * 1.5, 0.5)
+    raise TimeoutError(f"job {job_id} still running after {timeout}s")
+
+
+async def _call(client: httpx.AsyncClient, scenario: str, day: str, opts: argparse.Namespace):
+    body = {"date": day, "use_cache": opts.cache, "mode": opts.mode}
+    if scenario == "plan":
+        job = (await client.post("/api/plans/generate", json=body)).raise_for_status().json()
+        await _wait_for_job(client, job["job_id"], opts.timeout)
+    elif scenario == "batch":
+        end = (date.fromisoformat(day) + timedelta(days=opts.batch_days - 1)).isoformat()
+        job = (await client.post("/api/plans/generate/batch",
+                                 json={**body, "start": day, "end": end})).raise_for_status().json()
+        await _wait_for_job(client, job["job_id"], opts.timeout)
+    elif scenario == "stream":
+        async with client.stream("POST", "/api/plans/generate/stream", json=body) as resp:
+            resp.raise_for_status()
+            last_event = ""
+            async for line in resp.aiter_lines():
+                if line.startswith("event:"):
+                    last_event = line[6:].strip()
+            if last_event != "done":
+                raise RuntimeError(f"stream ended with {last_event or 'nothing'}")
+    else:
+        resp = await client.post("/api/reflections", json={
+            "date": day, "wins": "Закрыл три ключевые задачи", "lessons": "Меньше созвонов",
+            "mood": "7", "rating": 4, "analyze": True, "use_cache": opts.cache,
+        })
+        resp.raise_for_status()
+
+
+async def _probe(client: httpx.AsyncClient, stop: asyncio.Event, samples: list[float]):
+    while not stop.is_set():
+        t = time.perf_counter()
+        try:
+            await client.get("/health")
+            samples.append(time.perf_counter() - t)
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.05)
+
+
+async def run(opts: argparse.Namespace) -> dict:
+    limits = httpx.Limits(max_connections=opts.concurrency + 2, max_keepalive_connections=opts.concurrency + 2)
+    timeout = httpx.Timeout(opts.timeout, connect=10.0)
+    latencies: list[float] = []
+    errors: dict[str, int] = {}
+    probe_samples: list[float] = []
+    start_day = date.fromisoformat(opts.start_date)
+    step = opts.batch_days if opts.scenario == "batch" else 1
+    queue: asyncio.Queue[int] = asyncio.Queue()
+    for i in range(opts.requests):
+        queue.put_nowait(i)
+
+    async with httpx.AsyncClient(base_url=opts.base_url, limits=limits, timeout=timeout) as client, \
+            httpx.AsyncClient(base_url=opts.base_url, timeout=timeout) as probe_client:
+
+        async def user():
+            while True:
+                try:
+                    i = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                day = (start_day + timedelta(days=i * step)).isoformat()
+                t = time.perf_counter()
+                try:
+                    await _call(client, opts.scenario, day, opts)
+                    latencies.append(time.perf_counter() - t)
+                except Exception as e:
+                    key = type(e).__name__
+                    if isinstance(e, httpx.HTTPStatusError):
+                        key = f"HTTP {e.response.status_code}"
+                    errors[key] = errors.get(key, 0) + 1
+
+        stop = asyncio.Event()
+        probe = asyncio.create_task(_probe(probe_client, stop, probe_samples))
+        began = time.perf_counter()
+        await asyncio.gather(*(user() for _ in range(opts.concurrency)))
+        elapsed = time.perf_counter() - began
+        stop.set()
+        await probe
+
+    return {
+        "scenario": opts.scenario,
+        "concurrency": opts.concurrency,
+        "requests": opts.requests,
+        "ok": len(latencies),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_s": {
+            "mean": round(statistics.fmean(latencies), 4) if latencies else 0.0,
+            "p50": round(percentile(latencies, 50), 4),
+            "p95": round(percentile(latencies, 95), 4),
+            "p99": round(percentile(latencies, 99), 4),
+            "max": round(max(latencies), 4) if latencies else 0.0,
+        },
+        "health_probe_s": {
+            "samples": len(probe_samples),
+            "p50": round(percentile(probe_samples, 50), 4),
+            "p99": round(percentile(probe_samples, 99), 4),
+        },
+    }
+
+
+def _print_report(report: dict):
+    lat, probe = report["latency_s"], report["health_probe_s"]
+    print(f"scenario     {report['scenario']}  (concurrency {report['concurrency']})")
+    print(f"requests     {report['ok']}/{report['requests']} ok in {report['elapsed_s']}s"
+          f"  ->  {report['throughput_rps']} req/s")
+    if report["errors"]:
+        print("errors       " + ", ".join(f"{k}: {v}" for k, v in sorted(report["errors"].items())))
+    print(f"latency      p50 {lat['p50'] * 1000:.0f} ms  p95 {lat['p95'] * 1000:.0f} ms  "
+          f"p99 {lat['p99'] * 1000:.0f} ms  max {lat['max'] * 1000:.0f} ms")
+    print(f"/health      p50 {probe['p50'] * 1000:.1f} ms  p99 {probe['p99'] * 1000:.1f} ms"
+          f"  ({probe['samples']} samples)")
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(prog="python -m tools.loadtest", description=__doc__.split("\n")[0])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8081")
+    parser.add_argument("--scenario", choices=SCENARIOS, default="plan")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--mode", choices=("ai", "local", "auto"), default="ai")
+    parser.add_argument("--cache", action="store_true", help="allow LLM cache hits (off by default)")
+    parser.add_argument("--batch-days", type=int, default=3)
+    parser.add_argument("--start-date", default="2031-01-01")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    opts = parser.parse_args(argv)
+
+    report = asyncio.run(run(opts))
+    if opts.json:
+        import json
+        print(json.dumps(report, indent=2))
+    else:
+        _print_report(report)
+
+
+if __name__ == "__main__":
+    main()
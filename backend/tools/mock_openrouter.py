@@ -0,0 +1,157 @@
+"""Local stand-in for the OpenRouter chat completions API.
+
+Serves ``POST /chat/completions`` (plain and ``stream: true``) with canned
+planner / reflection answers, a configurable latency distribution and
+injectable failures, so the AI endpoints can be benchmarked offline::
+
+    python -m tools.mock_openrouter --port 8099 --latency-median 0.8 --error-rate 0.05
+    OPENROUTER_BASE_URL=http://127.0.0.1:8099 OPENROUTER_API_KEY=mock \\
+        python -m uvicorn app.main:app --port 8081
+
+Every option can also be given as ``MOCK_<OPTION>`` in the environment.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import time
+import uuid
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+_TASKS = [
+    ("health", "Утренняя пробежка 5 км", "07:00-07:45", 45, 2),
+    ("business", "Deep work: презентация для инвесторов", "09:00-10:30", 90, 1),
+    ("business", "Созвон с командой по метрикам", "11:00-11:30", 30, 2),
+    ("learning", "Прочитать 30 страниц книги", "12:00-12:45", 45, 2),
+    ("personal", "Обед без экрана", "13:00-13:45", 45, 3),
+    ("networking", "Написать трём контактам из списка", "14:00-14:30", 30, 2),
+    ("business", "Разбор CRM и follow-up", "15:00-16:00", 60, 1),
+    ("health", "Прогулка", "16:30-17:00", 30, 3),
+    ("learning", "Курс по аналитике: модуль 3", "17:30-18:30", 60, 2),
+    ("mindset", "Медитация и план на завтра", "21:00-21:20", 20, 3),
+]
+
+PLAN_ANSWER = {
+    "big_three": [_TASKS[1][1], _TASKS[6][1], _TASKS[3][1]],
+    "tasks": [
+        {"category": c, "title": t, "description": f"Описание: {t.lower()}", "time_slot": s,
+         "duration_min": d, "priority": p}
+        for c, t, s, d, p in _TASKS
+    ],
+    "daily_tip": "Начни с самой сложной задачи.",
+    "evening_routine": "Итоги дня и отбой до 23:00.",
+}
+
+REFLECTION_ANSWER = {
+    "summary": "Продуктивный день: ключевые задачи закрыты, ритуалы соблюдены.",
+    "next_day": ["Начать с deep work", "Закрыть follow-up до обеда", "Лечь до 23:00"],
+    "score": 78,
+}
+
+
+def _options(argv: list[str] | None = None) -> argparse.Namespace:
+    env = lambda name, default: os.getenv(f"MOCK_{name.upper()}", default)  # noqa: E731
+    parser = argparse.ArgumentParser(prog="python -m tools.mock_openrouter", description=__doc__.split("\n")[0])
+    parser.add_argument("--host", default=env("host", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(env("port", "8099")))
+    parser.add_argument("--latency-median", type=float, default=float(env("latency_median", "0.5")),
+                        help="median time to first byte, seconds")
+    parser.add_argument("--latency-sigma", type=float, default=float(env("latency_sigma", "0.6")),
+                        help="log-normal shape; larger means a heavier tail")
+    parser.add_argument("--stream-chunk", type=int, default=int(env("stream_chunk", "24")),
+                        help="characters per streamed delta")
+    parser.add_argument("--stream-delay", type=float, default=float(env("stream_delay", "0.01")),
+                        help="seconds between streamed deltas")
+    parser.add_argument("--error-rate", type=float, default=float(env("error_rate", "0")),
+                        help="fraction of requests answered with --error-status")
+    parser.add_argument("--error-status", type=int, default=int(env("error_status", "503")))
+    parser.add_argument("--malformed-rate", type=float, default=float(env("malformed_rate", "0")),
+                        help="fraction of answers wrapped in prose or cut short")
+    parser.add_argument("--seed", type=int, default=None)
+    return parser.parse_args(argv)
+
+
+def _answer_for(messages: list[dict]) -> dict:
+    system = next((m.get("content", "") for m in messages if m.get("role") == "system"), "")
+    return REFLECTION_ANSWER if "Анализируешь день" in system else PLAN_ANSWER
+
+
+def _malform(text: str, rng: random.Random) -> str:
+    kind = rng.choice(("fenced", "prose", "truncated", "garbage"))
+    if kind == "fenced":
+        return f"```json\n{text}\n```"
+    if kind == "prose":
+        return f"Вот ваш план {{кратко}}:\n{text}\nУдачного дня!"
+    if kind == "truncated":
+        return text[:rng.randint(len(text) // 3, len(text) - 1)]
+    return "Извините, не могу составить план."
+
+
+def create_app(opts: argparse.Namespace) -> FastAPI:
+    app = FastAPI(title="Mock OpenRouter")
+    rng = random.Random(opts.seed)
+    stats = {"requests": 0, "errors": 0, "malformed": 0, "streams": 0}
+
+    def latency() -> float:
+        if opts.latency_median <= 0:
+            return 0.0
+        return rng.lognormvariate(math.log(opts.latency_median), opts.latency_sigma)
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    @app.post("/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats["requests"] += 1
+        await asyncio.sleep(latency())
+        if rng.random() < opts.error_rate:
+            stats["errors"] += 1
+            return JSONResponse({"error": {"message": "mock upstream error"}}, status_code=opts.error_status)
+
+        content = json.dumps(_answer_for(body.get("messages", [])), ensure_ascii=False)
+        if rng.random() < opts.malformed_rate:
+            stats["malformed"] += 1
+            content = _malform(content, rng)
+        completion_id = f"mock-{uuid.uuid4().hex[:12]}"
+        model = body.get("model", "mock")
+
+        if not body.get("stream"):
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                             "finish_reason": "stop"}],
+            }
+
+        stats["streams"] += 1
+
+        async def events():
+            for i in range(0, len(content), opts.stream_chunk):
+                chunk = {"id": completion_id, "object": "chat.completion.chunk", "model": model,
+                         "choices": [{"index": 0, "delta": {"content": content[i:i + opts.stream_chunk]}}]}
+                yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+                if opts.stream_delay:
+                    await asyncio.sleep(opts.stream_delay)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def main(argv: list[str] | None = None):
+    import uvicorn
+
+    opts = _options(argv)
+    uvicorn.run(create_app(opts), host=opts.host, port=opts.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,10 +6,57 @@ const api = axios.create({
   headers: { 'Content-Type': 'application/json' },
 })
 
+const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms))
+
+// Plan generation runs as a background job: enqueue, then poll until it settles.
+async function waitForJob(jobId, { interval = 1000, timeout = 180000 } = {}) {
+  const deadline = Date.now() + timeout
+  while (Date.now() < deadline) {
+    const job = await api.get(`/plans/jobs/${jobId}`).then(r => r.data)
+    if (job.status === 'done') return job.result
+    if (job.status === 'failed') throw new Error(job.error || 'Plan generation failed')
+    await sleep(interval)
+  }
+  throw new Error('Plan generation timed out')
+}
+
+// Streams plan generation over SSE, calling onEvent(event, data) for every
+// plan/task/done/error event. Resolves with the final "done" payload.
+async function generateStream(data, onEvent = () => {}) {
+  const resp = await fetch('/api/plans/generate/stream', {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json', Accept: 'text/event-stream' },
+    body: JSON.stringify(data),
+  })
+  if (!resp.ok) throw new Error(`Plan generation failed (${resp.status})`)
+  const reader = resp.body.pipeThrough(new TextDecoderStream()).getReader()
+  let buffer = ''
+  let result = null
+  for (;;) {
+    const { value, done } = await reader.read()
+    if (done) break
+    buffer += value
+    let sep
+    while ((sep = buffer.indexOf('\n\n')) >= 0) {
+      const block = buffer.slice(0, sep)
+      buffer = buffer.slice(sep + 2)
+      const event = block.match(/^event: (.*)$/m)?.[1] || 'message'
+      const payload = JSON.parse(block.match(/^data: (.*)$/m)?.[1] || 'null')
+      onEvent(event, payload)
+      if (event === 'error') throw new Error(payload?.detail || 'Plan generation failed')
+      if (event === 'done') result = payload
+    }
+  }
+  return result
+}
+
 export const plansApi = {
-  list: () => api.get('/plans').then(r => r.data),
+  list: (params) => api.get('/plans', { params }).then(r => r.data.items),
   get: (date) => api.get(`/plans/${date}`).then(r => r.data),
-  generate: (data) => api.post('/plans/generate', data).then(r => r.data),
+  generate: (data) => api.post('/plans/generate', data).then(r => waitForJob(r.data.job_id)),
+  generateStream,
+  generateBatch: (data) => api.post('/plans/generate/batch', data).then(r => waitForJob(r.data.job_id, { timeout: 600000 })),
+  job: (id) => api.get(`/plans/jobs/${id}`).then(r => r.data),
   updateTask: (id, data) => api.patch(`/plans/tasks/${id}`, data).then(r => r.data),
   addTask: (date, data) => api.post(`/plans/${date}/tasks`, data).then(r => r.data),
   deleteTask: (id) => api.delete(`/plans/tasks/${id}`).then(r => r.data),
@@ -33,6 +80,10 @@ export const statsApi = {
   get: () => api.get('/stats').then(r => r.data),
 }
 
+export const dashboardApi = {
+  get: (date, sections) => api.get(`/dashboard/${date}`, { params: sections ? { sections: sections.join(',') } : {} }).then(r => r.data),
+}
+
 export const reflectionsApi = {
   get: (date) => api.get(`/reflections/${date}`).then(r => r.data),
   save: (data) => api.post('/reflections', data).then(r => r.data),
@@ -49,7 +100,7 @@ export const ritualsApi = {
 }
 
 export const workoutsApi = {
-  list: (date) => api.get('/workouts', { params: date ? { date_filter: date } : {} }).then(r => r.data),
+  list: (date) => api.get('/workouts', { params: date ? { date_filter: date } : {} }).then(r => r.data.items),
   program: () => api.get('/workouts/program').then(r => r.data),
   create: (data) => api.post('/workouts', data).then(r => r.data),
   update: (id, data) => api.put(`/workouts/${id}`, data).then(r => r.data),
@@ -57,7 +108,7 @@ export const workoutsApi = {
 }
 
 export const nutritionApi = {
-  list: (date) => api.get('/nutrition', { params: date ? { date_filter: date } : {} }).then(r => r.data),
+  list: (date) => api.get('/nutrition', { params: date ? { date_filter: date } : {} }).then(r => r.data.items),
   create: (data) => api.post('/nutrition', data).then(r => r.data),
   delete: (id) => api.delete(`/nutrition/${id}`).then(r => r.data),
   dailySummary: (date) => api.get('/nutrition/daily-summary', { params: date ? { date_filter: date } : {} }).then(r => r.data),
@@ -73,7 +124,7 @@ export const supplementsApi = {
 }
 
 export const deepworkApi = {
-  list: (date) => api.get('/deepwork', { params: date ? { date_filter: date } : {} }).then(r => r.data),
+  list: (date) => api.get('/deepwork', { params: date ? { date_filter: date } : {} }).then(r => r.data.items),
   create: (data) => api.post('/deepwork', data).then(r => r.data),
   start: (id) => api.post(`/deepwork/${id}/start`).then(r => r.data),
   end: (id, data) => api.post(`/deepwork/${id}/end`, data).then(r => r.data),
@@ -86,7 +137,7 @@ export const tmApi = {
 }
 
 export const detoxApi = {
-  list: () => api.get('/detox').then(r => r.data),
+  list: () => api.get('/detox').then(r => r.data.items),
   create: (data) => api.post('/detox', data).then(r => r.data),
   update: (id, data) => api.put(`/detox/${id}`, data).then(r => r.data),
 }
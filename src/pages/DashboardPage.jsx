@@ -7,7 +7,7 @@ import {
 } from 'lucide-react'
 import { Glass, CircularProgress, MiniBarChart } from '../components'
 import { fadeUp, CATEGORIES, today, formatDisplay, dayName, QUOTES } from '../constants'
-import { plansApi, goalsApi, statsApi, ritualsApi, deepworkApi, nutritionApi, tmApi } from '../api'
+import { dashboardApi } from '../api'
 function DashboardPage({ onNav }) {
   const navigate = onNav || (() => {})
   const [data, setData] = useState({ stats: null, rituals: null, tm: null, dw: null, nutrition: null, plan: null, goals: null })
@@ -21,17 +21,21 @@ function DashboardPage({ onNav }) {
 
   useEffect(() => {
     let cancelled = false
-    Promise.all([
-      statsApi.get().catch(() => null),
-      ritualsApi.todayProgress().catch(() => ({ total: 0, completed: 0 })),
-      tmApi.get().catch(() => ({ current_level: 0, level_name: 'Sleep', xp_current: 0, level_progress: 0, xp_needed: 100 })),
-      deepworkApi.stats().catch(() => ({ today_minutes: 0, week_minutes: 0, avg_focus_score: 0 })),
-      nutritionApi.dailySummary().catch(() => ({ total_calories: 0, total_protein: 0, targets: { calories: 2000, protein: 170 } })),
-      plansApi.get(today()).catch(() => null),
-      goalsApi.list().catch(() => []),
-    ]).then(([stats, rituals, tm, dw, nutrition, plan, goals]) => {
-      if (!cancelled) setData({ stats, rituals, tm, dw, nutrition, plan, goals })
-    })
+    // One request, one DB snapshot for every section of the page.
+    dashboardApi.get(today(), ['stats', 'rituals', 'tm', 'deepwork', 'nutrition', 'plan', 'goals'])
+      .catch(() => ({}))
+      .then(d => {
+        if (cancelled) return
+        setData({
+          stats: d.stats ?? null,
+          rituals: d.rituals ?? { total: 0, completed: 0 },
+          tm: d.tm ?? { current_level: 0, level_name: 'Sleep', xp_current: 0, level_progress: 0, xp_needed: 100 },
+          dw: d.deepwork ?? { today_minutes: 0, week_minutes: 0, avg_focus_score: 0 },
+          nutrition: d.nutrition ?? { total_calories: 0, total_protein: 0, targets: { calories: 2000, protein: 170 } },
+          plan: d.plan ?? null,
+          goals: d.goals ?? [],
+        })
+      })
     return () => { cancelled = true }
   }, [])
 
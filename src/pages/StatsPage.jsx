@@ -48,6 +48,7 @@ function StatsPage() {
         mood: overrides.mood ?? selectedMood,
         wins_list: overrides.wins_list ?? wins,
         lesson: overrides.lesson ?? lesson,
+        analyze: false,
       })
       setSaved(true)
       setTimeout(() => setSaved(false), 2000)
@@ -164,6 +165,9 @@ function StatsPage() {
             >🔥</motion.div>
             <div className="text-2xl font-bold text-white">{streak}</div>
             <div className="text-[11px] text-[#9CA3AF] mt-0.5">дней подряд</div>
+            {stats?.longest_streak > streak && (
+              <div className="text-[10px] text-[#6B7280] mt-1">рекорд: {stats.longest_streak}</div>
+            )}
           </div>
         </Glass>
         <Glass className="p-5 col-span-1 relative overflow-hidden">